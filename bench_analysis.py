@@ -0,0 +1,320 @@
+"""
+Analysis benchmark: CPU cost of page analysis, without any network
+Times detect_manufacturing and extract_internal_links over a corpus of pages,
+plus the phases of analyze_page on their own (parse, links, strip, text,
+match), per page and per MB of HTML. Each page is timed --repeat times with
+the garbage collector off and the fastest run is kept; the whole corpus is
+timed --rounds times and the median round is reported, so one slow round (a
+busy neighbour, a CPU frequency dip) does not move the result.
+
+The built-in corpus is generated (same pages every run) in four categories:
+
+    small     ~8 KB brochure pages
+    large     ~1 MB catalog pages, big tables and thousands of links
+    scripted  ~320 KB pages that are mostly inline <script>/<style>
+    spanish   ~25 KB Spanish-language pages (accented text, non-English terms)
+
+--corpus DIR uses real pages instead: DIR/<category>/*.html (or DIR/*.html).
+
+Save a baseline once, then compare: the run fails (exit 1) when any timing
+is more than --threshold slower per MB than the baseline. The report prints
+the spread between rounds; the comparison only means something when that
+spread is well under the threshold. Identical code re-run on a shared
+machine came within 20% of its baseline (the small pages are the noisiest),
+hence the 30% default; where the spread is above the threshold, raise
+--rounds (or the threshold) before trusting a failure.
+
+Usage:
+    python bench_analysis.py
+    python bench_analysis.py --save-baseline analysis_baseline.json
+    python bench_analysis.py --baseline analysis_baseline.json --threshold 0.3
+    python bench_analysis.py --corpus saved_pages/ --repeat 5 --rounds 9
+"""
+
+import argparse
+import gc
+import json
+import os
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+# main.py builds its Supabase client at import time; nothing is sent to it here
+os.environ.setdefault('SUPABASE_URL', 'https://localhost.invalid')
+os.environ.setdefault('SUPABASE_KEY', 'bench.placeholder.key')
+
+import main
+from page_parser import internal_links, parse_html, strip_non_text, tree_text
+
+PHASES = ('parse', 'links', 'strip', 'text', 'match')
+FUNCTIONS = ('detect_manufacturing', 'extract_internal_links')
+
+# Timings faster than this per page are mostly timer noise; they are reported but never fail a run
+NOISE_FLOOR_MS = 0.05
+
+DOMAIN = 'acme-precision.example'
+
+ENGLISH = [
+    'Precision CNC machining and 5-axis milling for aerospace and medical customers.',
+    'Our Haas and Mazak machining centers hold tolerances to +/- 0.0005 in.',
+    'Injection molding of ABS, polycarbonate and glass-filled nylon.',
+    'Sheet metal fabrication, laser cutting, press brake forming and TIG welding.',
+    'We machine 6061-T6 aluminum, 304 stainless steel, titanium and PEEK.',
+    'ISO 9001:2015 and AS9100 certified; first article inspection on every job.',
+    'Family owned since 1978, serving customers across the Midwest.',
+    'Request a quote today and our team will respond within 24 hours.',
+]
+SPANISH = [
+    'Mecanizado CNC de precisión y fresado en 5 ejes para la industria aeroespacial.',
+    'Moldeo por inyección de plásticos técnicos: ABS, policarbonato y nylon.',
+    'Trabajamos acero inoxidable, aluminio 6061, latón y titanio.',
+    'Corte por láser, plegado de chapa y soldadura TIG/MIG en nuestras instalaciones.',
+    'Certificación ISO 9001; inspección dimensional con máquina de medición por coordenadas.',
+    'Más de cuarenta años de experiencia al servicio de nuestros clientes en España y México.',
+    'Solicite un presupuesto sin compromiso: le responderemos en menos de 24 horas.',
+]
+
+
+def page_shell(title, body, head_extra='', lang='en'):
+    return (f'<!DOCTYPE html><html lang="{lang}"><head><meta charset="utf-8"><title>{title}</title>'
+            f'{head_extra}</head><body>{body}</body></html>')
+
+
+def nav(rng, count):
+    links = [f'<li><a href="/{rng.choice(["services", "products", "about", "blog"])}/{i}">Item {i}</a></li>'
+             for i in range(count)]
+    links.append('<li><a href="https://www.linkedin.com/company/acme">LinkedIn</a></li>')
+    links.append('<li><a href="mailto:sales@acme-precision.example">Email us</a></li>')
+    return '<nav><ul>' + ''.join(links) + '</ul></nav>'
+
+
+def paragraphs(rng, sentences, count):
+    return ''.join(f'<p>{" ".join(rng.choices(sentences, k=4))}</p>' for _ in range(count))
+
+
+def small_page(rng):
+    body = (nav(rng, 12) + '<header><h1>Acme Precision</h1></header><main>' + paragraphs(rng, ENGLISH, 24)
+            + '</main><footer><p>&copy; Acme Precision</p></footer>')
+    return page_shell('Acme Precision', body)
+
+
+def large_page(rng):
+    rows = ''.join(
+        f'<tr><td><a href="/products/part-{i}">Part {i:05d}</a></td><td>{rng.choice(["6061 aluminum", "303 stainless", "Delrin", "brass"])}</td>'
+        f'<td>{rng.uniform(0.1, 20):.3f} in</td><td>{rng.choice(["CNC turned", "milled", "molded"])}</td></tr>'
+        for i in range(9000)
+    )
+    body = (nav(rng, 200) + '<main><h1>Parts catalog</h1>' + paragraphs(rng, ENGLISH, 60)
+            + f'<table><thead><tr><th>Part</th><th>Material</th><th>Size</th><th>Process</th></tr></thead><tbody>{rows}</tbody></table></main>')
+    return page_shell('Catalog', body)
+
+
+def scripted_page(rng):
+    bundle = ''.join(
+        f'function m{i}(e,t){{var n=t.get("k{i}")||{{}};return e.map(function(r){{return r*{rng.randint(2, 99)}+n.v}})}}'
+        for i in range(2500)
+    )
+    state = json.dumps({'products': [{'id': i, 'name': f'Widget {i}', 'material': 'steel'} for i in range(800)]})
+    styles = ''.join(f'.c{i}{{margin:{i % 17}px;color:#{rng.randrange(16**6):06x}}}' for i in range(2000))
+    head = f'<style>{styles}</style><script>{bundle}</script>'
+    body = (nav(rng, 20) + '<div id="app">' + paragraphs(rng, ENGLISH, 4) + '</div>'
+            + f'<script type="application/json" id="state">{state}</script>'
+            + '<script>window.dataLayer=window.dataLayer||[];function gtag(){dataLayer.push(arguments)}</script>')
+    return page_shell('Acme', body, head)
+
+
+def spanish_page(rng):
+    body = (nav(rng, 25) + '<main><h1>Mecanizados Acme</h1>' + paragraphs(rng, SPANISH, 80) + '</main>'
+            + '<footer><p>Polígono Industrial, Nave 4 · Bilbao</p></footer>')
+    return page_shell('Mecanizados Acme', body, lang='es')
+
+
+GENERATORS = {
+    'small': small_page,
+    'large': large_page,
+    'scripted': scripted_page,
+    'spanish': spanish_page,
+}
+
+
+def builtin_corpus(pages, seed):
+    """{category: [html, ...]} of generated pages"""
+    rng = random.Random(seed)
+    return {category: [make(rng) for _ in range(pages)] for category, make in GENERATORS.items()}
+
+
+def load_corpus(directory):
+    """{category: [html, ...]} from DIR/<category>/*.html and DIR/*.html"""
+    directory = Path(directory)
+    corpus = {}
+    for path in sorted(directory.rglob('*.htm*')):
+        category = path.parent.name if path.parent != directory else 'corpus'
+        corpus.setdefault(category, []).append(path.read_text(encoding='utf-8', errors='replace'))
+    return corpus
+
+
+class gc_paused:
+    """Collect, then keep the garbage collector off while timing (as timeit does)"""
+
+    def __enter__(self):
+        gc.collect()
+        self.enabled = gc.isenabled()
+        gc.disable()
+
+    def __exit__(self, *exc):
+        if self.enabled:
+            gc.enable()
+
+
+def fastest(fn, repeat):
+    """Fastest of repeat runs of fn(), in milliseconds"""
+    best = float('inf')
+    with gc_paused():
+        for _ in range(repeat):
+            start = time.perf_counter_ns()
+            fn()
+            best = min(best, time.perf_counter_ns() - start)
+    return best / 1e6
+
+
+def time_phases(html, url, repeat):
+    """Fastest time of each analyze_page phase, in milliseconds"""
+    best = dict.fromkeys(PHASES, float('inf'))
+    with gc_paused():
+        for _ in range(repeat):
+            t0 = time.perf_counter_ns()
+            root = parse_html(html)
+            t1 = time.perf_counter_ns()
+            internal_links(root, DOMAIN)
+            t2 = time.perf_counter_ns()
+            strip_non_text(root)
+            t3 = time.perf_counter_ns()
+            text = tree_text(root)
+            t4 = time.perf_counter_ns()
+            main.match_text(text, url)
+            t5 = time.perf_counter_ns()
+            for phase, elapsed in zip(PHASES, (t1 - t0, t2 - t1, t3 - t2, t4 - t3, t5 - t4)):
+                best[phase] = min(best[phase], elapsed / 1e6)
+    return best
+
+
+def time_round(pages, url, repeat):
+    """{metric: total ms} of one pass over a category's pages"""
+    totals = dict.fromkeys(PHASES + FUNCTIONS, 0.0)
+    for html in pages:
+        for phase, ms in time_phases(html, url, repeat).items():
+            totals[phase] += ms
+        totals['detect_manufacturing'] += fastest(lambda: main.detect_manufacturing(html, url), repeat)
+        totals['extract_internal_links'] += fastest(lambda: main.extract_internal_links(html, DOMAIN), repeat)
+    return totals
+
+
+def run(corpus, repeat, rounds=5):
+    """{category: {metric: {'ms_per_page', 'ms_per_mb', 'spread'}}} plus the corpus sizes
+
+    Each timing is the median of `rounds` passes; spread is how far the furthest pass
+    was from that median, the noise a comparison has to stay above.
+    """
+    url = f'https://{DOMAIN}/services'
+    results = {}
+    for category, pages in corpus.items():
+        passes = [time_round(pages, url, repeat) for _ in range(rounds)]
+        size = sum(len(html.encode('utf-8')) for html in pages)
+        megabytes = size / 2**20
+        timings = {}
+        for metric in PHASES + FUNCTIONS:
+            totals = [totals[metric] for totals in passes]
+            total = statistics.median(totals)
+            timings[metric] = {
+                'ms_per_page': round(total / len(pages), 4),
+                'ms_per_mb': round(total / megabytes, 3),
+                'spread': round(max(abs(t - total) for t in totals) / total, 3) if total else 0.0,
+            }
+        results[category] = {
+            'pages': len(pages),
+            'kb_per_page': round(size / 1024 / len(pages), 1),
+            'timings': timings,
+        }
+    return results
+
+
+def worst_spread(results):
+    """Largest round-to-round spread of the timings a comparison would check"""
+    return max((timing['spread'] for result in results.values() for timing in result['timings'].values()
+                if timing['ms_per_page'] >= NOISE_FLOOR_MS), default=0.0)
+
+
+def regressions(results, baseline, threshold):
+    """(category, metric, old, new) of every ms/MB timing slower than baseline by more than threshold"""
+    found = []
+    for category, result in results.items():
+        old_result = baseline.get(category)
+        if old_result is None:
+            continue
+        for metric, timing in result['timings'].items():
+            old = old_result['timings'].get(metric)
+            if old is None or old['ms_per_page'] < NOISE_FLOOR_MS:
+                continue
+            if timing['ms_per_mb'] > old['ms_per_mb'] * (1 + threshold):
+                found.append((category, metric, old['ms_per_mb'], timing['ms_per_mb']))
+    return found
+
+
+def print_report(results):
+    metrics = PHASES + FUNCTIONS
+    labels = ('parse', 'links', 'strip', 'text', 'match', 'detect', 'extract')
+    print(f"{'':<10} {'pages':>5} {'KB/page':>8}  " + ' '.join(f'{label:>8}' for label in labels))
+    for category, result in results.items():
+        timings = result['timings']
+        print(f"{category:<10} {result['pages']:>5} {result['kb_per_page']:>8}  "
+              + ' '.join(f"{timings[m]['ms_per_page']:>8.3f}" for m in metrics) + '  ms/page')
+        print(f"{'':<10} {'':>5} {'':>8}  "
+              + ' '.join(f"{timings[m]['ms_per_mb']:>8.1f}" for m in metrics) + '  ms/MB')
+
+
+def cli():
+    parser = argparse.ArgumentParser(description='CPU cost of page analysis on a fixed corpus')
+    parser.add_argument('--corpus', help='Directory of real .html pages (default: generated corpus)')
+    parser.add_argument('--pages', type=int, default=5, help='Generated pages per category (default: 5)')
+    parser.add_argument('--seed', type=int, default=1, help='Generated corpus seed (default: 1)')
+    parser.add_argument('--repeat', type=int, default=10, help='Runs per page; the fastest is kept (default: 10)')
+    parser.add_argument('--rounds', type=int, default=5,
+                        help='Passes over the corpus; the median is reported (default: 5)')
+    parser.add_argument('--save-baseline', metavar='FILE', help='Write the results as the new baseline')
+    parser.add_argument('--baseline', metavar='FILE', help='Fail if slower than this baseline')
+    parser.add_argument('--threshold', type=float, default=0.3,
+                        help='Allowed slowdown per MB vs. the baseline (default: 0.3 = 30%%)')
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.corpus) if args.corpus else builtin_corpus(args.pages, args.seed)
+    if not corpus:
+        sys.exit(f"No .html pages in {args.corpus}")
+
+    results = run(corpus, args.repeat, args.rounds)
+    print_report(results)
+    spread = worst_spread(results)
+    print(f"Round-to-round spread: up to {spread:.0%}")
+
+    if args.save_baseline:
+        with open(args.save_baseline, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"💾 Baseline saved to {args.save_baseline}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if spread >= args.threshold:
+            print(f"⚠️  Spread is above the {args.threshold:.0%} threshold: this machine is too noisy "
+                  f"for the comparison, raise --rounds or --threshold")
+        slower = regressions(results, baseline, args.threshold)
+        for category, metric, old, new in slower:
+            print(f"⚠️  {category}/{metric}: {old:.1f} -> {new:.1f} ms/MB (+{(new / old - 1) * 100:.0f}%)")
+        if slower:
+            sys.exit(1)
+        print(f"✅ Within {args.threshold:.0%} of {args.baseline}")
+
+
+if __name__ == '__main__':
+    cli()
@@ -0,0 +1,161 @@
+"""
+Memory benchmark: peak RSS of a crawl over a synthetic large-page corpus
+Runs process_batch against an in-process mock web server (no network, no
+database) in two variants, each in its own subprocess so peak RSS is clean:
+
+    retain   every page's HTML is kept until its domain finishes (the old pipeline)
+    stream   each page is reduced to its indicators and dropped (current pipeline)
+
+Usage:
+    python bench_memory.py                          # both variants, side by side
+    python bench_memory.py --domains 20 --page-kb 2000
+    python bench_memory.py --variant stream         # one variant, JSON on stdout
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+
+import psutil
+
+# main.py builds its Supabase client at import time; nothing is sent to it here
+os.environ.setdefault('SUPABASE_URL', 'https://localhost.invalid')
+os.environ.setdefault('SUPABASE_KEY', 'bench.placeholder.key')
+
+CONTENT = (
+    '<p>Precision CNC machining, swiss turning and 5-axis milling on Haas and Mazak '
+    'machines. Injection molding of ABS, PEEK and nylon 6/6; stainless steel, '
+    '6061-T6 aluminum and titanium parts.</p>\n'
+)
+FILLER = (
+    '<div class="post"><span>Lorem ipsum dolor sit amet, consectetur adipiscing elit, '
+    'sed do eiusmod tempor incididunt ut labore et dolore magna aliqua.</span></div>\n'
+)
+
+
+def make_page(size_kb, links):
+    """A synthetic HTML page of roughly size_kb kilobytes"""
+    nav = ''.join(f'<a href="/page-{i}">Page {i}</a>' for i in range(links))
+    filler = FILLER * max(1, (size_kb * 1024) // len(FILLER))
+    return f'<html><head><title>Shop</title></head><body><nav>{nav}</nav>{CONTENT}{filler}</body></html>'
+
+
+class PeakRSS:
+    """Samples this process's RSS in a background thread and keeps the maximum"""
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.process = psutil.Process()
+        self.peak = self.process.memory_info().rss
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+
+    def _sample(self):
+        while not self._stop.is_set():
+            self.peak = max(self.peak, self.process.memory_info().rss)
+            time.sleep(self.interval)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+
+def run_variant(variant, domains, page_kb):
+    """Crawl the synthetic corpus once and return the measurements"""
+    import httpx
+    import main
+    from dns_prefilter import DnsPrefilter, StubResolver
+    from rate_limits import HostRateLimiter
+
+    page = make_page(page_kb, main.MAX_PAGES_PER_DOMAIN)
+
+    def handler(request):
+        return httpx.Response(200, text=page, headers={'content-type': 'text/html'})
+
+    main.make_session = lambda: httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    main.save_domain_results = lambda rows: None
+    main.log = lambda msg: None
+    main.HOST_REQUEST_DELAY = 0
+    main.host_limiter = HostRateLimiter(rate=None)
+    main.MAX_DOMAIN_TIME = 3600  # measure full domains, not the time breaker
+    main.SATURATION_PATIENCE = 0  # ...nor adaptive depth: every page repeats the same findings
+
+    names = [f'shop{i}.example' for i in range(domains)]
+    main.dns_prefilter = DnsPrefilter(StubResolver({name: ['127.0.0.1'] for name in names}))
+
+    if variant == 'retain':
+        # Recreate the old pipeline: every page's HTML stays alive until its domain is done
+        retained = {}
+        analyze = main.run_analysis
+        crawl = main.crawl_domain
+
+        async def run_analysis_retaining(html, url, base_domain=None):
+            retained.setdefault(url.split('/')[2].replace('www.', ''), []).append(html)
+            return await analyze(html, url, base_domain)
+
+        async def crawl_domain_retaining(base_url, session, sink):
+            try:
+                return await crawl(base_url, session, sink)
+            finally:
+                retained.pop(base_url.split('/')[2], None)
+
+        main.run_analysis = run_analysis_retaining
+        main.crawl_domain = crawl_domain_retaining
+
+    baseline = psutil.Process().memory_info().rss
+    start = time.perf_counter()
+    with PeakRSS() as rss:
+        asyncio.run(main.process_batch(names))
+    elapsed = time.perf_counter() - start
+
+    return {
+        'variant': variant,
+        'domains': domains,
+        'pages': main.performance_stats['pages_analyzed'],
+        'page_kb': page_kb,
+        'baseline_rss_mb': round(baseline / 2**20, 1),
+        'peak_rss_mb': round(rss.peak / 2**20, 1),
+        'growth_mb': round((rss.peak - baseline) / 2**20, 1),
+        'seconds': round(elapsed, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Peak RSS of a crawl over synthetic large pages')
+    parser.add_argument('--domains', type=int, default=20, help='Domains crawled concurrently (default: 20)')
+    parser.add_argument('--page-kb', type=int, default=1000, help='Size of every page in KB (default: 1000)')
+    parser.add_argument('--variant', choices=['retain', 'stream'], help='Run one variant in this process')
+    args = parser.parse_args()
+
+    if args.variant:
+        print(json.dumps(run_variant(args.variant, args.domains, args.page_kb)))
+        return
+
+    results = []
+    for variant in ('retain', 'stream'):
+        out = subprocess.run(
+            [sys.executable, __file__, '--variant', variant,
+             '--domains', str(args.domains), '--page-kb', str(args.page_kb)],
+            check=True, capture_output=True, text=True
+        )
+        results.append(json.loads(out.stdout.strip().splitlines()[-1]))
+
+    print(f"{args.domains} domains x {results[0]['pages'] // max(1, args.domains)} pages x {args.page_kb} KB")
+    for r in results:
+        print(f"  {r['variant']:<7} peak RSS {r['peak_rss_mb']:>7.1f} MB "
+              f"(+{r['growth_mb']:.1f} MB over baseline) in {r['seconds']}s")
+    saved = results[0]['growth_mb'] - results[1]['growth_mb']
+    print(f"  stream saves {saved:.1f} MB of peak growth")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,512 @@
+"""
+Throughput benchmark: a full crawl against a local mock web server
+Starts an HTTP/1.1 + HTTP/2 server in a subprocess that simulates a seeded
+population of sites (page sizes, latency, link fan-out, 429s, 5xx, hung and
+dropped connections, names without DNS) and runs process_batch against it,
+with the database stubbed out. Every host name connects to that one server,
+which picks the site from the Host header (or :authority).
+
+The crawler's own connection pool is used, keyed by the real site names;
+only the socket is redirected. TLS is simulated: a new connection to an
+https:// URL waits --tls-ms for its "handshake", then gets h2 if the client
+offers it (--http2), so the connections opened per page and what they cost
+show up as they would against real sites.
+
+Reports domains/min, pages/sec, per-domain latency percentiles, connections
+opened per page, CPU time per page and peak RSS, and can save them as JSON
+to compare runs:
+
+Usage:
+    python bench_throughput.py                              # 200 sites, default mix
+    python bench_throughput.py --sites 500 --page-kb 120 --latency-ms 80
+    python bench_throughput.py --output before.json
+    python bench_throughput.py --output after.json --compare before.json
+    python bench_throughput.py --pool legacy --output before.json   # the old single 100/20 pool
+    python bench_throughput.py --http2 --compare before.json
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import subprocess
+import sys
+import time
+from collections import Counter
+from datetime import datetime, timezone
+
+# main.py builds its Supabase client at import time; nothing is sent to it here
+os.environ.setdefault('SUPABASE_URL', 'https://localhost.invalid')
+os.environ.setdefault('SUPABASE_KEY', 'bench.placeholder.key')
+
+from bench_memory import CONTENT, FILLER, PeakRSS
+
+SITE_SUFFIX = '.bench'
+
+# --pool legacy: the single shared pool the client had before per-host pools
+LEGACY_LIMITS = dict(max_connections=100, max_keepalive_connections=20, keepalive_expiry=30.0)
+
+# Behaviour of a site, see make_population
+#   ok            every request answers
+#   rate_limited  more than one request a second gets 429 + Retry-After: 1
+#   errors        the first request for every third page gets a 503
+#   hung          requests never get an answer (crawler timeouts)
+#   dropped       the connection is closed without a response
+#   dead          the name does not resolve
+KINDS = ('ok', 'rate_limited', 'errors', 'hung', 'dropped', 'dead')
+
+
+def make_population(args):
+    """Seeded list of site specs; the server and the client build the same one"""
+    rng = random.Random(args.seed)
+    mix = {
+        'rate_limited': args.rate_limited,
+        'errors': args.errors,
+        'hung': args.hung,
+        'dropped': args.dropped,
+        'dead': args.dead,
+    }
+    sites = []
+    for i in range(args.sites):
+        roll = rng.random()
+        kind = 'ok'
+        for name, share in mix.items():
+            if roll < share:
+                kind = name
+                break
+            roll -= share
+        sites.append({
+            'name': f'site{i}{SITE_SUFFIX}',
+            'kind': kind,
+            'pages': rng.randint(1, args.fanout),
+            # Page sizes are skewed: most pages small, a few large
+            'page_kb': max(1, int(rng.lognormvariate(math.log(args.page_kb), 0.8))),
+            'latency': rng.uniform(0, 2 * args.latency_ms) / 1000,
+            'www': rng.random() < 0.5,  # apex redirects to www
+            'manufacturing': rng.random() < 0.7,
+        })
+    return sites
+
+
+# ---------------------------------------------------------------- server side
+
+def make_page(site, path):
+    """HTML for one page of a site; the homepage links to every other page"""
+    if path == '/':
+        nav = ''.join(f'<a href="/page-{i}">Page {i}</a>' for i in range(1, site['pages']))
+        nav += '<a href="https://elsewhere.example/">Partner</a>'
+    else:
+        nav = '<a href="/">Home</a>'
+    content = CONTENT if site['manufacturing'] else ''
+    filler = FILLER * max(1, (site['page_kb'] * 1024) // len(FILLER))
+    return (f'<html><head><title>{site["name"]}</title></head><body>'
+            f'<nav>{nav}</nav>{content}{filler}</body></html>').encode()
+
+
+def response_headers(body, headers=()):
+    """Header (name, value) pairs of an answer"""
+    fields = [('content-length', str(len(body)))]
+    if body:
+        fields.append(('content-type', 'text/html; charset=utf-8'))
+    return fields + list(headers)
+
+
+def http1_response(status, reason, body=b'', headers=()):
+    head = [f'HTTP/1.1 {status} {reason}'] + [f'{name}: {value}' for name, value in response_headers(body, headers)]
+    return ('\r\n'.join(head) + '\r\n\r\n').encode() + body
+
+
+async def serve(args):
+    sites = {site['name']: site for site in make_population(args)}
+    pages = {}
+    seen = set()  # (host, path) pairs already requested, for the first-hit 503s
+    last_served = {}  # host -> time of its last answered request, for the 429s
+
+    def answer(host, path):
+        apex = host[4:] if host.startswith('www.') else host
+        site = sites.get(apex)
+        if site is None:
+            return 404, 'Not Found', b'', []
+        if site['www'] and host == apex:
+            return 301, 'Moved Permanently', b'', [('location', f'https://www.{apex}{path}')]
+
+        path = path.split('?')[0]
+        number = path[len('/page-'):] if path.startswith('/page-') else None
+        if path != '/' and not (number and number.isdigit() and 0 < int(number) < site['pages']):
+            return 404, 'Not Found', b'', []
+
+        if site['kind'] == 'rate_limited':
+            now = time.monotonic()
+            if now - last_served.get(host, -1.0) < 1.0:
+                return 429, 'Too Many Requests', b'', [('retry-after', '1')]
+            last_served[host] = now
+
+        first = (host, path) not in seen
+        seen.add((host, path))
+        if first and site['kind'] == 'errors' and int(number or 0) % 3 == 0:
+            return 503, 'Service Unavailable', b'', []
+
+        key = (apex, path)
+        if key not in pages:
+            pages[key] = make_page(site, path)
+        return 200, 'OK', pages[key], []
+
+    async def handle(reader, writer):
+        try:
+            while True:
+                head = await reader.readuntil(b'\r\n\r\n')
+                if head.startswith(b'PRI * HTTP/2.0'):
+                    # h2 connection preface (the client negotiated HTTP/2 over the simulated TLS)
+                    await serve_http2(reader, writer, head + await reader.readexactly(6), sites, answer)
+                    break
+                lines = head.decode('latin-1').split('\r\n')
+                path = lines[0].split(' ')[1]
+                headers = dict(line.split(':', 1) for line in lines[1:] if ':' in line)
+                headers = {k.strip().lower(): v.strip() for k, v in headers.items()}
+                host = headers.get('host', '').split(':')[0].lower()
+
+                site = sites.get(host[4:] if host.startswith('www.') else host)
+                if site is not None:
+                    if site['kind'] == 'hung':
+                        await asyncio.sleep(3600)
+                    if site['kind'] == 'dropped':
+                        break
+                    await asyncio.sleep(site['latency'])
+                writer.write(http1_response(*answer(host, path)))
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError, IndexError):
+            pass
+        finally:
+            writer.close()
+
+    server = await asyncio.start_server(handle, '127.0.0.1', 0, backlog=1024)
+    print(server.sockets[0].getsockname()[1], flush=True)
+    async with server:
+        await server.serve_forever()
+
+
+async def serve_http2(reader, writer, preface, sites, answer):
+    """One HTTP/2 connection: every request stream is answered concurrently, within flow control"""
+    import h2.config
+    import h2.connection
+    import h2.events
+    import h2.exceptions
+
+    conn = h2.connection.H2Connection(h2.config.H2Configuration(client_side=False, header_encoding='utf-8'))
+    conn.initiate_connection()
+    window_opened = asyncio.Event()
+    streams = set()
+
+    async def flush():
+        writer.write(conn.data_to_send())
+        await writer.drain()
+
+    async def respond(stream_id, headers):
+        host = headers.get(':authority', '').split(':')[0].lower()
+        site = sites.get(host[4:] if host.startswith('www.') else host)
+        if site is not None:
+            if site['kind'] == 'hung':
+                await asyncio.sleep(3600)
+            if site['kind'] == 'dropped':
+                writer.close()
+                return
+            await asyncio.sleep(site['latency'])
+        status, _, body, extra = answer(host, headers.get(':path', '/'))
+        try:
+            conn.send_headers(stream_id, [(':status', str(status))] + response_headers(body, extra))
+            while body:
+                window = conn.local_flow_control_window(stream_id)
+                if window < 1:
+                    window_opened.clear()
+                    await flush()
+                    await window_opened.wait()
+                    continue
+                size = min(window, conn.max_outbound_frame_size, len(body))
+                conn.send_data(stream_id, body[:size])
+                body = body[size:]
+                await flush()
+            conn.end_stream(stream_id)
+            await flush()
+        except (h2.exceptions.StreamClosedError, h2.exceptions.ProtocolError, ConnectionError):
+            pass  # the client reset the stream (page size cap, timeout) or went away
+
+    try:
+        events = conn.receive_data(preface)
+        while True:
+            for event in events:
+                if isinstance(event, h2.events.RequestReceived):
+                    task = asyncio.create_task(respond(event.stream_id, dict(event.headers)))
+                    streams.add(task)
+                    task.add_done_callback(streams.discard)
+                elif isinstance(event, (h2.events.WindowUpdated, h2.events.RemoteSettingsChanged,
+                                        h2.events.StreamReset)):
+                    window_opened.set()
+                elif isinstance(event, h2.events.ConnectionTerminated):
+                    return
+            await flush()
+            data = await reader.read(65536)
+            if not data:
+                return
+            events = conn.receive_data(data)
+    except (h2.exceptions.ProtocolError, ConnectionError):
+        pass
+    finally:
+        for task in streams:
+            task.cancel()
+
+
+# ---------------------------------------------------------------- client side
+
+def percentile(values, q):
+    """Nearest-rank percentile of a list"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(q / 100 * len(ordered)) - 1)]
+
+
+def run_benchmark(args, server_port):
+    """Crawl the simulated population once and return the measurements"""
+    import httpx
+    import main
+    from dns_prefilter import DnsPrefilter, StubResolver
+    from rate_limits import HostRateLimiter
+
+    import httpcore
+
+    connections = Counter()
+
+    class SimulatedTLS:
+        """Stands in for the ssl object of a TLS connection: ALPN picks h2 if the client offered it"""
+
+        def __init__(self, protocol):
+            self.protocol = protocol
+
+        def selected_alpn_protocol(self):
+            return self.protocol
+
+    class LocalStream(httpcore.AsyncNetworkStream):
+        """Socket to the local server; start_tls only costs --tls-ms"""
+
+        def __init__(self, inner, tls=None):
+            self.inner = inner
+            self.tls = tls
+
+        async def read(self, max_bytes, timeout=None):
+            return await self.inner.read(max_bytes, timeout)
+
+        async def write(self, buffer, timeout=None):
+            await self.inner.write(buffer, timeout)
+
+        async def aclose(self):
+            await self.inner.aclose()
+
+        async def start_tls(self, ssl_context, server_hostname=None, timeout=None):
+            connections['tls_handshakes'] += 1
+            await asyncio.sleep(args.tls_ms / 1000)
+            return LocalStream(self.inner, SimulatedTLS('h2' if main.HTTP2 else 'http/1.1'))
+
+        def get_extra_info(self, info):
+            if info == 'ssl_object':
+                return self.tls
+            return self.inner.get_extra_info(info)
+
+    class LocalSitesBackend(httpcore.AsyncNetworkBackend):
+        """Connects every host to the local server and counts the connections opened"""
+
+        def __init__(self):
+            self.inner = httpcore.AnyIOBackend()
+
+        async def connect_tcp(self, host, port, timeout=None, local_address=None, socket_options=None):
+            connections['opened'] += 1
+            return LocalStream(await self.inner.connect_tcp('127.0.0.1', server_port, timeout))
+
+        async def sleep(self, seconds):
+            await self.inner.sleep(seconds)
+
+    def local_pool(**options):
+        """httpx pool whose connections go to the local server"""
+        pool = httpx.AsyncHTTPTransport(**options)
+        # httpx has no public hook for the network backend of its pool
+        pool._pool._network_backend = LocalSitesBackend()
+        return pool
+
+    class CountingTransport(httpx.AsyncBaseTransport):
+        """The crawler's own transport, on the local backend, counting requests"""
+
+        def __init__(self):
+            if args.pool == 'legacy':
+                self.inner = local_pool(limits=httpx.Limits(**LEGACY_LIMITS), http2=main.HTTP2)
+            else:
+                self.inner = main.make_transport(make_pool=local_pool)
+
+        async def handle_async_request(self, request):
+            connections['requests'] += 1
+            return await self.inner.handle_async_request(request)
+
+        async def aclose(self):
+            await self.inner.aclose()
+
+    sites = make_population(args)
+    names = [site['name'] for site in sites]
+    records = {}
+    for site in sites:
+        if site['kind'] != 'dead':
+            records[site['name']] = ['127.0.0.1']
+            records['www.' + site['name']] = ['127.0.0.1']
+
+    rows = []
+    make_session = main.make_session
+    main.make_session = lambda: make_session(transport=CountingTransport())
+    main.save_domain_results = rows.extend
+    main.log = lambda msg: None
+    main.dns_prefilter = DnsPrefilter(StubResolver(records))
+    main.host_limiter = HostRateLimiter(rate=1 / main.HOST_REQUEST_DELAY if main.HOST_REQUEST_DELAY else None)
+    main.sitemap_discovery.limiter = main.host_limiter  # robots.txt and sitemaps share the pages' pacing
+    main.PROBE_TIMEOUT = main.PAGE_TIMEOUT = main.RETRY_PAGE_TIMEOUT = args.timeout
+    main.CONCURRENT_DOMAINS = args.concurrency
+    main.HTTP2 = args.http2
+
+    kinds = {site['name']: site['kind'] for site in sites}
+    latencies = []
+    by_kind = {}
+    crawl = main.crawl_domain
+
+    async def timed_crawl_domain(base_url, session, sink):
+        start = time.perf_counter()
+        try:
+            return await crawl(base_url, session, sink)
+        finally:
+            seconds = time.perf_counter() - start
+            latencies.append(seconds)
+            by_kind.setdefault(kinds[base_url.split('/')[2]], []).append(seconds)
+
+    main.crawl_domain = timed_crawl_domain
+
+    cpu_start = time.process_time()
+    start = time.perf_counter()
+    with PeakRSS(interval=0.05) as rss:
+        asyncio.run(main.process_batch(names))
+    elapsed = time.perf_counter() - start
+    cpu = time.process_time() - cpu_start
+
+    stats = main.performance_stats
+    pages = stats['pages_analyzed']
+    return {
+        'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'config': {key: getattr(args, key) for key in (
+            'sites', 'seed', 'page_kb', 'latency_ms', 'fanout', 'rate_limited',
+            'errors', 'hung', 'dropped', 'dead', 'timeout', 'concurrency', 'tls_ms', 'pool', 'http2')},
+        'population': dict(Counter(site['kind'] for site in sites)),
+        'domains': len(latencies),
+        'pages': pages,
+        'seconds': round(elapsed, 2),
+        'domains_per_min': round(len(latencies) / elapsed * 60, 1),
+        'pages_per_sec': round(pages / elapsed, 1),
+        'domain_latency_s': {
+            'p50': round(percentile(latencies, 50), 3),
+            'p95': round(percentile(latencies, 95), 3),
+            'p99': round(percentile(latencies, 99), 3),
+            'max': round(max(latencies, default=0), 3),
+        },
+        'domain_p50_by_kind_s': {kind: round(percentile(values, 50), 3) for kind, values in sorted(by_kind.items())},
+        'cpu_seconds': round(cpu, 2),
+        'cpu_ms_per_page': round(cpu / pages * 1000, 2) if pages else None,
+        'peak_rss_mb': round(rss.peak / 2**20, 1),
+        'megabytes_downloaded': round(stats['bytes_downloaded'] / 2**20, 1),
+        'page_retries': stats['page_retries'],
+        'requests': connections['requests'],
+        'connections_opened': connections['opened'],
+        'tls_handshakes': connections['tls_handshakes'],
+        'connections_per_page': round(connections['opened'] / pages, 3) if pages else None,
+        'requests_per_connection': round(connections['requests'] / connections['opened'], 2) if connections['opened'] else None,
+        'statuses': dict(Counter(row.get('website_scrape_status') for row in rows)),
+    }
+
+
+def print_report(result, baseline=None):
+    """Human-readable summary, with the change against a baseline run"""
+    def line(label, key, unit, better='higher', value=None, old=None):
+        value = result[key] if value is None else value
+        text = f"  {label:<20} {value:>10} {unit}"
+        if baseline is not None:
+            old = baseline.get(key) if old is None else old
+            if old:
+                change = (value - old) / old * 100
+                good = change >= 0 if better == 'higher' else change <= 0
+                text += f"   (was {old}, {change:+.1f}% {'✅' if good else '⚠️'})"
+        print(text)
+
+    config = result['config']
+    print(f"{result['domains']} sites ({', '.join(f'{n} {k}' for k, n in sorted(result['population'].items()))}), "
+          f"~{config['page_kb']} KB pages, ~{config['latency_ms']} ms latency, "
+          f"{config['concurrency']} concurrent, {config['pool']} pool, "
+          f"{'HTTP/2' if config['http2'] else 'HTTP/1.1'}, {config['tls_ms']} ms TLS handshakes")
+    line('domains/min', 'domains_per_min', '')
+    line('pages/sec', 'pages_per_sec', '')
+    for q in ('p50', 'p95', 'p99'):
+        old = baseline['domain_latency_s'][q] if baseline else None
+        line(f'domain latency {q}', None, 's', 'lower', result['domain_latency_s'][q], old)
+    line('connections/page', 'connections_per_page', '', 'lower')
+    line('requests/connection', 'requests_per_connection', '')
+    line('CPU per page', 'cpu_ms_per_page', 'ms', 'lower')
+    line('peak RSS', 'peak_rss_mb', 'MB', 'lower')
+    print(f"  {result['requests']} requests over {result['connections_opened']} connections "
+          f"({result['tls_handshakes']} TLS handshakes)")
+    print(f"  pages {result['pages']}, retries {result['page_retries']}, "
+          f"{result['megabytes_downloaded']} MB in {result['seconds']}s")
+    print(f"  p50 by kind: {', '.join(f'{k} {s}s' for k, s in result['domain_p50_by_kind_s'].items())}")
+    print(f"  statuses: {', '.join(f'{k} {n}' for k, n in sorted(result['statuses'].items()))}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Crawl throughput against a simulated local web')
+    parser.add_argument('--sites', type=int, default=200, help='Simulated sites (default: 200)')
+    parser.add_argument('--seed', type=int, default=1, help='Population seed (default: 1)')
+    parser.add_argument('--page-kb', type=int, default=60, help='Median page size in KB (default: 60)')
+    parser.add_argument('--latency-ms', type=int, default=50, help='Mean server latency per request (default: 50)')
+    parser.add_argument('--fanout', type=int, default=15, help='Max pages per site (default: 15)')
+    parser.add_argument('--rate-limited', type=float, default=0.1, help='Share of sites answering 429 first (default: 0.1)')
+    parser.add_argument('--errors', type=float, default=0.1, help='Share of sites with 503s (default: 0.1)')
+    parser.add_argument('--hung', type=float, default=0.03, help='Share of sites that never answer (default: 0.03)')
+    parser.add_argument('--dropped', type=float, default=0.03, help='Share of sites that drop connections (default: 0.03)')
+    parser.add_argument('--dead', type=float, default=0.05, help='Share of names without DNS (default: 0.05)')
+    parser.add_argument('--timeout', type=float, default=3.0, help='Probe and page timeout in seconds (default: 3)')
+    parser.add_argument('--concurrency', type=int, default=50, help='Domains crawled at once (default: 50)')
+    parser.add_argument('--tls-ms', type=int, default=100, help='Time a new TLS connection spends on its handshake (default: 100)')
+    parser.add_argument('--pool', choices=('host', 'legacy'), default='host',
+                        help='Per-host pools (default) or the old single 100/20 pool')
+    parser.add_argument('--http2', action='store_true', help='Let the crawler negotiate HTTP/2 (needs h2)')
+    parser.add_argument('--output', help='Save the results as JSON')
+    parser.add_argument('--compare', help='JSON results of an earlier run to compare against')
+    parser.add_argument('--serve', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        asyncio.run(serve(args))
+        return
+
+    server = subprocess.Popen([sys.executable, __file__, '--serve'] + sys.argv[1:],
+                              stdout=subprocess.PIPE, text=True)
+    try:
+        port = int(server.stdout.readline())
+        result = run_benchmark(args, port)
+    finally:
+        server.terminate()
+        server.wait()
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    print_report(result, baseline)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(result, f, indent=2)
+        print(f"💾 Results saved to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
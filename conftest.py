@@ -0,0 +1,9 @@
+"""
+pytest setup: lets main.py be imported without real Supabase credentials
+"""
+import os
+
+# main.py builds its Supabase client at import time; these placeholders only
+# need to pass the client's format checks, nothing is ever sent to them
+os.environ.setdefault('SUPABASE_URL', 'https://localhost.invalid')
+os.environ.setdefault('SUPABASE_KEY', 'test.placeholder.key')
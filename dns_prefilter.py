@@ -0,0 +1,147 @@
+"""
+DNS prefilter: resolve upcoming domains ahead of the crawlers
+Domains whose name does not exist (neither example.com nor www.example.com
+resolves) are reported before any HTTP connection is opened. Answers are kept
+in a TTL cache, and a lookup already in flight is shared, so the crawler's own
+check for a domain the prefilter has reached costs nothing.
+
+SystemResolver uses the OS resolver (getaddrinfo) on its own thread pool, so
+bulk lookups don't queue behind the event loop's default executor. StubResolver answers from
+a dict, for testing offline.
+"""
+
+import asyncio
+import socket
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# getaddrinfo errors that mean "no such name / no address", not "try again later"
+_NOT_FOUND_ERRORS = {socket.EAI_NONAME, getattr(socket, 'EAI_NODATA', socket.EAI_NONAME)}
+
+
+class DomainNotFound(Exception):
+    """The name has no DNS record (NXDOMAIN or no addresses)"""
+
+
+class SystemResolver:
+    """Resolves through the OS resolver, `threads` lookups at a time"""
+
+    def __init__(self, threads=64):
+        self._executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix='dns')
+
+    async def resolve(self, host):
+        """Addresses of host; raises DomainNotFound when the name does not exist"""
+        loop = asyncio.get_running_loop()
+        try:
+            infos = await loop.run_in_executor(
+                self._executor, lambda: socket.getaddrinfo(host, None, type=socket.SOCK_STREAM)
+            )
+        except socket.gaierror as e:
+            if e.errno in _NOT_FOUND_ERRORS:
+                raise DomainNotFound(host) from e
+            raise
+        return sorted({info[4][0] for info in infos})
+
+
+class StubResolver:
+    """Answers from a {host: [addresses]} dict; unknown hosts do not exist"""
+
+    def __init__(self, records, delay=0.0, failing=()):
+        self.records = records
+        self.delay = delay
+        self.failing = set(failing)  # hosts whose lookup fails like a SERVFAIL/timeout
+        self.lookups = []
+
+    async def resolve(self, host):
+        self.lookups.append(host)
+        await asyncio.sleep(self.delay)
+        if host in self.failing:
+            raise OSError(f'temporary failure resolving {host}')
+        if host not in self.records:
+            raise DomainNotFound(host)
+        return list(self.records[host])
+
+
+class DnsPrefilter:
+    """TTL-cached "does this domain exist?" checks, bulk-resolved with bounded concurrency"""
+
+    def __init__(self, resolver, concurrency=200, ttl=3600.0, negative_ttl=900.0,
+                 timeout=5.0, clock=time.monotonic):
+        self.resolver = resolver
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.timeout = timeout
+        self.clock = clock
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._cache = {}     # domain -> (expires_at, exists)
+        self._inflight = {}  # domain -> task resolving it
+
+        self.lookups = 0
+        self.cache_hits = 0
+        self.not_found = 0
+        self.errors = 0
+
+    async def prefetch(self, domains):
+        """Resolve many domains at once (results land in the cache)"""
+        now = self.clock()
+        self._cache = {d: entry for d, entry in self._cache.items() if entry[0] > now}
+        await asyncio.gather(*[self.exists(domain) for domain in domains])
+
+    def start_prefetch(self, domains):
+        """prefetch() in the background, so it runs ahead of the crawlers"""
+        return asyncio.create_task(self.prefetch(domains))
+
+    async def exists(self, domain):
+        """False only when the domain (and its www. host) has no DNS record; lookup errors count as True"""
+        cached = self._cache.get(domain)
+        if cached and cached[0] > self.clock():
+            self.cache_hits += 1
+            return cached[1]
+
+        task = self._inflight.get(domain)
+        if task is None:
+            task = asyncio.create_task(self._lookup(domain))
+            self._inflight[domain] = task
+            task.add_done_callback(lambda _: self._inflight.pop(domain, None))
+        else:
+            self.cache_hits += 1
+        return await asyncio.shield(task)
+
+    async def _lookup(self, domain):
+        async with self._semaphore:
+            self.lookups += 1
+            results = await asyncio.gather(
+                *[self._resolve(host) for host in (domain, f'www.{domain}')]
+            )
+
+        if True in results:
+            self._cache[domain] = (self.clock() + self.ttl, True)
+            return True
+        if None in results:
+            # A lookup failed for another reason: don't cache, let the crawler try
+            self.errors += 1
+            return True
+
+        self.not_found += 1
+        self._cache[domain] = (self.clock() + self.negative_ttl, False)
+        return False
+
+    async def _resolve(self, host):
+        """True if host resolves, False if it does not exist, None if the lookup failed"""
+        try:
+            await asyncio.wait_for(self.resolver.resolve(host), self.timeout)
+            return True
+        except DomainNotFound:
+            return False
+        except Exception:
+            return None
+
+    def stats(self):
+        """Counters for the periodic progress log"""
+        return {
+            'lookups': self.lookups,
+            'cache_hits': self.cache_hits,
+            'not_found': self.not_found,
+            'errors': self.errors,
+            'cached': len(self._cache),
+        }
@@ -0,0 +1,65 @@
+"""
+Streaming producer/consumer pipeline for domains
+A prefetcher keeps a bounded queue of claimed domains topped up while a fixed
+number of crawler slots pull from it as soon as they free up. There is no
+per-batch barrier: one slow domain only occupies its own slot, and there is
+no cooldown between batches.
+"""
+
+import asyncio
+
+# Tells a crawler slot that no more work is coming
+_DONE = object()
+
+
+class DomainPipeline:
+    """Claims domains in chunks and crawls them with `concurrency` always-busy slots"""
+
+    def __init__(self, claim, crawl, concurrency=50, prefetch=100, claim_size=50, log=print):
+        self.claim = claim  # async claim(limit) -> list of domains ([] when none are left)
+        self.crawl = crawl  # async crawl(domain)
+        self.concurrency = concurrency
+        self.prefetch = prefetch
+        self.claim_size = claim_size
+        self.log = log
+
+        self.claimed = 0
+        self.crawled = 0
+        self.errors = 0
+
+    async def run(self):
+        """Crawl until claim() comes back empty and every claimed domain is done"""
+        queue = asyncio.Queue(maxsize=self.prefetch)
+        slots = [asyncio.create_task(self._crawler(queue)) for _ in range(self.concurrency)]
+        try:
+            await self._prefetch(queue)
+            for _ in slots:
+                await queue.put(_DONE)
+            await asyncio.gather(*slots)
+        finally:
+            for slot in slots:
+                slot.cancel()
+            await asyncio.gather(*slots, return_exceptions=True)
+
+    async def _prefetch(self, queue):
+        while True:
+            domains = await self.claim(self.claim_size)
+            if not domains:
+                return
+            self.claimed += len(domains)
+            for domain in domains:
+                # Blocks while the queue is full, so at most prefetch + claim_size are held
+                await queue.put(domain)
+
+    async def _crawler(self, queue):
+        while True:
+            domain = await queue.get()
+            if domain is _DONE:
+                return
+            try:
+                await self.crawl(domain)
+            except Exception as e:
+                self.errors += 1
+                self.log(f"  ❌ Crawl of {domain} failed: {str(e)}")
+            finally:
+                self.crawled += 1
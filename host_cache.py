@@ -0,0 +1,146 @@
+"""
+Canonical-host cache: crawl a site once, whatever domain names point at it
+Many domains are aliases (old brand names, country TLDs) that redirect to the
+same site. Once the homepage probe has followed the redirects, crawl_domain
+looks up the final host here: if another domain crawled that host within the
+freshness window, its result is copied instead of crawling the site again.
+
+A host being crawled right now is claimed, so an alias arriving in the same
+batch waits for that crawl instead of starting its own.
+
+Entries are kept in memory and, with a path, appended to a JSON lines file
+(one line per crawled host; the latest line of a host wins when the file is
+read back), so aliases claimed by later runs on the same machine hit too.
+Only the result columns are kept, not the crawl's per-page history
+(website_pages: an alias has no pages of its own). Expired entries are
+dropped as new ones come in, and past max_entries the oldest go first; when
+the file is opened it is rewritten with only those entries, so neither grows
+without bound. With a ttl of 0 the cache is off: nothing is claimed, stored
+or read.
+"""
+
+import asyncio
+import json
+import os
+import time
+
+
+class HostCache:
+    """canonical host -> (domain that crawled it, its result), fresh for `ttl` seconds"""
+
+    def __init__(self, path=None, ttl=7 * 86400, max_entries=50000, clock=time.time):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries  # hosts kept (oldest dropped first)
+        self.clock = clock  # wall clock: entries outlive the process
+        self._entries = {}  # host -> {'host', 'domain', 'stored_at', 'result'}, oldest first
+        self._inflight = {}  # host -> future resolved when its crawl is stored or given up
+        self._file = None
+
+        self.hits = 0
+        self.waits = 0
+        self.stored = 0
+        if path is not None and self.enabled:
+            self._load()
+            self._compact()
+            self._file = open(path, 'a', encoding='utf-8')
+
+    @property
+    def enabled(self):
+        return self.ttl > 0
+
+    def _load(self):
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue  # a line cut short by a crash
+                    entry['result'].pop('website_pages', None)  # written by an older version
+                    self._entries.pop(entry['host'], None)
+                    self._entries[entry['host']] = entry
+        except FileNotFoundError:
+            pass
+        self._expire()
+
+    def _compact(self):
+        """Rewrite the file with one line per fresh entry"""
+        temp = f'{self.path}.tmp'
+        with open(temp, 'w', encoding='utf-8') as f:
+            for entry in self._entries.values():
+                f.write(json.dumps(entry) + '\n')
+        os.replace(temp, self.path)
+
+    def _expire(self, keep=None):
+        """Drop entries older than ttl, then the oldest until at most `keep` (default max_entries) are left"""
+        keep = self.max_entries if keep is None else keep
+        cutoff = self.clock() - self.ttl
+        while self._entries:
+            host, entry = next(iter(self._entries.items()))  # stored order: oldest first
+            if entry['stored_at'] > cutoff and len(self._entries) <= keep:
+                break
+            del self._entries[host]
+
+    def _fresh(self, host):
+        entry = self._entries.get(host)
+        if entry is not None and self.clock() - entry['stored_at'] < self.ttl:
+            return entry
+        return None
+
+    async def claim(self, host, domain):
+        """Stored entry of `host` for an alias, or None when `domain` should crawl it
+
+        After a None, call put() with the result, or release() if the crawl
+        gave up. A domain never gets its own entry back: re-crawling a site
+        crawls it.
+        """
+        if not self.enabled:
+            return None
+        while True:
+            entry = self._fresh(host)
+            if entry is not None and entry['domain'] != domain:
+                self.hits += 1
+                return entry
+            waiting = self._inflight.get(host)
+            if waiting is None:
+                self._inflight[host] = asyncio.get_running_loop().create_future()
+                return None
+            # Another alias is crawling the site: use its result (or crawl it if that one fails)
+            self.waits += 1
+            await asyncio.shield(waiting)
+
+    def put(self, host, domain, result):
+        """Store the crawled result of `host` and wake aliases waiting for it"""
+        if not self.enabled:
+            return
+        self._entries.pop(host, None)
+        self._expire(keep=self.max_entries - 1)
+        result = {column: value for column, value in result.items() if column != 'website_pages'}
+        entry = {'host': host, 'domain': domain, 'stored_at': self.clock(), 'result': result}
+        self._entries[host] = entry
+        self.stored += 1
+        if self._file is not None:
+            self._file.write(json.dumps(entry) + '\n')
+            self._file.flush()
+        self.release(host)
+
+    def release(self, host):
+        """End the claim on `host` (no-op if put() already did)"""
+        waiting = self._inflight.pop(host, None)
+        if waiting is not None and not waiting.done():
+            waiting.set_result(None)
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def stats(self):
+        """Counters for the run log"""
+        return {
+            'hits': self.hits,
+            'waits': self.waits,
+            'stored': self.stored,
+            'hosts': len(self._entries),
+        }
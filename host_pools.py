@@ -0,0 +1,150 @@
+"""
+Per-host connection pools for the shared HTTP client
+One httpx pool for the whole crawl either keeps too few idle connections
+(most of a domain's pages then pay for a new TCP + TLS handshake) or, sized
+to the crawl, spends its time scanning hundreds of connections: httpcore
+walks every connection of the pool for every queued request.
+
+HostPoolTransport gives each origin (scheme, host, port) a small pool of its
+own, sized to the pages a domain fetches at once, so a domain's pages reuse
+its connections (or share one multiplexed HTTP/2 connection) and each lookup
+only looks at that host's few connections. All pools share one SSL context,
+so the CA bundle is loaded once, not per host.
+
+Pools of hosts the crawl has moved on from are closed once they have been
+idle for keepalive_expiry, or, past max_hosts pools, least recently used first.
+All pools together keep at most max_connections connections open, like the
+single pool did: a pool is counted for the most connections it has needed at
+once, and a request that would take it past that waits for room, made by
+closing idle pools least recently used first.
+"""
+
+import asyncio
+import time
+from collections import OrderedDict
+
+import httpx
+
+
+class _TrackedStream(httpx.AsyncByteStream):
+    """Response body that tells its pool when it is closed"""
+
+    def __init__(self, stream, done):
+        self._stream = stream
+        self._done = done
+
+    async def __aiter__(self):
+        async for chunk in self._stream:
+            yield chunk
+
+    async def aclose(self):
+        try:
+            await self._stream.aclose()
+        finally:
+            self._done()
+
+
+class HostPoolTransport(httpx.AsyncBaseTransport):
+    """Routes each request to the pool of its origin, creating and retiring pools as hosts come and go"""
+
+    def __init__(self, connections_per_host=4, max_hosts=200, max_connections=100, keepalive_expiry=30.0,
+                 http2=False, make_pool=httpx.AsyncHTTPTransport, clock=time.monotonic):
+        self.limits = httpx.Limits(
+            max_connections=connections_per_host,
+            max_keepalive_connections=connections_per_host,
+            keepalive_expiry=keepalive_expiry
+        )
+        self.connections_per_host = connections_per_host
+        self.max_hosts = max_hosts
+        self.max_connections = max_connections
+        self.keepalive_expiry = keepalive_expiry
+        self.http2 = http2
+        self.make_pool = make_pool  # called like httpx.AsyncHTTPTransport(limits=..., http2=..., verify=...)
+        self.clock = clock
+        self.ssl_context = httpx.create_ssl_context()
+        # origin -> [pool, requests in flight, last used, connections counted], least recently used first
+        self._pools = OrderedDict()
+        self._connections = 0  # counted over all pools, at most max_connections
+        self._released = asyncio.Event()  # set whenever a request finishes
+
+        self.pools_opened = 0
+        self.pools_closed = 0
+        self.waits = 0
+
+    async def handle_async_request(self, request):
+        origin = (request.url.scheme, request.url.host, request.url.port)
+        if origin not in self._pools:
+            await self._retire(hosts=1)
+        entry = await self._checkout(origin)
+        self._pools.move_to_end(origin)
+        entry[1] += 1
+        entry[2] = self.clock()
+
+        def done():
+            entry[1] -= 1
+            entry[2] = self.clock()
+            self._released.set()
+
+        try:
+            response = await entry[0].handle_async_request(request)
+        except BaseException:
+            done()
+            raise
+        response.stream = _TrackedStream(response.stream, done)
+        return response
+
+    async def _checkout(self, origin):
+        """The origin's pool, once it may open the connection the request could need within max_connections"""
+        while True:
+            entry = self._pools.get(origin)
+            if entry is not None and (entry[1] < entry[3] or entry[3] >= self.connections_per_host):
+                return entry  # one of its counted connections serves it, now or once free
+            if self._connections < self.max_connections:
+                if entry is None:
+                    entry = [self.make_pool(limits=self.limits, http2=self.http2, verify=self.ssl_context), 0, 0.0, 0]
+                    self._pools[origin] = entry
+                    self.pools_opened += 1
+                entry[3] += 1
+                self._connections += 1
+                return entry
+            if not await self._retire(connections=1):
+                self.waits += 1
+                self._released.clear()
+                await self._released.wait()
+
+    async def _retire(self, hosts=0, connections=0):
+        """Close pools idle for keepalive_expiry, and the least recently used idle ones while the hosts and
+        connections about to be added would go past max_hosts or max_connections; True if any were closed"""
+        now = self.clock()
+        closed = False
+        for origin, entry in list(self._pools.items()):
+            pool, in_flight, last_used, counted = entry
+            if in_flight or self._pools.get(origin) is not entry:
+                continue
+            over = (len(self._pools) + hosts > self.max_hosts
+                    or self._connections + connections > self.max_connections)
+            if over or now - last_used >= self.keepalive_expiry:
+                del self._pools[origin]
+                self._connections -= counted
+                self.pools_closed += 1
+                closed = True
+                await pool.aclose()
+            else:
+                break  # the rest were used more recently
+        return closed
+
+    async def aclose(self):
+        pools, self._pools = self._pools, OrderedDict()
+        self._connections = 0
+        for pool, _, _, _ in pools.values():
+            await pool.aclose()
+
+    def stats(self):
+        """Counters for the run log"""
+        return {
+            'hosts': len(self._pools),
+            'pools_opened': self.pools_opened,
+            'pools_closed': self.pools_closed,
+            'connections': self._connections,
+            'waits': self.waits,
+        }
@@ -0,0 +1,195 @@
+"""
+Link ranking: which internal pages of a site to crawl first
+A domain only gets MAX_PAGES_PER_DOMAIN page fetches, so the candidate links
+of the homepage are normalized, deduplicated and put in priority order:
+pages whose path or anchor text points at capabilities, equipment, materials
+or processes come first, policies, blog archives and account pages last.
+Links to binary assets (PDFs, images, CAD files, archives, ...) are dropped.
+
+Normalization: fragment and query string removed, host lowercased without
+www., default port and trailing slash removed, and http/https treated as the
+same page (the first form seen is kept).
+
+Pages found elsewhere (a sitemap) are merged into an already ranked list
+with merge_links, which keeps that list's order.
+
+Catalog pages can link thousands of products: only the first MAX_CANDIDATES
+distinct pages are ranked, far more than a domain ever fetches. Each page's
+path is scored once, however often it is linked.
+"""
+
+import re
+import unicodedata
+from urllib.parse import unquote, urlsplit
+
+BINARY_EXTENSIONS = frozenset((
+    'pdf', 'doc', 'docx', 'xls', 'xlsx', 'ppt', 'pptx', 'odt', 'rtf', 'csv',
+    'jpg', 'jpeg', 'png', 'gif', 'svg', 'webp', 'bmp', 'tif', 'tiff', 'ico', 'heic',
+    'mp4', 'mov', 'avi', 'wmv', 'webm', 'mp3', 'wav', 'm4a',
+    'zip', 'rar', '7z', 'gz', 'tgz', 'tar', 'exe', 'dmg', 'msi', 'apk',
+    'dwg', 'dxf', 'step', 'stp', 'stl', 'igs', 'iges', 'sldprt', 'x_t',
+    'css', 'js', 'json', 'xml', 'rss', 'woff', 'woff2', 'ttf', 'eot',
+))
+
+# Words in a path segment or anchor text, and how much they raise a link (English and Spanish)
+SIGNALS = {
+    # What the company makes and with what
+    'capabilities': 10, 'capability': 10, 'equipment': 10, 'machinery': 10, 'machines': 9,
+    'materials': 10, 'material': 9, 'processes': 9, 'process': 8, 'manufacturing': 9,
+    'machining': 10, 'cnc': 10, 'molding': 10, 'moulding': 10, 'fabrication': 9, 'casting': 9,
+    'stamping': 9, 'welding': 8, 'extrusion': 9, 'finishing': 7, 'tooling': 8, 'facility': 8,
+    'facilities': 8, 'plant': 6, 'quality': 6, 'certifications': 5, 'specifications': 6, 'specs': 6,
+    'services': 7, 'service': 6, 'products': 7, 'product': 6, 'parts': 6, 'industries': 5,
+    'solutions': 4, 'catalog': 5, 'what-we-do': 7, 'about': 4, 'about-us': 4, 'company': 3,
+    'capacidades': 10, 'maquinaria': 10, 'equipos': 9, 'materiales': 10, 'procesos': 9,
+    'mecanizado': 10, 'moldeo': 10, 'inyeccion': 9, 'fabricacion': 9, 'servicios': 7, 'productos': 7,
+    'calidad': 6, 'empresa': 3, 'nosotros': 4,
+}
+# Pages that rarely name a capability
+NOISE = {
+    'privacy': -10, 'privacy-policy': -10, 'terms': -10, 'cookie': -10, 'cookies': -10, 'legal': -8,
+    'disclaimer': -8, 'accessibility': -8, 'login': -10, 'signin': -10, 'register': -10, 'account': -10,
+    'cart': -10, 'checkout': -10, 'wishlist': -10, 'careers': -6, 'jobs': -6, 'blog': -5, 'news': -4,
+    'events': -4, 'press': -4, 'tag': -8, 'tags': -8, 'category': -5, 'author': -8, 'archive': -8,
+    'archives': -8, 'feed': -10, 'sitemap': -6, 'search': -8, 'page': -3,
+    'privacidad': -10, 'aviso-de-privacidad': -10, 'aviso-legal': -10, 'noticias': -4, 'empleo': -6,
+}
+SCORES = {**SIGNALS, **NOISE}
+
+# Distinct pages ranked per call; later candidates are not looked at
+MAX_CANDIDATES = 1000
+
+_WORDS = re.compile(r'[^\W_]+(?:-[^\W_]+)*')
+_DATE_PATH = re.compile(r'/(19|20)\d\d/\d\d?(/|$)')  # blog archives: /2021/04/...
+
+
+def _split(url):
+    """(key, normalized URL) of a page URL, or None for binary assets and the homepage"""
+    parts = urlsplit(url)
+    host = parts.hostname or ''
+    port = parts.port
+    if port and port not in (80, 443):
+        host = f'{host}:{port}'
+    path = parts.path
+    if '//' in path:
+        path = re.sub('/{2,}', '/', path)
+    path = path.rstrip('/')
+    if not path:
+        return None
+    name = path.rsplit('/', 1)[-1]
+    if '.' in name and name.rpartition('.')[2].lower() in BINARY_EXTENSIONS:
+        return None
+    key = (host[4:] if host.startswith('www.') else host, path)
+    return key, f"{parts.scheme.lower()}://{host}{path}"
+
+
+def link_key(url):
+    """Normalized identity of a page URL (None for binary assets and the homepage)"""
+    split = _split(url)
+    return split and split[0]
+
+
+def normalize_link(url):
+    """URL without fragment, query, default port or trailing slash (None if it is not worth crawling)"""
+    split = _split(url)
+    return split and split[1]
+
+
+def _plain(text):
+    """Lowercase text without accents (fabricación -> fabricacion)"""
+    if text.isascii():
+        return text.lower()
+    decomposed = unicodedata.normalize('NFKD', text.lower())
+    return ''.join(c for c in decomposed if not unicodedata.combining(c))
+
+
+def _path_score(path):
+    if '%' in path:
+        path = unquote(path)
+    path = _plain(path)
+    score = 0
+    for word in _WORDS.findall(path.replace('_', '-')):
+        score += SCORES.get(word, 0)
+        # also score the parts of hyphenated segments: /cnc-machining-services
+        if '-' in word:
+            score += sum(SCORES.get(part, 0) for part in word.split('-'))
+    if _DATE_PATH.search(path):
+        score -= 8
+    # Deep pages are usually details of something shallower
+    return score - (path.count('/') - 1)
+
+
+def _anchor_score(anchor):
+    return sum(SCORES.get(word, 0) // 2 for word in set(_WORDS.findall(_plain(anchor))))
+
+
+def link_score(path, anchor=''):
+    """Priority of a link from its path and anchor text (higher = crawl earlier)"""
+    return _path_score(path) + _anchor_score(anchor)
+
+
+def rank_links(candidates, limit=MAX_CANDIDATES):
+    """Normalized, deduplicated URLs of (url, anchor text) candidates, best first
+
+    Equal scores keep page order. Candidates are consumed lazily and only the
+    first `limit` distinct pages are ranked, so pass a generator to skip the
+    work of building the rest.
+    """
+    best = {}  # key -> [score, first position, url, path score]
+    keys = {}  # url as linked -> key (None: not a page), so repeats skip the parsing
+    anchors = {}  # anchor text -> its score
+    for position, (url, anchor) in enumerate(candidates):
+        if url in keys:
+            key = keys[url]
+            split = None
+        else:
+            split = _split(url)
+            key = keys[url] = split and split[0]
+        if key is None:
+            continue
+        anchor_score = anchors.get(anchor)
+        if anchor_score is None:
+            anchor_score = anchors[anchor] = _anchor_score(anchor)
+        entry = best.get(key)
+        if entry is None:
+            if len(best) >= limit:
+                break
+            path_score = _path_score(key[1])
+            best[key] = [path_score + anchor_score, position, (split or _split(url))[1], path_score]
+        elif entry[3] + anchor_score > entry[0]:
+            entry[0] = entry[3] + anchor_score  # the same page under a more telling anchor
+    ranked = sorted(best.values(), key=lambda entry: (-entry[0], entry[1]))
+    return [entry[2] for entry in ranked]
+
+
+def merge_links(ranked, extra):
+    """Already ranked URLs (e.g. a homepage's, ranked with their anchor text) with more URLs ranked in by path
+
+    The ranked URLs keep their order. Their anchor text is no longer known, so
+    each counts as scoring at least its path score and at least as much as any
+    ranked URL after it; an extra page goes ahead of the first ranked URL it
+    outranks. Extra pages already among the ranked ones are dropped.
+    """
+    seen = {link_key(url) for url in ranked}
+    extra = [url for url in rank_links((url, '') for url in extra) if link_key(url) not in seen]
+    if not extra:
+        return list(ranked)
+    floors = []
+    floor = None
+    for url in reversed(ranked):
+        key = link_key(url)
+        score = _path_score(key[1]) if key else 0
+        floor = score if floor is None else max(score, floor)
+        floors.append(floor)
+    floors.reverse()
+
+    merged = []
+    extra_scores = [_path_score(link_key(url)[1]) for url in extra]
+    position = 0
+    for url, floor in zip(ranked, floors):
+        while position < len(extra) and extra_scores[position] > floor:
+            merged.append(extra[position])
+            position += 1
+        merged.append(url)
+    merged.extend(extra[position:])
+    return merged
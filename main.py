@@ -6,19 +6,40 @@ Usage:
     python main.py                    # Run once, process all pending domains
     python main.py --continuous       # Run continuously, check for new domains daily
     python main.py --batch-size 100   # Process 100 domains per batch (default: 500)
+    python main.py --stream           # Stream domains through the crawlers (no batch barrier/cooldown)
+    python main.py --workers 4        # Parse/match pages in 4 processes (use all CPU cores)
+    python main.py --worker-id node-1 # Claim domains under a fixed worker id (run N workers in parallel)
 """
 
 import asyncio
 import httpx
-from bs4 import BeautifulSoup
-import re
 from datetime import datetime, timedelta
 import sys
 import os
 import random
 import argparse
+import time
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 from supabase import create_client, Client
 from dotenv import load_dotenv
+from vocabulary import load_matcher, VocabularyWatcher
+from page_parser import parse_html, visible_text, internal_links
+from page_store import PageStore
+from page_history import body_hash, conditional_headers, page_record, page_from_record
+from rate_limits import HostRateLimiter, RetryLater, parse_retry_after
+from page_scheduler import PageScheduler, STOP_FAILURES, STOP_TIMEOUT, STOP_SATURATED
+from saturation import Saturation
+from result_sink import ResultSink
+from work_claims import SupabaseClaimStore, LeaseKeeper, make_worker_id
+from domain_pipeline import DomainPipeline
+from dns_prefilter import DnsPrefilter, SystemResolver
+from sitemaps import SitemapDiscovery, site_host
+from host_cache import HostCache
+from host_pools import HostPoolTransport
+from link_ranking import merge_links
+from metrics import Metrics
+from profiler import CrawlProfiler
 
 # Load environment variables from local.env file
 load_dotenv('local.env')
@@ -33,6 +54,11 @@ supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
 # Table name - your domains table
 TABLE_NAME = "domains"
 
+# Work claiming: each batch is leased to this worker so several workers can run in parallel
+WORKER_ID = os.getenv("SCRAPER_WORKER_ID") or make_worker_id()
+LEASE_SECONDS = 600  # renewed every LEASE_SECONDS / 3 while the batch runs
+claim_store = SupabaseClaimStore(supabase)
+
 # Rotating User Agents for better scraping success
 USER_AGENTS = [
     'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
@@ -42,508 +68,20 @@ USER_AGENTS = [
     'Mozilla/5.0 (Macintosh; Intel Mac OS X 10.15; rv:121.0) Gecko/20100101 Firefox/121.0',
 ]
 
-# Consolidated Manufacturing Terms (650+) - English + Spanish
-MANUFACTURING_TERMS = [
-    # CNC Machining - English + Spanish
-    'cnc', 'cnc machining', 'cnc machined', 'cnc machine', 'cnc machines',
-    'mecanizado cnc', 'mecanizado', 'mecanizada',
-    '5-axis machining', '5-axis machine', '5-axis machined', '5 axis machining',
-    '4-axis machining', '4-axis machine', '4-axis machined', '4 axis machining',
-    '3-axis machining', '3-axis machine', '3-axis machined', '3 axis machining',
-    'multi-axis machining', 'multi-axis machine', 'multi axis machining',
-    'mecanizado 5 ejes', 'mecanizado 4 ejes', 'mecanizado 3 ejes',
-    'precision machining', 'precision machine', 'precision machined',
-    'mecanizado de precisión',
-    
-    # Turning - English + Spanish
-    'cnc turning', 'cnc turned', 'cnc turn', 'turning', 'turned', 'turn', 'turner',
-    'torneado', 'torneado cnc', 'torno',
-    'precision turning', 'precision turned',
-    'lathe', 'lathes', 'lathing', 'cnc lathe', 'cnc lathes',
-    
-    # Milling - English + Spanish
-    'cnc milling', 'cnc milled', 'cnc mill', 'milling', 'milled', 'mill', 'mills', 'miller',
-    'fresado', 'fresado cnc', 'fresadora',
-    'vertical machining center', 'horizontal machining center', 'vmc', 'hmc',
-    'centro de mecanizado vertical', 'centro de mecanizado horizontal',
-    
-    # Swiss Machining - English + Spanish
-    'swiss machining', 'swiss-type machining', 'swiss machined', 'swiss machine',
-    'swiss screw machining', 'swiss screw machine', 'swiss type', 'swiss',
-    'mecanizado suizo', 'torno suizo',
-    
-    # Injection Molding - English + Spanish
-    'injection molding', 'injection molded', 'injection mold', 
-    'injection moulding', 'injection moulded',
-    'moldeo por inyección', 'moldeo por inyeccion', 'inyección de plástico',
-    'molding', 'molded', 'mold', 'molds', 'moulding', 'moulded', 'moulds',
-    'moldeo', 'moldeado', 'molde',
-    'plastic injection', 'plastic molding', 'plastic molded',
-    'plástico inyectado', 'moldeado de plástico',
-    'custom injection molding', 'contract molding',
-    'insert molding', 'insert molded', 'insert mold',
-    'overmolding', 'overmolded', 'overmold', 'over-molding', 'over-molded',
-    'sobremoldeo', 'sobremoldeado',
-    'two-shot molding', 'two-shot molded', 'two shot', '2-shot', '2 shot', '2k',
-    'moldeo de dos disparos', 'moldeo 2k',
-    'multi-shot', 'multi shot', 'multishot',
-    'micro molding', 'micro molded', 'micro mold',
-    'lsr molding', 'liquid silicone rubber molding',
-    'imm', 'injection molding machine', 'injection molding machines',
-    
-    # Blow Molding - English + Spanish
-    'blow molding', 'blow molded', 'blow mold', 'blow moulding', 'blow moulded',
-    'moldeo por soplado', 'soplado', 'moldeado por soplado',
-    'extrusion blow molding', 'injection blow molding', 'stretch blow molding',
-    'pet blow molding', 'pet blow',
-    'bottle', 'bottles', 'bottle manufacturing', 'bottle maker',
-    'botella', 'botellas', 'fabricación de botellas',
-    
-    # Thermoforming - English + Spanish
-    'thermoforming', 'thermoformed', 'thermoform', 'thermoforms',
-    'thermo-forming', 'thermo-formed', 'thermo forming', 'thermo formed',
-    'termoformado', 'termoformación', 'termoconformado',
-    'vacuum forming', 'vacuum formed', 'vacuum form', 'vacuum-forming',
-    'formado al vacío', 'conformado al vacío',
-    'pressure forming', 'pressure formed', 'pressure form',
-    'heavy gauge thermoforming', 'thin gauge thermoforming',
-    
-    # Rotomolding - English + Spanish
-    'rotomolding', 'rotomolded', 'rotomold', 'roto-molding', 'roto-molded',
-    'rotational molding', 'rotational molded', 'rotationally molded',
-    'rotomoldeo', 'moldeo rotacional',
-    'roto molding', 'roto molded', 'rotomoulding',
-    
-    # Compression Molding - English + Spanish
-    'compression molding', 'compression molded', 'compression mold',
-    'moldeo por compresión', 'moldeado por compresión',
-    'smc', 'smc molding', 'sheet molding compound',
-    'bmc', 'bmc molding', 'bulk molding compound',
-    'composite molding', 'composite molded',
-    
-    # Extrusion - English + Spanish
-    'extrusion', 'extruded', 'extrude', 'extrudes', 'extruder', 'extruders',
-    'extrusión', 'extruido', 'extrusora',
-    'plastic extrusion', 'plastic extruded',
-    'extrusión de plástico',
-    'profile extrusion', 'profile extruded',
-    'pipe extrusion', 'pipe extruded',
-    'sheet extrusion', 'sheet extruded',
-    'blown film', 'blown film extrusion',
-    'co-extrusion', 'coextrusion', 'co-extruded', 'coextruded',
-    
-    # Laser Cutting - English + Spanish
-    'laser', 'lasers', 'laser cut', 'laser cutting', 'laser-cut', 'laser cuts',
-    'corte láser', 'corte laser', 'láser', 'laser cortado',
-    'fiber laser', 'fiber lasers', 'fiber laser cutting',
-    'laser de fibra', 'corte con laser de fibra',
-    'co2 laser', 'co2 lasers', 'co2 laser cutting',
-    'laser co2', 'corte laser co2',
-    'tube laser', 'tube laser cutting',
-    'laser engraving', 'laser engraved', 'laser engrave',
-    'grabado láser', 'grabado laser',
-    'laser marking', 'laser marked', 'laser mark',
-    'marcado láser', 'marcado laser',
-    
-    # Waterjet - English + Spanish
-    'waterjet', 'water jet', 'water-jet', 'waterjet cutting', 'waterjet cut',
-    'chorro de agua', 'corte por chorro de agua',
-    'abrasive waterjet', 'abrasive jet',
-    
-    # Welding - English + Spanish
-    'welding', 'welded', 'weld', 'welds', 'welder', 'welders',
-    'soldadura', 'soldado', 'soldador', 'soldar',
-    'mig', 'mig welding', 'mig welded', 'mig weld',
-    'soldadura mig',
-    'tig', 'tig welding', 'tig welded', 'tig weld',
-    'soldadura tig',
-    'arc welding', 'arc welded', 'arc weld',
-    'soldadura por arco',
-    'spot welding', 'spot welded', 'spot weld',
-    'soldadura por puntos',
-    'robotic welding', 'robotic welded', 'robotic weld',
-    'soldadura robotizada', 'soldadura robótica',
-    'laser welding', 'laser welded',
-    'soldadura láser', 'soldadura laser',
-    'ultrasonic welding', 'ultrasonic welded',
-    'soldadura ultrasónica',
-    
-    # Sheet Metal & Fabrication - English + Spanish
-    'sheet metal', 'sheetmetal', 'metal fabrication', 'metal fabricated',
-    'chapa metálica', 'chapa', 'fabricación de metal', 'metalmecánica',
-    'fabrication', 'fabricated', 'fabricate', 'fabricates', 'fabricator',
-    'fabricación', 'fabricado', 'fabricante',
-    'custom fabrication', 'custom metal fabrication',
-    
-    # Press Brake & Forming - English + Spanish
-    'press brake', 'press brakes', 'press braking', 'pressbrake',
-    'prensa plegadora', 'dobladora', 'plegado',
-    'bending', 'bent', 'bend', 'bends', 'bender',
-    'doblado', 'doblar', 'dobladora',
-    'metal forming', 'metal formed', 'metal form',
-    'formado de metal', 'conformado de metal',
-    'forming', 'formed', 'form', 'forms', 'former',
-    'formado', 'formar', 'conformado',
-    'cnc bending', 'cnc bent', 'precision bending',
-    
-    # Punching - English + Spanish
-    'punching', 'punched', 'punch',
-    'punzonado', 'punzonadora', 'troquelado',
-    'cnc punching', 'turret punching', 'turret punch',
-    
-    # Stamping & Die - English + Spanish
-    'stamping', 'stamped', 'stamp', 'stamps',
-    'estampado', 'estampar', 'troquelado',
-    'metal stamping', 'metal stamped',
-    'estampado de metal',
-    'progressive die', 'progressive die stamping',
-    'tool and die', 'tool & die', 'tooling and die',
-    'herramientas y troqueles', 'troqueles',
-    'die making', 'die maker', 'diemaking',
-    'mold making', 'mold maker', 'moldmaking', 'mould making',
-    'fabricación de moldes',
-    
-    # Casting - English + Spanish
-    'casting', 'cast', 'casted', 'casts',
-    'fundición', 'fundido', 'colada',
-    'die casting', 'die cast', 'diecast', 'die-cast',
-    'fundición a presión', 'fundición inyectada',
-    'investment casting', 'investment cast',
-    'fundición a la cera perdida',
-    'sand casting', 'sand cast',
-    'fundición en arena',
-    'aluminum die casting', 'aluminum die cast',
-    'fundición de aluminio',
-    
-    # EDM - English + Spanish
-    'edm', 'electrical discharge', 'electrical discharge machining',
-    'wire edm', 'sinker edm', 'ram edm',
-    'electroerosión', 'mecanizado por descarga eléctrica',
-    
-    # Grinding - English + Spanish
-    'grinding', 'ground', 'grind', 'grinds', 'grinder', 'grinders',
-    'rectificado', 'rectificadora', 'esmerilado',
-    'surface grinding', 'surface ground', 'surface grinder',
-    'rectificado de superficies',
-    'cylindrical grinding', 'cylindrical ground',
-    'rectificado cilíndrico',
-    'centerless grinding', 'centerless ground',
-    'rectificado sin centros',
-    'precision grinding', 'precision ground',
-    'od grinding', 'id grinding',
-    
-    # 3D Printing / Additive - English + Spanish
-    '3d printing', '3d printed', '3d print', '3d prints', '3-d printing',
-    'impresión 3d', 'impresión tridimensional', 'impreso en 3d',
-    'additive manufacturing', 'additive manufactured', 'additively manufactured',
-    'manufactura aditiva', 'fabricación aditiva',
-    'rapid prototyping', 'rapid prototype', 'rapid prototyped',
-    'prototipado rápido', 'prototipo rápido',
-    'metal 3d printing', 'metal 3d printed',
-    'fdm', 'sla', 'sls', 'dmls', 'slm',
-    'fused deposition modeling', 'stereolithography', 'selective laser sintering',
-    
-    # Tooling - English + Spanish
-    'tooling', 'tooled', 'tool', 'tools',
-    'herramental', 'herramientas', 'utillaje',
-    'live tooling', 'live tool',
-    'tool design', 'tool designer',
-    'diseño de herramientas',
-    'jigs and fixtures', 'jigs & fixtures', 'fixtures',
-    'plantillas y accesorios', 'dispositivos',
-    
-    # Machining General - English + Spanish
-    'machining', 'machined', 'machine', 'machines', 'machinist', 'machinists',
-    'machine shop', 'machine shops', 'machining shop',
-    'taller mecánico', 'taller de mecanizado', 'maquinado',
-    'precision', 'precision machining',
-    'precisión', 'mecanizado de precisión',
-    
-    # Assembly & Secondary - English + Spanish
-    'assembly', 'assembled', 'assemble', 'assembler',
-    'ensamble', 'ensamblaje', 'montaje', 'ensamblado',
-    'sub-assembly', 'subassembly', 'sub assembly',
-    'subensamble', 'submontaje',
-    'kitting', 'kitted', 'kit',
-    'packaging', 'packaged', 'package', 'packager',
-    'empaque', 'embalaje', 'empacado',
-    
-    # Surface Treatment - English + Spanish
-    'anodizing', 'anodized', 'anodize', 'anodization',
-    'anodizado', 'anodización',
-    'plating', 'plated', 'plate',
-    'plateado', 'galvanizado', 'recubrimiento',
-    'powder coating', 'powder coated', 'powder coat',
-    'recubrimiento en polvo', 'pintura en polvo',
-    'painting', 'painted', 'paint',
-    'pintura', 'pintado', 'acabado',
-    'heat treating', 'heat treated', 'heat treat', 'heat treatment',
-    'tratamiento térmico', 'tratado térmico',
-    'passivation', 'passivated', 'passivate',
-    'pasivado', 'pasivación',
-    'electropolishing', 'electropolished', 'electropolish',
-    'electropulido',
-    
-    # Quality & Inspection - English + Spanish
-    'cmm', 'coordinate measuring', 'coordinate measurement',
-    'inspection', 'inspected', 'inspect', 'inspector',
-    'inspección', 'inspeccionado', 'inspector', 'control de calidad',
-    'quality control', 'quality assurance', 'qc', 'qa',
-    'control de calidad', 'aseguramiento de calidad',
-    'optical inspection', 'vision system',
-    'inspección óptica', 'sistema de visión',
-    'metrology', 'metrological',
-    'metrología',
-    
-    # Shearing & Cutting - English + Spanish
-    'shearing', 'sheared', 'shear', 'shears',
-    'cizallado', 'cizalla', 'corte',
-    'guillotine', 'guillotines', 'power shear',
-    'guillotina',
-    'cutting', 'cut', 'cuts',
-    'corte', 'cortado', 'cortar',
-    
-    # Press & Stamping - English + Spanish
-    'hydraulic press', 'hydraulic presses', 'press', 'presses',
-    'prensa hidráulica', 'prensa',
-    'brake press', 'brake presses',
-    'transfer die', 'compound die',
-    
-    # General Manufacturing - English + Spanish
-    'manufacturing', 'manufactured', 'manufacture', 'manufacturer',
-    'manufactura', 'fabricación', 'fabricante', 'manufacturado',
-    'production', 'produce', 'produced', 'producer',
-    'producción', 'producir', 'producido', 'productor',
-    'machining services', 'manufacturing services',
-    'servicios de mecanizado', 'servicios de manufactura',
-    'contract manufacturing', 'custom manufacturing',
-    'manufactura por contrato', 'manufactura personalizada',
-    
-    # Heat Staking & Press Fit - English + Spanish
-    'heat staking', 'heat staked',
-    'press fit', 'press fitted', 'press-fit',
-    'ajuste a presión', 'ajuste por presión',
-    
-    # Container & Packaging - English + Spanish
-    'container', 'containers',
-    'contenedor', 'contenedores', 'envase', 'envases',
-]
-
-# Equipment brands (300+)
-BRANDS = [
-    # CNC Machine Tools & Machining Centers
-    'haas', 'haas automation', 'mazak', 'yamazaki mazak', 'dmg mori', 'mori seiki', 
-    'okuma', 'makino', 'fanuc', 'brother', 'nakamura', 'nakamura-tome', 'matsuura', 
-    'kitamura', 'toyoda', 'jtekt', 'tsugami', 'star micronics', 'citizen machinery', 
-    'miyano', 'takisawa', 'wasino', 'forest line', 'enshu', 'johnford', 'femco',
-    'hardinge', 'fadal', 'hurco', 'tree', 'bridgeport', 'mag', 'methods machine', 
-    'milltronics', 'tormach', 'sharp', 'dmg', 'gildemeister', 'maho', 'deckel', 
-    'hermle', 'chiron', 'spinner', 'emag', 'grob', 'starrag', 'studer', 'kellenberger', 
-    'schaublin', 'mikron', 'willemin-macodel', 'reiden', 'fehlmann', 'fidia', 'anayak',
-    'doosan', 'hyundai wia', 'kia', 'smec', 'hwacheon', 'yama seiki', 'daewoo',
-    'dmtg', 'shenyang', 'dalian', 'qinchuan', 'cncpros', 'gf machining', 'kern',
-    
-    # Laser Cutting Systems
-    'trumpf', 'amada', 'bystronic', 'mazak optonics', 'prima power', 'mitsubishi',
-    'mitsubishi electric', 'lvd', 'salvagnini', 'han\'s laser', 'hans laser', 
-    'huagong tech', 'bodor', 'hymson', 'hsg laser', 'penta laser', 'yawei', 
-    'senfeng', 'raycus', 'max photonics', 'jpt', 'coherent', 'ipg photonics', 
-    'rofin', 'trumpf laser', 'bystronic laser',
-    
-    # Waterjet Cutting
-    'omax', 'jet edge', 'wardjet', 'waterjet corporation', 'techni waterjet', 
-    'kmt', 'hypertherm', 'esab', 'koike aronson', 'accustream', 'dardi', 
-    'waterjet sweden', 'resato',
-    
-    # Press Brakes & Bending
-    'accurpress', 'ermaksan', 'durma', 'safan darley', 'wysong', 'gasparini', 
-    'haco', 'baykal', 'dener', 'colgar', 'warcom', 'accurl', 'baileigh',
-    'cincinnati', 'jmt usa', 'harsle', 'toyokoki', 'adh machine',
-    'wilson tool', 'wila', 'mate precision', 'promecam', 'trumpf tools',
-    
-    # Welding Equipment
-    'miller', 'miller electric', 'lincoln electric', 'lincoln', 'hobart',
-    'fronius', 'kemppi', 'kjellberg',
-    
-    # Robotics & Automation
-    'panasonic', 'yaskawa', 'motoman', 'fanuc robotics', 'abb robotics', 'kuka',
-    'abb', 'otc daihen', 'cloos', 'igm robotics', 'kawasaki',
-    
-    # EDM
-    'sodick', 'charmilles', 'agie', 'agie charmilles', 'mc machinery', 
-    'japax', 'ona', 'accutex', 'chmer',
-    
-    # Grinding Machines
-    'chevalier', 'kent', 'mitsui', 'jones & shipman', 'boyar schultz', 
-    'walter', 'anca', 'brown & sharpe', 'junker', 'kapp', 'agathon',
-    
-    # Stamping & Presses
-    'aida', 'komatsu', 'schuler', 'bruderer', 'minster', 'danly', 'verson',
-    'clearing', 'niagara', 'bliss', 'arisa', 'chin fong', 'seyi',
-    
-    # Casting & Foundry
-    'inductotherm', 'disa', 'loramendi', 'italpresse', 'buhler', 'idra', 'ube', 'frech',
-    
-    # Injection Molding Machines
-    'engel', 'arburg', 'haitian', 'haitian international', 'sumitomo', 
-    'sumitomo demag', 'nissei', 'nissei plastic', 'husky', 'wittmann battenfeld', 
-    'battenfeld', 'boy', 'boy machines', 'milacron', 'toshiba machine', 
-    'shibaura machine', 'chen hsong', 'krauss maffei', 'kraussmaffei', 
-    'fanuc roboshot', 'jsw', 'japan steel works', 'negri bossi', 'fu chun shin', 
-    'dakumar', 'yizumi', 'tederic', 'bole machinery', 'zhafir', 
-    'demag', 'ferromatik', 'van dorn', 'netstal', 'sandretto',
-    
-    # Extrusion Equipment
-    'davis-standard', 'davis standard', 'cincinnati milacron',
-    'graham engineering', 'battenfeld-cincinnati', 'battenfeld cincinnati', 
-    'leistritz', 'coperion', 'berstorff', 'reifenhauser', 'windmoller',
-    'bandera', 'starlinger', 'bausano', 'entek', 'amut', 'erema',
-    
-    # Blow Molding Machines
-    'kautex', 'bekum', 'bekum america', 'uniloy', 'wilmington', 'magic', 
-    'jomar', 'techne', 'graham', 'plastiblow', 'sidel', 'khs', 'sipa',
-    'aoki', 'nissei asb',
-    
-    # Thermoforming Machines
-    'brown machine', 'illig', 'gabler', 'geiss', 'multivac', 'kiefel',
-    'gn thermoforming', 'sencorp', 'maac machinery',
-    
-    # 3D Printing & Additive Manufacturing
-    'stratasys', '3d systems', 'hp', 'eos', 'formlabs', 'ultimaker', 'markforged',
-    'carbon', 'prusa', 'desktop metal', 'velo3d', 'slm solutions', 'renishaw',
-    'ge additive',
-    
-    # Auxiliary Equipment
-    'conair', 'novatec', 'motan', 'maguire', 'matsui', 'piovan', 'wittmann',
-    'sterling', 'dri-air', 'thermal care', 'aec',
-]
+# Manufacturing terms, equipment brands, plastics and metals live in vocabulary.txt.
+# The matcher compiled from it is cached in VOCABULARY_CACHE_DIR, keyed by content hash
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+VOCABULARY_FILE = os.getenv("VOCABULARY_FILE", os.path.join(APP_DIR, "vocabulary.txt"))
+VOCABULARY_CACHE_DIR = os.getenv("VOCABULARY_CACHE_DIR", os.path.join(APP_DIR, ".vocab_cache"))
 
-# Plastics (200+)
-PLASTICS = [
-    # Commodity Plastics
-    'pet', 'pete', 'polyethylene terephthalate',
-    'hdpe', 'high-density polyethylene', 'high density polyethylene',
-    'ldpe', 'low-density polyethylene', 'low density polyethylene',
-    'lldpe', 'linear low-density polyethylene',
-    'pp', 'polypropylene', 'homopolymer pp', 'copolymer pp',
-    'ps', 'polystyrene', 'hips', 'high impact polystyrene',
-    'pvc', 'polyvinyl chloride', 'rigid pvc', 'flexible pvc',
-    'eva', 'ethylene vinyl acetate',
-    
-    # Engineering Plastics
-    'abs', 'acrylonitrile butadiene styrene',
-    'pa', 'nylon', 'polyamide', 'pa6', 'pa66', 'pa6/6', 'pa11', 'pa12',
-    'nylon 6', 'nylon 66', 'nylon 6/6', 'nylon 11', 'nylon 12',
-    'pc', 'polycarbonate', 'lexan', 'makrolon',
-    'pom', 'acetal', 'delrin', 'polyoxymethylene',
-    'pbt', 'polybutylene terephthalate',
-    'petg', 'pet-g', 'glycol-modified pet',
-    'san', 'styrene acrylonitrile',
-    'asa', 'acrylonitrile styrene acrylate',
-    'pmma', 'acrylic', 'plexiglass',
-    'pc/abs', 'pc abs blend',
-    
-    # High Performance Plastics
-    'peek', 'polyetheretherketone',
-    'pei', 'ultem', 'polyetherimide',
-    'psu', 'polysulfone',
-    'pes', 'polyethersulfone',
-    'ppsu', 'polyphenylsulfone',
-    'pps', 'polyphenylene sulfide', 'ryton',
-    'pai', 'polyamide-imide', 'torlon',
-    'lcp', 'liquid crystal polymer',
-    'pvdf', 'polyvinylidene fluoride', 'kynar',
-    'ptfe', 'teflon', 'polytetrafluoroethylene',
-    'pfa', 'perfluoroalkoxy',
-    'fep', 'fluorinated ethylene propylene',
-    
-    # Thermoplastic Elastomers
-    'tpe', 'thermoplastic elastomer',
-    'tpu', 'thermoplastic polyurethane',
-    'tpo', 'thermoplastic olefin',
-    'tpv', 'thermoplastic vulcanizate',
-    'sebs', 'styrene ethylene butylene styrene',
-    'sbs', 'styrene butadiene styrene',
-    
-    # Silicones
-    'lsr', 'liquid silicone rubber',
-    'hcr', 'high consistency rubber',
-    
-    # Recycled & Sustainable
-    'rpet', 'r-pet', 'recycled pet',
-    'pcr', 'post-consumer recycled',
-    'pir', 'post-industrial recycled',
-    'recycled plastic', 'recycled resin', 'regrind',
-    'pla', 'polylactic acid',
-    
-    # General Terms
-    'resin', 'pellets', 'polymer', 'thermoplastic', 'thermoset',
-    'glass-filled', 'glass filled', 'fiber-reinforced', 'fiber reinforced',
-    'carbon fiber reinforced', 'mineral filled',
-    'flame retardant', 'uv stabilized', 'food grade', 'medical grade',
-]
+VOCABULARY, MATCHER = load_matcher(VOCABULARY_FILE, VOCABULARY_CACHE_DIR)
+MANUFACTURING_TERMS = VOCABULARY.keywords
+BRANDS = VOCABULARY.brands
+PLASTICS = VOCABULARY.plastics
+METALS = VOCABULARY.metals
 
-# Metals (200+)
-METALS = [
-    # Aluminum Alloys
-    'aluminum', 'aluminium', 'aluminum alloy',
-    '6061', '6061-t6', '6061 aluminum',
-    '6063', '6063-t5', '6063 aluminum',
-    '7075', '7075-t6', '7075 aluminum',
-    '5052', '5052 aluminum', '5083', '5083 aluminum',
-    '2024', '2024-t3', '2024 aluminum',
-    '3003', '3003 aluminum',
-    'cast aluminum', 'a356', 'a380',
-    
-    # Carbon & Alloy Steel
-    'carbon steel', 'mild steel', 'low carbon steel',
-    'alloy steel', 'tool steel', 'spring steel',
-    '4140', '4140 steel', '4340', '4340 steel',
-    '1018', '1018 steel', '1045', '1045 steel',
-    'a36', 'a36 steel',
-    '1020', '1020 steel', '12l14', '12l14 steel',
-    '8620', '8620 steel', '4130', '4130 steel',
-    'a2 tool steel', 'd2 tool steel', 'o1 tool steel',
-    
-    # Stainless Steel
-    'stainless steel', 'stainless', '304 stainless', '316 stainless',
-    '303 stainless', '17-4 stainless', '17-4 ph',
-    '304l', '304l stainless', '316l', '316l stainless',
-    '321 stainless', '410 stainless', '420 stainless',
-    '430 stainless', '440c stainless',
-    'duplex stainless', 'super duplex',
-    
-    # Brass & Bronze
-    'brass', 'brass alloy', 'c360', 'free-cutting brass',
-    'bronze', 'phosphor bronze', 'aluminum bronze', 'silicon bronze',
-    'copper alloy', 'copper', 'c110', 'ofhc copper',
-    'beryllium copper', 'c172',
-    
-    # Titanium
-    'titanium', 'titanium alloy', 'ti-6al-4v', 'ti6al4v', 
-    'grade 5 titanium', 'grade 2 titanium',
-    'cp titanium',
-    
-    # Nickel Alloys & Superalloys
-    'inconel', 'inconel 625', 'inconel 718', 'inconel 600',
-    'hastelloy', 'hastelloy c-276', 'hastelloy x',
-    'monel', 'monel 400', 'monel k-500',
-    'incoloy', 'incoloy 800',
-    'nickel alloy', 'nickel', 'nickel 200',
-    'waspaloy', 'superalloy',
-    
-    # Other Metals
-    'magnesium', 'magnesium alloy', 'az31',
-    'zinc', 'zinc alloy', 'zamak',
-    
-    # General Metal Terms
-    'heat-treated', 'cold-rolled', 'hot-rolled',
-    'hardened steel', 'annealed',
-    'galvanized steel', 'zinc plated',
-    'sheet metal', 'plate metal', 'bar stock',
-    'round bar', 'square bar', 'hex bar',
-    'structural steel', 'tube', 'pipe',
-]
+# --continuous workers reload the vocabulary between batches when the file changes
+vocabulary_watcher = VocabularyWatcher(VOCABULARY_FILE, VOCABULARY_CACHE_DIR, VOCABULARY)
 
 
 # Circuit Breaker Constants
@@ -551,6 +89,65 @@ MAX_DOMAIN_TIME = 60  # 60 seconds max per domain
 MAX_CONSECUTIVE_FAILURES = 3
 MAX_PAGES_PER_DOMAIN = 15
 
+# Adaptive depth: stop a domain once its pages stop adding indicators
+SATURATION_PATIENCE = 5  # pages in a row with nothing new (--saturation-patience, 0 = off)
+SATURATION_TARGET = None  # or once this many distinct indicators are found (--saturation-target)
+SATURATION_AUDIT_RATE = 0.05  # share of domains crawled in full to measure the findings kept
+
+# Response bodies: only HTML is read, and never more than this many bytes
+MAX_PAGE_BYTES = 2 * 1024 * 1024
+HTML_CONTENT_TYPES = ('text/html', 'application/xhtml+xml', '')
+
+# Homepage probe: URL variations are raced, each gets one attempt within one timeout window
+# (plus one retry of a 429/503, if its wait still fits in the window)
+PROBE_TIMEOUT = 15.0
+PAGE_TIMEOUT = 15.0  # internal pages; retries get RETRY_PAGE_TIMEOUT
+RETRY_PAGE_TIMEOUT = 30.0
+PROBE_STAGGER = 0.25
+MAX_PROBE_REDIRECTS = 5
+
+# DNS prefilter: domains are resolved ahead of the crawlers; names that don't exist are never fetched
+DNS_CONCURRENCY = 200  # lookups in flight
+DNS_CACHE_TTL = 3600  # seconds a resolvable domain stays cached
+DNS_NEGATIVE_TTL = 900  # seconds a non-existent domain stays cached
+
+# Sitemap discovery: robots.txt and sitemaps add candidate pages to the homepage's links
+SITEMAP_DISCOVERY = True  # --no-sitemaps turns it off
+SITEMAP_MAX_URLS = 1000  # page URLs read from a site's sitemaps
+SITEMAP_MAX_FILES = 3  # sitemap files fetched per site (indexes included)
+SITEMAP_TIMEOUT = 10.0  # seconds for robots.txt + sitemaps of one site
+SITEMAP_CACHE_TTL = 86400  # seconds a site's sitemap pages stay cached
+
+# Canonical-host cache: a domain that redirects to a site crawled within this window copies its result
+HOST_CACHE_DAYS = 7  # --host-cache-days; kept across runs with --host-cache FILE
+
+# Connection pools of the shared HTTP client: one per host, MAX_PAGES_IN_FLIGHT connections each
+HTTP_KEEPALIVE_EXPIRY = 30.0  # seconds an idle connection (and a host's idle pool) is kept
+HTTP_MAX_CONNECTIONS = 100  # open connections over all hosts, as the single pool allowed
+HTTP2 = False  # --http2: a host's page fetches share one multiplexed connection where the server offers h2
+
+# Domains crawled at the same time
+CONCURRENT_DOMAINS = 50
+
+# Streaming mode (--stream): claimed domains waiting for a free crawler slot
+STREAM_PREFETCH = 100  # queue bound
+STREAM_CLAIM_SIZE = 50  # domains claimed per top-up
+STREAM_LOG_EVERY = 100  # log speed every N domains
+STREAM_VOCAB_CHECK_EVERY = 10  # claims between checks of vocabulary.txt (batches check before each batch)
+
+# Per-host politeness for internal page fetches
+MAX_PAGES_IN_FLIGHT = 4  # concurrent page fetches per domain
+HOST_REQUEST_DELAY = 0.25  # seconds between request starts to the same host
+
+# Page retries (429/5xx/timeouts) are re-queued after a jittered exponential
+# backoff, or after Retry-After when the server sends one
+RETRY_BACKOFF_BASE = 1.0  # seconds before the first retry (0.5-1s with jitter)
+RETRY_BACKOFF_CAP = 60.0  # longest wait, also for Retry-After
+
+# Result writes are buffered and sent as bulk updates
+RESULT_FLUSH_SIZE = 100  # flush once this many results are waiting
+RESULT_FLUSH_INTERVAL = 10.0  # ...or this many seconds after the last flush
+
 # Performance tracking
 performance_stats = {
     'start_time': None,
@@ -558,9 +155,76 @@ performance_stats = {
     'successes': 0,
     'failures': 0,
     'no_keywords': 0,
+    'no_dns': 0,
     'batch_times': [],
+    'db_writes': 0,
+    'db_write_failures': 0,
+    'db_requests': 0,
+    'pages_analyzed': 0,
+    'analysis_cpu_seconds': 0.0,
+    'bytes_downloaded': 0,
+    'pages_truncated': 0,
+    'pages_skipped': 0,
+    'page_retries': 0,
+    'pages_not_modified': 0,
+    'pages_unchanged': 0,
+    'domains_saturated': 0,
+    'pages_saved': 0,
+    'saturation_audits': 0,
+    'audit_found_at_stop': 0,
+    'audit_found_total': 0,
+    'audit_pages_at_stop': 0,
+    'audit_pages_total': 0,
+    'sitemap_links': 0,
+    'pages_disallowed': 0,
+    'alias_copies': 0,
+    'rows_leased': 0,
 }
 
+# Shared by every domain's scheduler; hosts answering 429 get a lower rate
+host_limiter = HostRateLimiter(rate=1 / HOST_REQUEST_DELAY)
+
+dns_prefilter = DnsPrefilter(
+    SystemResolver(),
+    concurrency=DNS_CONCURRENCY,
+    ttl=DNS_CACHE_TTL,
+    negative_ttl=DNS_NEGATIVE_TTL
+)
+
+sitemap_discovery = SitemapDiscovery(
+    max_urls=SITEMAP_MAX_URLS,
+    max_sitemaps=SITEMAP_MAX_FILES,
+    timeout=SITEMAP_TIMEOUT,
+    ttl=SITEMAP_CACHE_TTL,
+    limiter=host_limiter
+)
+
+# canonical host -> result of the domain that crawled it (persistent with --host-cache FILE)
+host_cache = HostCache(ttl=HOST_CACHE_DAYS * 86400)
+
+# Latency histograms and gauges for --metrics-port / --metrics-log
+metrics = Metrics()
+# Domains claimed and waiting for a crawler slot (in the current batch, or queued in --stream)
+domains_waiting = 0
+
+# cProfile + stage-tagged stack sampler (--profile); None = off
+profiler = None
+
+# Re-crawl (--recrawl-days): finished domains older than this are claimed again; None = only pending
+RECRAWL_AFTER_DAYS = None
+# domain -> website_pages of its last crawl, loaded when a re-crawl claims it
+previous_crawls = {}
+# Cleaned domain name -> the table keys it was claimed as (www.Acme.com, https://acme.com/, ...):
+# leases are renewed and results written under these, not under the cleaned name
+claimed_keys = {}
+
+# Compressed copy of every fetched page (--page-store DIR), for --reextract; None = off
+page_store = None
+
+# Process pool for HTML parsing + matching (--workers N); None = analyze on the event loop
+analysis_pool = None
+analysis_workers = 1
+
 def log(msg):
     print(f"[{datetime.now().strftime('%H:%M:%S')}] {msg}", flush=True)
     sys.stdout.flush()
@@ -585,119 +249,227 @@ def is_obviously_invalid_domain(domain: str) -> bool:
 
 def extract_internal_links(html, base_domain):
     """Extract internal links from HTML"""
-    soup = BeautifulSoup(html, 'html.parser')
-    links = []
-    
-    for a_tag in soup.find_all('a', href=True):
-        href = a_tag['href'].strip()
-        
-        if not href or href.startswith(('#', 'javascript:', 'mailto:', 'tel:')):
-            continue
-        
-        if href.startswith('/'):
-            url = f'https://{base_domain}{href}'
-        elif href.startswith('http'):
-            url = href
-        else:
-            continue
-        
-        try:
-            from urllib.parse import urlparse
-            parsed = urlparse(url)
-            link_domain = parsed.netloc.replace('www.', '')
-            
-            if link_domain == base_domain.replace('www.', ''):
-                clean_url = f"{parsed.scheme}://{parsed.netloc}{parsed.path}"
-                links.append(clean_url)
-        except:
-            continue
+    return internal_links(parse_html(html), base_domain)[:MAX_PAGES_PER_DOMAIN]
+
+def match_text(text, url):
+    """Match all vocabularies against a page's visible text and URL"""
+    combined = text.lower() + ' ' + url.lower()
     
-    return list(set(links))[:MAX_PAGES_PER_DOMAIN]
+    # Single scan per matching rule (substring / whole word)
+    return MATCHER.match(combined)
 
 def detect_manufacturing(html, url):
     """Detect manufacturing capabilities from page content"""
-    soup = BeautifulSoup(html, 'html.parser')
-    for tag in soup(['script', 'style']):
-        tag.decompose()
-    
-    text = soup.get_text().lower()
-    combined = text + ' ' + url.lower()
-    
-    found = {
-        'keywords': set(),
-        'brands': set(),
-        'plastics': set(),
-        'metals': set()
-    }
-    
-    # Search manufacturing terms
-    for term in MANUFACTURING_TERMS:
-        if term in combined:
-            found['keywords'].add(term)
+    return match_text(visible_text(parse_html(html)), url)
+
+def analyze_page(html, url, base_domain=None):
+    """Parse a page once; return its indicators and, given base_domain, its internal links"""
+    root = parse_html(html)
     
-    # Search brands (with word boundaries)
-    for brand in BRANDS:
-        if re.search(r'\b' + re.escape(brand) + r'\b', combined, re.IGNORECASE):
-            found['brands'].add(brand)
+    # Links first: visible_text strips script/style from the tree
+    links = internal_links(root, base_domain) if base_domain else []
+    indicators = match_text(visible_text(root), url)
     
-    # Search plastics (with word boundaries)
-    for p in PLASTICS:
-        if re.search(r'\b' + re.escape(p) + r'\b', combined, re.IGNORECASE):
-            found['plastics'].add(p)
+    return indicators, links
+
+def analyze_page_timed(html, url, base_domain=None):
+    """analyze_page plus the CPU seconds of its parse and match steps (measured in whichever process runs it)"""
+    cpu_start = time.process_time()
+    root = parse_html(html)
+    links = internal_links(root, base_domain) if base_domain else []
+    text = visible_text(root)
+    parsed = time.process_time()
+    indicators = match_text(text, url)
+    return indicators, links, parsed - cpu_start, time.process_time() - parsed
+
+async def run_analysis(html, url, base_domain=None):
+    """Analyze a page in the process pool when --workers is set, otherwise inline"""
+    if analysis_pool is None:
+        indicators, links, parse_seconds, match_seconds = analyze_page_timed(html, url, base_domain)
+    else:
+        loop = asyncio.get_running_loop()
+        indicators, links, parse_seconds, match_seconds = await loop.run_in_executor(
+            analysis_pool, analyze_page_timed, html, url, base_domain
+        )
+    performance_stats['pages_analyzed'] += 1
+    performance_stats['analysis_cpu_seconds'] += parse_seconds + match_seconds
+    metrics.observe('analysis_seconds', parse_seconds, step='parse')
+    metrics.observe('analysis_seconds', match_seconds, step='match')
+    return indicators, links
+
+def is_html_content_type(content_type):
+    """True for HTML responses (and for servers that send no Content-Type at all)"""
+    media_type = content_type.split(';')[0].strip().lower()
+    return media_type in HTML_CONTENT_TYPES
+
+async def read_capped_body(response, max_bytes):
+    """Read a streamed body up to max_bytes (after decompression); returns (text, truncated)"""
+    chunks = []
+    size = 0
+    truncated = False
+    start = time.perf_counter()
+    async for chunk in response.aiter_bytes():
+        if size + len(chunk) > max_bytes:
+            chunks.append(chunk[:max_bytes - size])
+            truncated = True
+            break
+        chunks.append(chunk)
+        size += len(chunk)
+    body = b''.join(chunks)
+    metrics.observe('fetch_seconds', time.perf_counter() - start, phase='body')
+    metrics.add('bytes', len(body))
+    performance_stats['bytes_downloaded'] += len(body)
+    # A multi-byte character cut in half at the cap decodes as U+FFFD
+    return body.decode(response.encoding or 'utf-8', errors='replace'), truncated
+
+def empty_page(url):
+    """Result for a page that answered but had nothing to analyze (e.g. a PDF)"""
+    return {
+        'url': url,
+        'indicators': {category: set() for category in MATCHER.categories},
+        'links': []
+    }
+
+async def fetch_html(url, session, timeout, follow_redirects=True, headers=None):
+    """One streamed GET; returns (response, html), where html is None unless the page is readable HTML"""
+    # Streamed: the status and Content-Type are checked before any of the body is read
+    async with session.stream('GET', url, timeout=timeout, follow_redirects=follow_redirects,
+                              headers=headers, extensions=metrics.trace()) as response:
+        if response.status_code >= 400 or response.has_redirect_location or response.status_code == 304:
+            return response, None
+        content_type = response.headers.get('content-type', '')
+        if not is_html_content_type(content_type):
+            performance_stats['pages_skipped'] += 1
+            return response, None
+        html, truncated = await read_capped_body(response, MAX_PAGE_BYTES)
+        if truncated:
+            performance_stats['pages_truncated'] += 1
+        return response, html
+
+async def page_from_response(url, response, html, base_domain=None, previous=None, domain=None):
+    """Page result for a successful response; reuses the previous crawl's analysis if the page is unchanged"""
+    if response.status_code == 304 and previous:
+        performance_stats['pages_not_modified'] += 1
+        return page_from_record(url, previous, MATCHER.categories)
+    if html is None:
+        return empty_page(url)
+    
+    digest = body_hash(html)
+    if page_store is not None and not page_store.has(url, digest):
+        await asyncio.to_thread(
+            page_store.put, domain or base_domain, url, html,
+            homepage=base_domain is not None,
+            etag=response.headers.get('etag'),
+            last_modified=response.headers.get('last-modified'),
+            digest=digest
+        )
     
-    # Search metals (with word boundaries)
-    for m in METALS:
-        if re.search(r'\b' + re.escape(m) + r'\b', combined, re.IGNORECASE):
-            found['metals'].add(m)
+    if previous and previous.get('hash') == digest:
+        performance_stats['pages_unchanged'] += 1
+        page = page_from_record(url, previous, MATCHER.categories)
+    else:
+        indicators, links = await run_analysis(html, url, base_domain)
+        # The HTML is dropped here: a page is only its indicators (+ links) from now on
+        page = {
+            'url': url,
+            'indicators': indicators,
+            'links': links
+        }
     
-    return found
+    # Validators for the next re-crawl's conditional request
+    page['etag'] = response.headers.get('etag')
+    page['last_modified'] = response.headers.get('last-modified')
+    page['hash'] = digest
+    page['vocab'] = vocabulary_stamp()
+    return page
 
-async def scrape_page(url, session, retry=0):
-    """Scrape a single page"""
+async def scrape_page(url, session, base_domain=None, timeout=PAGE_TIMEOUT, previous=None, domain=None):
+    """Scrape a single page (and collect its internal links when base_domain is given)
+    
+    Returns the page, None when it failed for good, or RetryLater when it is
+    worth another try; the PageScheduler re-queues it instead of sleeping here.
+    previous is the page's entry from the last crawl, for a conditional request;
+    domain is what the page is filed under in the page store (--page-store).
+    """
     try:
-        timeout = 15.0 if retry == 0 else 30.0
-        
-        response = await session.get(
-            url, 
-            timeout=timeout,
-            follow_redirects=True
-        )
+        response, html = await fetch_html(url, session, timeout, headers=conditional_headers(previous))
         
         if response.status_code == 429:
-            log(f"    ⏳ Rate limited, waiting 5s...")
-            await asyncio.sleep(5)
-            if retry < 2:
-                return await scrape_page(url, session, retry + 1)
-            return None
+            log(f"    ⏳ Rate limited, backing off...")
+            retry_after = parse_retry_after(response.headers.get('retry-after'))
+            return RetryLater('rate_limited', retry_after, max_retries=2, throttle=True)
         elif response.status_code in [502, 503, 504]:
-            await asyncio.sleep(3)
-            if retry < 1:
-                return await scrape_page(url, session, retry + 1)
-            return None
+            retry_after = parse_retry_after(response.headers.get('retry-after'))
+            return RetryLater('unavailable', retry_after)
         elif response.status_code >= 400:
-            if retry < 1:
-                await asyncio.sleep(1)
-                return await scrape_page(url, session, retry + 1)
-            return None
-            
-        html = response.text
-        indicators = detect_manufacturing(html, url)
+            return RetryLater('http_error')
         
-        return {
-            'url': url,
-            'html': html,
-            'indicators': indicators
-        }
+        return await page_from_response(url, response, html, base_domain, previous, domain)
     except (httpx.ConnectTimeout, httpx.ReadTimeout, httpx.ConnectError):
-        if retry < 1:
-            await asyncio.sleep(1)
-            return await scrape_page(url, session, retry + 1)
+        return RetryLater('timeout')
+    except Exception:
         return None
+
+def url_origin(url):
+    """(scheme, host) of a URL, e.g. ('https', 'www.example.com')"""
+    parsed = httpx.URL(url)
+    return parsed.scheme, parsed.host
+
+async def probe_url(url, session, base_domain, probing, previous_pages, deadline=None):
+    """Fetch a homepage variant once, following redirects by hand so other probes learn where they lead
+
+    A 429/503 answer is retried once if its wait ends before deadline (loop time).
+    """
+    try:
+        for attempt in range(2):
+            for _ in range(MAX_PROBE_REDIRECTS + 1):
+                headers = conditional_headers(previous_pages.get(url))
+                response, html = await fetch_html(url, session, PROBE_TIMEOUT, follow_redirects=False,
+                                                  headers=headers)
+                if not response.has_redirect_location:
+                    break
+                next_url = str(response.url.join(response.headers.get('location', '')))
+                target = url_origin(next_url)
+                if target != url_origin(url):
+                    if target in probing:
+                        # Another probe already covers that site (e.g. https://x -> https://www.x)
+                        return None
+                    probing.add(target)
+                url = next_url
+            else:
+                return None
+            
+            if response.status_code not in (429, 503) or attempt or not await probe_backoff(response, deadline):
+                break
+        
+        if response.status_code >= 400:
+            return None
+        return await page_from_response(url, response, html, base_domain, previous_pages.get(url))
     except Exception:
         return None
 
-async def try_url_variations(domain, session):
-    """Try multiple URL variations to reach the domain"""
+async def probe_backoff(response, deadline):
+    """Wait before retrying a rate-limited homepage; False (without waiting) if that would pass deadline"""
+    loop = asyncio.get_running_loop()
+    host = response.url.netloc.decode('ascii')
+    retry_after = parse_retry_after(response.headers.get('retry-after'))
+    if retry_after is not None:
+        if deadline is not None and loop.time() + retry_after >= deadline:
+            return False
+        log(f"  ⏳ Homepage rate limited, retrying in {retry_after:.0f}s...")
+        await asyncio.sleep(retry_after)
+        return True
+    # No Retry-After: slow the host down and take its next start slot
+    host_limiter.throttle(host)
+    try:
+        async with asyncio.timeout_at(deadline):
+            await host_limiter.acquire(host)
+    except TimeoutError:
+        return False
+    return True
+
+async def try_url_variations(domain, session, previous_pages=None):
+    """Race the URL variations of a domain; the first homepage that loads wins"""
     clean_domain = domain.replace('https://', '').replace('http://', '').replace('www.', '').split('/')[0]
     
     url_variations = [
@@ -707,28 +479,76 @@ async def try_url_variations(domain, session):
         f'http://www.{clean_domain}',
     ]
     
-    for attempt in range(2):
-        for url in url_variations:
-            try:
-                result = await scrape_page(url, session)
+    # Origins a probe is fetching (or was redirected to); shared by all probes of this domain
+    probing = set()
+    pending = list(url_variations)
+    running = set()
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + PROBE_TIMEOUT
+    
+    def launch_next():
+        # Variations some probe was already redirected to are never launched
+        while pending:
+            url = pending.pop(0)
+            if url_origin(url) not in probing:
+                probing.add(url_origin(url))
+                running.add(asyncio.create_task(
+                    probe_url(url, session, clean_domain, probing, previous_pages or {}, deadline)
+                ))
+                return
+    
+    try:
+        launch_next()
+        next_launch = loop.time() + PROBE_STAGGER
+        while running:
+            now = loop.time()
+            if now >= deadline:
+                break
+            wait = deadline - now
+            if pending:
+                wait = min(wait, next_launch - now)
+            done, _ = await asyncio.wait(running, timeout=max(wait, 0), return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                running.discard(task)
+                result = task.result()
                 if result:
-                    log(f"  ✅ Connected via: {url}")
-                    return result, url
-            except:
-                continue
-        
-        if attempt == 0:
-            await asyncio.sleep(2)
+                    log(f"  ✅ Connected via: {result['url']}")
+                    return result, result['url']
+            # Happy eyeballs: the next variation starts after a short stagger, or as soon as one fails
+            if pending and (done or loop.time() >= next_launch):
+                launch_next()
+                next_launch = loop.time() + PROBE_STAGGER
+    finally:
+        for task in running:
+            task.cancel()
+        await asyncio.gather(*running, return_exceptions=True)
     
     return None, None
 
-async def crawl_domain(base_url, session):
+async def crawl_tracked(domain, session, sink):
+    """crawl_domain, counted as in flight and recorded for the metrics"""
+    with metrics.track_domain(domain) as record:
+        result = await crawl_domain(f'https://{domain}', session, sink)
+        record['status'] = result['website_scrape_status']
+        record['pages'] = len(result.get('website_pages') or ())
+    if profiler is not None:
+        profiler.domain_done()
+    return result
+
+async def crawl_domain(base_url, session, sink):
     """Crawl a domain and extract manufacturing keywords"""
     clean_domain = base_url.replace('https://', '').replace('http://', '').replace('www.', '').split('/')[0]
     domain = clean_domain
     
+    # What the last crawl stored per page (re-crawls only), for conditional requests;
+    # pages matched with another vocabulary are fetched and analyzed again.
+    # Taken before any early return, so skipped domains don't leave their history behind
+    previous_pages = {
+        url: record for url, record in previous_crawls.pop(domain, {}).items()
+        if record.get('vocab') == vocabulary_stamp()
+    }
+    
     domain_start_time = datetime.now()
-    consecutive_failures = 0
     
     log(f"🔍 Crawling {domain}")
     
@@ -740,183 +560,637 @@ async def crawl_domain(base_url, session):
         log(f"  ❌ Invalid domain format - skipping")
         performance_stats['failures'] += 1
         
-        try:
-            supabase.table(TABLE_NAME).update({
-                'website_scrape_status': 'error',
-                'website_scraped_at': datetime.now().isoformat()
-            }).eq('domain', domain).execute()
-        except Exception as e:
-            log(f"  ⚠️ Failed to save error status: {str(e)}")
-        return None
+        result = {
+            'website_scrape_status': 'error',
+            'website_scraped_at': datetime.now().isoformat()
+        }
+        await sink.put(domain, result)
+        return result
+    
+    # Usually answered from the cache: the prefilter resolved it while the domain was queued
+    dns_start = time.perf_counter()
+    exists = await dns_prefilter.exists(domain)
+    metrics.observe('fetch_seconds', time.perf_counter() - dns_start, phase='dns')
+    if not exists:
+        log(f"  ❌ No DNS record - skipping")
+        performance_stats['no_dns'] += 1
+        
+        result = {
+            'website_scrape_status': 'no_dns',
+            'website_scraped_at': datetime.now().isoformat()
+        }
+        await sink.put(domain, result)
+        return result
     
     # Try to scrape homepage
-    homepage, successful_url = await try_url_variations(domain, session)
+    homepage, successful_url = await try_url_variations(domain, session, previous_pages)
     
     if not homepage:
         log(f"  ❌ All URL variations failed - domain unreachable")
         performance_stats['failures'] += 1
         
-        try:
-            supabase.table(TABLE_NAME).update({
-                'website_scrape_status': 'timeout',
-                'website_scraped_at': datetime.now().isoformat()
-            }).eq('domain', domain).execute()
-        except Exception as e:
-            log(f"  ⚠️ Failed to save timeout status: {str(e)}")
-        return None
+        result = {
+            'website_scrape_status': 'timeout',
+            'website_scraped_at': datetime.now().isoformat()
+        }
+        await sink.put(domain, result)
+        return result
     
     log(f"  ✅ Homepage loaded successfully")
     
-    # Extract and crawl internal links
-    internal_links = extract_internal_links(homepage['html'], domain)
-    log(f"  📄 Found {len(internal_links)} internal pages to crawl")
+    # Aliases (old brand names, country TLDs) end up on a site another domain already crawled
+    host = site_host(successful_url)
+    cached = await host_cache.claim(host, domain)
+    if cached is not None:
+        log(f"  🔗 Alias of {host} (crawled as {cached['domain']}) - copying its result")
+        result = alias_result(cached)
+    else:
+        try:
+            result = await crawl_site(domain, homepage, successful_url, session, previous_pages, domain_start_time)
+            host_cache.put(host, domain, result)
+        finally:
+            host_cache.release(host)
     
-    all_pages = [homepage]
+    status = result['website_scrape_status']
     
-    for page_url in internal_links:
-        elapsed = (datetime.now() - domain_start_time).total_seconds()
-        if elapsed > MAX_DOMAIN_TIME:
-            log(f"  ⏱️ Domain timeout - stopping with {len(all_pages)} pages")
-            break
-        
-        if consecutive_failures >= MAX_CONSECUTIVE_FAILURES:
-            log(f"  ⚠️ Too many failures - stopping with {len(all_pages)} pages")
-            break
-        
-        try:
-            page_result = await scrape_page(page_url, session)
-            if page_result:
-                all_pages.append(page_result)
-                consecutive_failures = 0
-            else:
-                consecutive_failures += 1
-        except:
-            consecutive_failures += 1
+    # Hand off to the result sink; it is saved with the next bulk write
+    await sink.put(domain, result)
+    log(f"  📤 Queued for save ({status})")
     
-    # Aggregate results
-    all_keywords = set()
-    all_brands = set()
-    all_plastics = set()
-    all_metals = set()
+    return result
+
+async def crawl_site(domain, homepage, successful_url, session, previous_pages, domain_start_time):
+    """Crawl the internal pages of a domain whose homepage loaded; its result columns"""
+    # Extract and crawl internal links
+    # Links were collected while the homepage was parsed for keywords
+    page_links = homepage['links']
+    if SITEMAP_DISCOVERY:
+        page_links = await discover_pages(successful_url, session, page_links)
+    page_links = page_links[:MAX_PAGES_PER_DOMAIN]
+    log(f"  📄 Found {len(page_links)} internal pages to crawl")
+    
+    # Running totals: each page's indicators are merged in as soon as it completes
+    findings = {category: set(found) for category, found in homepage['indicators'].items()}
+    pages = {homepage['url']: page_record(homepage, MAX_PAGES_PER_DOMAIN)}
+    saturation = Saturation(
+        found=sum(len(found) for found in findings.values()),
+        patience=SATURATION_PATIENCE,
+        target=SATURATION_TARGET,
+        audit=random.random() < SATURATION_AUDIT_RATE
+    )
+    
+    async def fetch_and_merge(page_url):
+        # Retries get the longer timeout
+        timeout = RETRY_PAGE_TIMEOUT if scheduler.attempts.get(page_url) else PAGE_TIMEOUT
+        page = await scrape_page(page_url, session, timeout=timeout,
+                                 previous=previous_pages.get(page_url), domain=domain)
+        if not page or isinstance(page, RetryLater):
+            return page
+        pages[page_url] = page_record(page, MAX_PAGES_PER_DOMAIN)
+        new = 0
+        for category, found in page['indicators'].items():
+            before = len(findings[category])
+            findings[category].update(found)
+            new += len(findings[category]) - before
+        saturation.add(new)
+        return True
     
-    for page in all_pages:
-        if page:
-            all_keywords.update(page['indicators']['keywords'])
-            all_brands.update(page['indicators']['brands'])
-            all_plastics.update(page['indicators']['plastics'])
-            all_metals.update(page['indicators']['metals'])
+    # Internal pages run a few at a time; the breakers cancel whatever is still in flight
+    scheduler = PageScheduler(
+        fetch_and_merge,
+        max_in_flight=MAX_PAGES_IN_FLIGHT,
+        host_delay=HOST_REQUEST_DELAY,
+        max_consecutive_failures=MAX_CONSECUTIVE_FAILURES,
+        time_budget=MAX_DOMAIN_TIME - (datetime.now() - domain_start_time).total_seconds(),
+        limiter=host_limiter,
+        backoff_base=RETRY_BACKOFF_BASE,
+        backoff_cap=RETRY_BACKOFF_CAP,
+        should_stop=saturation.should_stop
+    )
+    merged, stop_reason = await scheduler.run(page_links)
+    performance_stats['page_retries'] += scheduler.retries
+    pages_crawled = 1 + len(merged)
+    
+    if saturation.found_at_stop is not None:
+        performance_stats['saturation_audits'] += 1
+        performance_stats['audit_found_at_stop'] += saturation.found_at_stop
+        performance_stats['audit_found_total'] += saturation.found
+        performance_stats['audit_pages_at_stop'] += 1 + saturation.pages_at_stop
+        performance_stats['audit_pages_total'] += pages_crawled
+    
+    if stop_reason == STOP_SATURATED:
+        performance_stats['domains_saturated'] += 1
+        performance_stats['pages_saved'] += scheduler.skipped
+        log(f"  🎯 Saturated - stopping with {pages_crawled} pages, {scheduler.skipped} not fetched")
+    elif stop_reason == STOP_TIMEOUT:
+        log(f"  ⏱️ Domain timeout - stopping with {pages_crawled} pages")
+    elif stop_reason == STOP_FAILURES:
+        log(f"  ⚠️ Too many failures - stopping with {pages_crawled} pages")
+    
+    total_matches = sum(len(found) for found in findings.values())
+    
+    log(f"  ✅ {total_matches} total matches | {pages_crawled} pages crawled")
     
-    total_matches = len(all_keywords) + len(all_brands) + len(all_plastics) + len(all_metals)
+    # Prepare result for database
+    result = findings_result(findings, pages)
+    result['website_scraped_at'] = datetime.now().isoformat()
     
-    log(f"  ✅ {total_matches} total matches | {len(all_pages)} pages crawled")
+    if page_store is not None:
+        # --reextract writes to the rows the domain was claimed as, from this crawl's pages only
+        await asyncio.to_thread(page_store.put_crawl, domain, claimed_rows([domain]), list(pages))
+    
+    return result
+
+def alias_result(entry):
+    """Result columns copied from the domain that crawled the same site (counted like a crawl)"""
+    performance_stats['alias_copies'] += 1
+    result = dict(entry['result'])
+    result['website_scraped_at'] = datetime.now().isoformat()
+    if result['website_scrape_status'] == 'completed':
+        performance_stats['successes'] += 1
+    else:
+        performance_stats['no_keywords'] += 1
+    return result
+
+async def discover_pages(origin, session, homepage_links):
+    """The homepage's ranked links with the site's sitemap pages ranked in, filtered by robots.txt"""
+    sitemap_pages, robots = await sitemap_discovery.discover(origin, session)
+    if sitemap_pages:
+        log(f"  🗺️ Sitemap: {len(sitemap_pages)} pages")
+        performance_stats['sitemap_links'] += len(sitemap_pages)
+    # Homepage links were ranked with their anchor text: they keep that order
+    links = merge_links(homepage_links, sitemap_pages)
+    allowed = [url for url in links if robots.allows(url)]
+    performance_stats['pages_disallowed'] += len(links) - len(allowed)
+    return allowed
+
+def findings_result(findings, pages):
+    """Result columns for a domain's merged findings (and counts it as a success / no_keywords)"""
+    all_keywords = findings['keywords']
+    all_brands = findings['brands']
+    all_plastics = findings['plastics']
+    all_metals = findings['metals']
     
     # Determine status
-    if total_matches > 0:
+    if any(findings.values()):
         status = 'completed'
         performance_stats['successes'] += 1
     else:
         status = 'no_keywords'
         performance_stats['no_keywords'] += 1
     
-    # Prepare result for database
-    result = {
+    return {
         'website_keywords': list(all_keywords) if all_keywords else None,
         'website_brands': list(all_brands) if all_brands else None,
         'website_plastics': list(all_plastics) if all_plastics else None,
         'website_metals': list(all_metals) if all_metals else None,
-        'website_scrape_status': status,
-        'website_scraped_at': datetime.now().isoformat()
+        'website_pages': pages,
+        'website_scrape_status': status
     }
-    
-    # Save to Supabase
-    try:
-        supabase.table(TABLE_NAME).update(result).eq('domain', domain).execute()
-        log(f"  💾 Saved to Supabase ({status})")
-    except Exception as e:
-        log(f"  ❌ Failed to save: {str(e)}")
-        performance_stats['failures'] += 1
-    
-    return result
 
-async def process_batch(domains, batch_size=500):
-    """Process a batch of domains"""
-    log(f"🏭 Starting batch of {len(domains)} domains...\n")
-    
-    async with httpx.AsyncClient(
+async def reextract_stored_pages():
+    """Re-run keyword detection over each domain's latest stored crawl and save the results (no network)"""
+    by_domain = page_store.domains()
+    pages_total = sum(len(entries) for _, entries in by_domain.values())
+    log(f"♻️ Re-extracting {len(by_domain)} domains ({pages_total} pages) from {page_store.directory}...\n")
+    start = datetime.now()
+    
+    async with make_sink(save_reextracted_results) as sink:
+        semaphore = asyncio.Semaphore(CONCURRENT_DOMAINS)
+        
+        async def reextract_domain(domain, keys, entries):
+            async with semaphore:
+                findings = {category: set() for category in MATCHER.categories}
+                pages = {}
+                for entry in entries:
+                    html = await asyncio.to_thread(page_store.read, entry)
+                    indicators, links = await run_analysis(
+                        html, entry['url'], domain if entry.get('homepage') else None
+                    )
+                    for category, found in indicators.items():
+                        findings[category].update(found)
+                    pages[entry['url']] = page_record({
+                        'indicators': indicators,
+                        'links': links,
+                        'etag': entry.get('etag'),
+                        'last_modified': entry.get('last_modified'),
+                        'hash': entry.get('hash'),
+                        'vocab': vocabulary_stamp(),
+                    }, MAX_PAGES_PER_DOMAIN)
+                # website_scraped_at is left alone: nothing was fetched
+                result = findings_result(findings, pages)
+                for key in keys:
+                    await sink.put(key, result)
+                performance_stats['domains_processed'] += 1
+        
+        await asyncio.gather(*[reextract_domain(d, keys, entries) for d, (keys, entries) in by_domain.items()])
+    
+    elapsed = (datetime.now() - start).total_seconds()
+    log(f"✅ Re-extracted {len(by_domain)} domains in {elapsed:.1f}s | "
+        f"{performance_stats['successes']} with keywords, {performance_stats['no_keywords']} without | "
+        f"{performance_stats['rows_leased']} rows left alone (being crawled)")
+    log_db_stats(sink)
+    log_analysis_stats()
+
+def make_transport(**options):
+    """Per-host connection pools of the shared client, sized to the pages a domain fetches at once"""
+    return HostPoolTransport(
+        connections_per_host=MAX_PAGES_IN_FLIGHT,
+        # apex/www over https/http: up to 4 origins per domain being crawled
+        max_hosts=4 * CONCURRENT_DOMAINS,
+        max_connections=HTTP_MAX_CONNECTIONS,
+        keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+        http2=HTTP2,
+        **options
+    )
+
+def make_session(transport=None):
+    """Shared HTTP client for all crawls (transport: e.g. a benchmark's local web server)"""
+    return httpx.AsyncClient(
         follow_redirects=True,
         headers={
             'User-Agent': random.choice(USER_AGENTS),
             'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
             'Accept-Language': 'en-US,en;q=0.5',
             'Accept-Encoding': 'gzip, deflate',
-            'Connection': 'keep-alive',
+            # No Connection: keep-alive - HTTP/1.1 keeps connections open anyway, and HTTP/2 forbids the header
         },
         timeout=httpx.Timeout(45.0, connect=15.0),
-        limits=httpx.Limits(
-            max_connections=100,
-            max_keepalive_connections=20,
-            keepalive_expiry=30.0
-        )
-    ) as session:
+        transport=transport or make_transport()
+    )
+
+def make_sink(write_rows=None):
+    """Result sink that bulk-updates the claimed rows in Supabase"""
+    return ResultSink(
+        write_rows or save_domain_results,
+        flush_size=RESULT_FLUSH_SIZE,
+        flush_interval=RESULT_FLUSH_INTERVAL,
+        log=log,
+        on_write=lambda seconds: metrics.observe('db_write_seconds', seconds)
+    )
+
+def log_db_stats(sink):
+    """Fold a sink's write stats into performance_stats and log them"""
+    db = sink.stats()
+    performance_stats['db_writes'] += db['rows_written']
+    performance_stats['db_write_failures'] += db['rows_failed']
+    performance_stats['db_requests'] += db['requests']
+    log(f"💾 DB: {db['rows_written']} results saved in {db['requests']} requests, "
+        f"{db['rows_failed']} failed, {db['retries']} retries | "
+        f"avg {db['avg_write_ms']:.0f}ms, max {db['max_write_ms']:.0f}ms | "
+        f"peak queue depth {db['max_queue_depth']}")
+
+async def process_batch(domains, batch_size=500):
+    """Process a batch of domains"""
+    log(f"🏭 Starting batch of {len(domains)} domains...\n")
+    
+    async with make_session() as session, make_sink() as sink:
         
-        semaphore = asyncio.Semaphore(50)  # 50 concurrent domains
+        semaphore = asyncio.Semaphore(CONCURRENT_DOMAINS)
+        # Resolves the whole batch while the first domains are being crawled
+        prefetch = dns_prefilter.start_prefetch(domains)
         
         async def crawl_with_limit(domain):
+            global domains_waiting
+            domains_waiting += 1
             async with semaphore:
-                await crawl_domain(f'https://{domain}', session)
+                domains_waiting -= 1
+                await crawl_tracked(domain, session, sink)
                 performance_stats['domains_processed'] += 1
         
         tasks = [crawl_with_limit(domain) for domain in domains]
         await asyncio.gather(*tasks)
+        await prefetch
+        
+        # Leaving the block flushes buffered results (also on Ctrl-C),
+        # so the next batch never refetches them
+        waiting = sink.queue.qsize() + len(sink.buffer)
+        if waiting:
+            log(f"💾 Flushing {waiting} buffered results...")
+    
+    log_db_stats(sink)
 
-def get_pending_domains(limit=500):
-    """Fetch domains that need scraping"""
-    try:
-        # Get domains where website_scrape_status is 'pending' or NULL
-        response = supabase.table(TABLE_NAME).select('domain').or_(
-            'website_scrape_status.eq.pending,website_scrape_status.is.null'
-        ).limit(limit).execute()
+async def process_stream(worker_id):
+    """Crawl pending domains as a continuous stream: no batches, barrier or cooldown"""
+    global domains_waiting
+    log(f"🏭 Streaming domains through {CONCURRENT_DOMAINS} crawler slots...\n")
+    stream_start = datetime.now()
+    
+    prefetches = set()
+    claims = 0
+    
+    async with make_session() as session, make_sink() as sink, \
+            LeaseKeeper(claim_store, worker_id, [], LEASE_SECONDS, log=log) as keeper:
+        
+        async def claim(limit):
+            global domains_waiting
+            nonlocal claims
+            claims += 1
+            if claims % STREAM_VOCAB_CHECK_EVERY == 0:
+                # A long stream picks up an edited vocabulary.txt without waiting for the queue to drain
+                reload_vocabulary()
+            domains = await asyncio.to_thread(get_pending_domains, limit, worker_id)
+            domains_waiting += len(domains)
+            keeper.hold(claimed_rows(domains))
+            # Claimed domains wait in the queue; resolve them meanwhile
+            prefetch = dns_prefilter.start_prefetch(domains)
+            prefetches.add(prefetch)
+            prefetch.add_done_callback(prefetches.discard)
+            return domains
+        
+        async def crawl(domain):
+            global domains_waiting
+            domains_waiting -= 1
+            try:
+                await crawl_tracked(domain, session, sink)
+            finally:
+                for key in claimed_rows([domain]):
+                    keeper.release(key)
+                performance_stats['domains_processed'] += 1
+                if performance_stats['domains_processed'] % STREAM_LOG_EVERY == 0:
+                    elapsed = (datetime.now() - stream_start).total_seconds()
+                    log(f"🚀 {performance_stats['domains_processed']} domains | "
+                        f"{performance_stats['domains_processed'] / elapsed * 60:.1f} domains/minute")
         
-        domains = [row['domain'] for row in response.data if row.get('domain')]
+        pipeline = DomainPipeline(
+            claim, crawl,
+            concurrency=CONCURRENT_DOMAINS,
+            prefetch=STREAM_PREFETCH,
+            claim_size=STREAM_CLAIM_SIZE,
+            log=log
+        )
+        try:
+            await pipeline.run()
+        finally:
+            domains_waiting = 0  # claimed domains a failed run never started
+        await asyncio.gather(*prefetches)
+    
+    log_db_stats(sink)
+
+def save_domain_results(rows):
+    """Bulk-update the claimed rows with their results (blocking - called from the result sink)"""
+    # Results are keyed by cleaned name; the table rows by whatever they were claimed as
+    claim_store.save_results([{**row, 'domain': key} for row in rows for key in claimed_rows([row['domain']])])
+    for row in rows:
+        claimed_keys.pop(row['domain'], None)
+
+def save_reextracted_results(rows):
+    """Bulk-update rows with re-extracted results, except rows a crawler holds under a live lease (blocking)"""
+    updated = claim_store.save_results(rows, skip_leased=True)
+    performance_stats['rows_leased'] += len(rows) - updated
+
+def claimed_rows(domains):
+    """Table keys the cleaned domain names were claimed as (a name merged from several rows has several)"""
+    return [key for domain in domains for key in claimed_keys.get(domain, [domain])]
+
+def get_pending_domains(limit=500, worker_id=None):
+    """Claim a batch of domains that need scraping for this worker"""
+    try:
+        # Atomically marks pending/NULL rows (and rows with an expired lease)
+        # as in_progress for this worker, so parallel workers never overlap
+        stale_before = None
+        if RECRAWL_AFTER_DAYS is not None:
+            stale_before = (datetime.now() - timedelta(days=RECRAWL_AFTER_DAYS)).isoformat()
+        domains = claim_store.claim(worker_id or WORKER_ID, limit, LEASE_SECONDS, stale_before)
         
         # Clean and deduplicate
         cleaned = []
         seen = set()
+        clean_names = {}
         for d in domains:
             if not d or not d.strip():
                 continue
             clean = d.strip().lower()
             clean = clean.replace('https://', '').replace('http://', '').replace('www.', '').split('/')[0]
+            clean_names[d] = clean
+            keys = claimed_keys.setdefault(clean, [])
+            if d not in keys:
+                keys.append(d)
             if clean not in seen:
                 seen.add(clean)
                 cleaned.append(clean)
         
+        if stale_before:
+            # Validators and analysis of each page from the last crawl
+            for d, pages in claim_store.page_history(list(clean_names)).items():
+                previous_crawls[clean_names[d]] = pages
+        
         return cleaned
     except Exception as e:
-        log(f"❌ Error fetching domains: {str(e)}")
+        log(f"❌ Error claiming domains: {str(e)}")
+        log("   (Are the claim_scrape_batch / renew_scrape_leases functions installed? See README)")
         return []
 
 async def main():
     """Main entry point"""
+    global MAX_PAGE_BYTES, RECRAWL_AFTER_DAYS, SATURATION_PATIENCE, SATURATION_TARGET, SITEMAP_DISCOVERY, HTTP2, page_store, host_cache
     parser = argparse.ArgumentParser(description='Domain Website Scraper for Manufacturing Keywords')
     parser.add_argument('--continuous', action='store_true', help='Run continuously, checking for new domains daily')
     parser.add_argument('--batch-size', type=int, default=500, help='Number of domains per batch (default: 500)')
     parser.add_argument('--check-interval', type=int, default=24, help='Hours between checks in continuous mode (default: 24)')
+    parser.add_argument('--stream', action='store_true', help='Stream domains through the crawlers instead of fixed batches')
+    parser.add_argument('--recrawl-days', type=float, default=None, help='Also re-crawl domains last scraped more than this many days ago')
+    parser.add_argument('--max-page-kb', type=int, default=MAX_PAGE_BYTES // 1024, help=f'Stop reading a page after this many KB (default: {MAX_PAGE_BYTES // 1024})')
+    parser.add_argument('--page-store', metavar='DIR', help='Keep a compressed copy of every fetched page in DIR')
+    parser.add_argument('--reextract', action='store_true', help='Re-run keyword detection over the pages in --page-store and save the results (no network)')
+    parser.add_argument('--saturation-patience', type=int, default=SATURATION_PATIENCE, help=f'Stop a domain after this many pages in a row add no new indicator, 0 = never (default: {SATURATION_PATIENCE})')
+    parser.add_argument('--saturation-target', type=int, default=None, help='Stop a domain once this many distinct indicators are found')
+    parser.add_argument('--no-sitemaps', action='store_true', help='Only crawl the links found on the homepage (skip robots.txt and sitemaps)')
+    parser.add_argument('--host-cache', metavar='FILE', help='Keep the canonical-host cache in FILE, so aliases of sites crawled by earlier runs are copied too')
+    parser.add_argument('--host-cache-days', type=float, default=HOST_CACHE_DAYS, help=f'Copy the result of a site crawled within this many days to domains redirecting to it, 0 = never (default: {HOST_CACHE_DAYS})')
+    parser.add_argument('--http2', action='store_true', help="Use HTTP/2 with servers that offer it (needs the h2 package: pip install 'httpx[http2]')")
+    parser.add_argument('--workers', type=int, default=1, help='Processes for page parsing/matching (default: 1 = on the event loop)')
+    parser.add_argument('--worker-id', default=WORKER_ID, help='Id this worker claims domains under (default: host-pid-random)')
+    parser.add_argument('--metrics-port', type=int, help='Serve Prometheus metrics on localhost:PORT/metrics')
+    parser.add_argument('--metrics-log', metavar='FILE', help='Append one JSON line of timings per finished domain to FILE')
+    parser.add_argument('--profile', metavar='PREFIX', help='Profile the run: writes PREFIX.pstats and PREFIX.collapsed (flamegraph stacks)')
+    parser.add_argument('--profile-domains', type=int, metavar='N', help='With --profile, only profile the first N domains')
     args = parser.parse_args()
+    if args.reextract and not args.page_store:
+        parser.error('--reextract needs --page-store DIR')
+    if args.profile_domains and not args.profile:
+        parser.error('--profile-domains needs --profile PREFIX')
+    if args.http2:
+        try:
+            import h2  # noqa: F401 - fail on the command line, not when the crawl's client is built
+        except ImportError:
+            parser.error("--http2 needs the h2 package: pip install 'httpx[http2]'")
     
     log("🚀 DOMAIN WEBSITE SCRAPER v1.0")
     log(f"📅 Started at {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
     log(f"🗄️  Table: {TABLE_NAME}")
+    log(f"👷 Worker: {args.worker_id}")
     log(f"📦 Batch size: {args.batch_size}")
-    log(f"🔄 Mode: {'Continuous' if args.continuous else 'Single run'}")
+    log(f"🔄 Mode: {'Continuous' if args.continuous else 'Single run'}{' (streaming)' if args.stream else ''}")
+    log(f"🧠 Analysis workers: {args.workers}")
+    log(f"🔌 HTTP: {'HTTP/2 where offered, else HTTP/1.1' if args.http2 else 'HTTP/1.1'} | "
+        f"{MAX_PAGES_IN_FLIGHT} connections per host")
+    log(f"📚 Vocabulary: version {VOCABULARY.version} | {len(MANUFACTURING_TERMS)} terms, "
+        f"{len(BRANDS)} brands, {len(PLASTICS)} plastics, {len(METALS)} metals")
     log("")
     
     performance_stats['start_time'] = datetime.now()
     
+    MAX_PAGE_BYTES = args.max_page_kb * 1024
+    RECRAWL_AFTER_DAYS = args.recrawl_days
+    SATURATION_PATIENCE = args.saturation_patience
+    SATURATION_TARGET = args.saturation_target
+    SITEMAP_DISCOVERY = not args.no_sitemaps
+    HTTP2 = args.http2
+    host_cache = HostCache(args.host_cache, ttl=args.host_cache_days * 86400)
+    if args.host_cache:
+        log(f"🔗 Host cache: {args.host_cache} ({host_cache.stats()['hosts']} sites)")
+    if args.page_store:
+        page_store = PageStore(args.page_store)
+        log(f"🗃️  Page store: {args.page_store} ({len(page_store.index)} pages)")
+    
+    global analysis_pool, analysis_workers
+    analysis_workers = args.workers
+    if args.workers > 1:
+        analysis_pool = make_analysis_pool(args.workers)
+    
+    if args.metrics_port is not None or args.metrics_log:
+        register_metrics()
+    if args.metrics_port is not None:
+        port = metrics.serve(args.metrics_port)
+        log(f"📈 Metrics: http://127.0.0.1:{port}/metrics")
+    if args.metrics_log:
+        metrics.open_log(args.metrics_log)
+        log(f"📈 Per-domain timings: {args.metrics_log}")
+    
+    global profiler
+    if args.profile:
+        profiler = CrawlProfiler(args.profile, domains=args.profile_domains, log=log)
+        scope = f"first {args.profile_domains} domains" if args.profile_domains else "whole run"
+        log(f"🔬 Profiling the {scope} -> {args.profile}.pstats / .collapsed")
+        profiler.start()
+    
+    try:
+        if args.reextract:
+            await reextract_stored_pages()
+        else:
+            await run_batches(args)
+    finally:
+        if profiler is not None:
+            profiler.stop()
+        if analysis_pool is not None:
+            analysis_pool.shutdown(cancel_futures=True)
+            analysis_pool = None
+        if page_store is not None:
+            page_store.close()
+        host_cache.close()
+        metrics.close()
+
+def register_metrics():
+    """Expose performance_stats and the crawl's gauges on the metrics endpoint"""
+    for key, value in performance_stats.items():
+        if isinstance(value, (int, float)):
+            metrics.counter(f'{key}_total', f"performance_stats['{key}']", lambda key=key: performance_stats[key])
+    metrics.gauge('domains_in_flight', 'Domains being crawled', lambda: metrics.in_flight)
+    metrics.gauge('domains_waiting', 'Claimed domains waiting for a crawler slot', lambda: domains_waiting)
+    metrics.gauge('domain_slots', 'Crawler slots (domains crawled at once)', lambda: CONCURRENT_DOMAINS)
+    metrics.gauge('domain_slot_occupancy', 'Share of crawler slots in use',
+                  lambda: metrics.in_flight / CONCURRENT_DOMAINS)
+    metrics.counter('rate_limited_total', 'Times a host got a lower request rate after a 429',
+                    lambda: host_limiter.throttled)
+
+def vocabulary_stamp():
+    """Short id of the vocabulary in use, stored with each page's findings"""
+    return VOCABULARY.digest[:16]
+
+def make_analysis_pool(workers):
+    """Process pool for --workers; each process loads the compiled matcher when it starts"""
+    # spawn, not fork: the event loop already has threads (result sink writes, lease renewals)
+    return ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context('spawn')
+    )
+
+def reload_vocabulary():
+    """Switch to the vocabulary file's current terms if it changed; True if it did"""
+    global VOCABULARY, MATCHER, MANUFACTURING_TERMS, BRANDS, PLASTICS, METALS, analysis_pool
+    try:
+        reloaded = vocabulary_watcher.check()
+    except Exception as e:
+        log(f"⚠️ Vocabulary reload failed, keeping version {VOCABULARY.version}: {str(e)}")
+        return False
+    if reloaded is None:
+        return False
+    
+    VOCABULARY, MATCHER = reloaded
+    MANUFACTURING_TERMS = VOCABULARY.keywords
+    BRANDS = VOCABULARY.brands
+    PLASTICS = VOCABULARY.plastics
+    METALS = VOCABULARY.metals
+    log(f"📚 Vocabulary reloaded: version {VOCABULARY.version} | {len(MANUFACTURING_TERMS)} terms, "
+        f"{len(BRANDS)} brands, {len(PLASTICS)} plastics, {len(METALS)} metals")
+    
+    if analysis_pool is not None:
+        # Pool processes compiled their matcher when they started: replace them
+        # (analyses already submitted, e.g. mid-stream, finish in the old ones)
+        analysis_pool.shutdown(wait=False)
+        analysis_pool = make_analysis_pool(analysis_workers)
+    return True
+
+def log_recrawl_stats():
+    """Pages whose previous analysis was reused during a re-crawl"""
+    reused = performance_stats['pages_not_modified'] + performance_stats['pages_unchanged']
+    if reused:
+        log(f"♻️ Re-crawl: {performance_stats['pages_not_modified']} pages not modified (304), "
+            f"{performance_stats['pages_unchanged']} unchanged (same hash) - analysis reused")
+
+def log_saturation_stats():
+    """Domains stopped early by the adaptive depth policy, and the findings it kept on audited domains"""
+    if performance_stats['domains_saturated']:
+        log(f"🎯 Saturation: {performance_stats['domains_saturated']} domains stopped early, "
+            f"{performance_stats['pages_saved']} page fetches saved")
+    if performance_stats['saturation_audits'] and performance_stats['audit_found_total']:
+        kept = performance_stats['audit_found_at_stop'] / performance_stats['audit_found_total']
+        pages = performance_stats['audit_pages_at_stop'] / performance_stats['audit_pages_total']
+        log(f"🎯 Audit ({performance_stats['saturation_audits']} domains crawled in full): "
+            f"stopping early keeps {kept:.1%} of indicators with {pages:.0%} of the pages")
+
+def log_dns_stats():
+    """DNS prefilter lookups, cache hits and domains without a record"""
+    dns = dns_prefilter.stats()
+    log(f"🌐 DNS: {dns['lookups']} lookups, {dns['cache_hits']} cache hits, "
+        f"{dns['not_found']} not found, {dns['errors']} errors | {dns['cached']} cached")
+
+def log_sitemap_stats():
+    """Sites whose robots.txt / sitemaps were read and the pages they added"""
+    sitemaps = sitemap_discovery.stats()
+    if sitemaps['sites']:
+        log(f"🗺️ Sitemaps: {sitemaps['sites']} sites, {sitemaps['sitemaps_read']} sitemaps read, "
+            f"{sitemaps['urls_found']} pages found, {sitemaps['cache_hits']} cache hits | "
+            f"{performance_stats['pages_disallowed']} links disallowed by robots.txt")
+
+def log_alias_stats():
+    """Domains that redirected to an already crawled site and got its result"""
+    if performance_stats['alias_copies']:
+        aliases = host_cache.stats()
+        log(f"🔗 Aliases: {performance_stats['alias_copies']} domains copied the result of the site "
+            f"they redirect to ({aliases['waits']} waited for its crawl) | {aliases['hosts']} sites cached")
+
+def log_analysis_stats():
+    """Pages analyzed and CPU per page, summed over all analysis workers"""
+    pages = performance_stats['pages_analyzed']
+    if pages:
+        cpu_ms = performance_stats['analysis_cpu_seconds'] / pages * 1000
+        log(f"🧠 Analyzed: {pages} pages | {cpu_ms:.1f}ms CPU/page | "
+            f"{performance_stats['analysis_cpu_seconds']:.1f}s CPU total")
+    log(f"📥 Downloaded: {performance_stats['bytes_downloaded'] / 2**20:.1f} MB | "
+        f"{performance_stats['pages_truncated']} pages cut at {MAX_PAGE_BYTES // 1024} KB | "
+        f"{performance_stats['pages_skipped']} non-HTML skipped | "
+        f"{performance_stats['page_retries']} retries, {host_limiter.throttled} rate-limited")
+
+async def run_batches(args):
+    """Claim and process batches until no pending domains are left (forever with --continuous)"""
+    
     while True:
         batch_num = 1
         
-        while True:
+        while not args.stream:
+            reload_vocabulary()
             batch_start = datetime.now()
             
             log(f"\n{'='*60}")
@@ -925,7 +1199,7 @@ async def main():
             
             # Fetch pending domains
             log("📡 Fetching pending domains from Supabase...")
-            domains = get_pending_domains(args.batch_size)
+            domains = get_pending_domains(args.batch_size, args.worker_id)
             
             if not domains:
                 log("\n🎉 ALL DOMAINS PROCESSED!")
@@ -934,7 +1208,9 @@ async def main():
             log(f"📊 Found {len(domains)} domains to process\n")
             
             # Process batch
-            await process_batch(domains, args.batch_size)
+            # Keep our leases alive until every result of the batch is saved
+            async with LeaseKeeper(claim_store, args.worker_id, claimed_rows(domains), LEASE_SECONDS, log=log):
+                await process_batch(domains, args.batch_size)
             
             # Batch stats
             batch_time = (datetime.now() - batch_start).total_seconds()
@@ -950,7 +1226,15 @@ async def main():
             log(f"📊 Processed: {performance_stats['domains_processed']} total")
             log(f"✅ With keywords: {performance_stats['successes']}")
             log(f"📭 No keywords: {performance_stats['no_keywords']}")
+            log(f"🚫 No DNS record: {performance_stats['no_dns']}")
             log(f"❌ Failures: {performance_stats['failures']}")
+            log(f"💾 DB write failures: {performance_stats['db_write_failures']}")
+            log_analysis_stats()
+            log_saturation_stats()
+            log_sitemap_stats()
+            log_alias_stats()
+            log_dns_stats()
+            log_recrawl_stats()
             
             batch_num += 1
             
@@ -958,6 +1242,11 @@ async def main():
             log(f"\n⏸️  Cooldown: 5 seconds before next batch...")
             await asyncio.sleep(5)
         
+        if args.stream:
+            reload_vocabulary()
+            await process_stream(args.worker_id)
+            log("\n🎉 ALL DOMAINS PROCESSED!")
+        
         # If not continuous mode, exit after processing all domains
         if not args.continuous:
             break
@@ -976,9 +1265,16 @@ async def main():
     log(f"📊 Total domains: {performance_stats['domains_processed']}")
     log(f"✅ With keywords: {performance_stats['successes']}")
     log(f"📭 No keywords: {performance_stats['no_keywords']}")
+    log(f"🚫 No DNS record: {performance_stats['no_dns']}")
     log(f"❌ Failures: {performance_stats['failures']}")
     if total_time > 0:
         log(f"🚀 Average speed: {(performance_stats['domains_processed']/total_time)*60:.1f} domains/minute")
+    log_analysis_stats()
+    log_saturation_stats()
+    log_sitemap_stats()
+    log_alias_stats()
+    log_dns_stats()
+    log_recrawl_stats()
 
 if __name__ == "__main__":
     asyncio.run(main())
@@ -0,0 +1,139 @@
+"""
+Single-pass vocabulary matcher for manufacturing keyword detection
+Compiles the keyword, brand, plastic and metal lists once into lookup tables,
+so each page is tokenized once instead of being scanned once per term.
+
+Matching rules (same as the original per-term loops):
+    keywords                 plain substring match on the lowercased text
+    brands, plastics, metals whole-word match (\\b...\\b), case-insensitive
+
+How a page is matched:
+    1. One C-level pass collects the distinct word runs (\\w+) of the text.
+    2. A single-word term is a substring of the text exactly when it is a
+       substring of one of those runs, so single-word keywords are looked up
+       in the (much shorter) joined runs, and single-word brands/plastics/metals
+       are a set intersection with the runs.
+    3. Multi-word terms are only searched for in the full text when all of
+       their words are present, and whole-word boundaries are checked per hit.
+"""
+
+import re
+
+# Categories matched as plain substrings vs. whole words
+SUBSTRING_CATEGORIES = ('keywords',)
+WORD_CATEGORIES = ('brands', 'plastics', 'metals')
+
+_WORD_RUN = re.compile(r'\w+')
+
+# Joins the distinct word runs; not a word character, so no term can span two runs
+_RUN_SEPARATOR = '\x00'
+
+# Non-ASCII characters that re.IGNORECASE treats as equal to an ASCII letter
+# (dotted/dotless i, long s, Kelvin sign). Pages containing them fall back to
+# per-term regexes so the whole-word rule stays exactly like re.
+_CASE_FOLD_EXCEPTIONS = 'İıſK'
+
+
+def _is_word_char(ch):
+    """Same definition of a word character as the re module's \\w"""
+    return ch.isalnum() or ch == '_'
+
+
+def _at_boundary(text, pos):
+    """re's \\b: a word character on exactly one side of pos"""
+    before = pos > 0 and _is_word_char(text[pos - 1])
+    after = pos < len(text) and _is_word_char(text[pos])
+    return before != after
+
+
+def _is_single_run(term):
+    return _WORD_RUN.fullmatch(term) is not None
+
+
+class KeywordMatcher:
+    """Finds every vocabulary term in a page with one tokenizing pass"""
+
+    def __init__(self, keywords, brands, plastics, metals):
+        self.categories = SUBSTRING_CATEGORIES + WORD_CATEGORIES
+
+        # Substring rule
+        self._single_substrings = []
+        self._multi_substrings = []
+        for term in dict.fromkeys(keywords):
+            if _is_single_run(term):
+                self._single_substrings.append(term)
+            else:
+                self._multi_substrings.append((term, _WORD_RUN.findall(term)))
+
+        # Whole-word rule, keyed on the lowercased term / its first word run
+        self._word_entries = (
+            [('brands', t) for t in brands] +
+            [('plastics', t) for t in plastics] +
+            [('metals', t) for t in metals]
+        )
+        self._word_patterns = None
+        self._single_words = {}
+        self._multi_words = {}
+        self._unanchored_words = []
+        for category, term in self._word_entries:
+            folded = term.lower()
+            if _is_single_run(folded):
+                self._single_words.setdefault(folded, []).append((category, term))
+            elif _WORD_RUN.match(folded):
+                first_run = _WORD_RUN.match(folded).group()
+                self._multi_words.setdefault(first_run, []).append((category, term, folded))
+            else:
+                # Starts with a non-word character: no run to anchor on
+                self._unanchored_words.append((category, term, folded))
+
+    def match(self, text):
+        """Return the keywords/brands/plastics/metals sets found in (lowercased) text"""
+        found = {category: set() for category in self.categories}
+        runs = set(_WORD_RUN.findall(text))
+        self._match_substrings(text, runs, found)
+        if any(ch in text for ch in _CASE_FOLD_EXCEPTIONS):
+            self._match_words_slow(text, found)
+        else:
+            self._match_words(text, runs, found)
+        return found
+
+    def _match_substrings(self, text, runs, found):
+        joined_runs = _RUN_SEPARATOR.join(runs)
+        keywords = found['keywords']
+        for term in self._single_substrings:
+            if term in joined_runs:
+                keywords.add(term)
+        for term, words in self._multi_substrings:
+            # Every word of the term must at least occur inside some run
+            if all(word in joined_runs for word in words) and term in text:
+                keywords.add(term)
+
+    def _match_words(self, text, runs, found):
+        for run in runs & self._single_words.keys():
+            for category, term in self._single_words[run]:
+                found[category].add(term)
+
+        candidates = [entry for run in runs & self._multi_words.keys() for entry in self._multi_words[run]]
+        for category, term, folded in candidates + self._unanchored_words:
+            if term not in found[category] and self._has_whole_word(text, folded):
+                found[category].add(term)
+
+    @staticmethod
+    def _has_whole_word(text, term):
+        pos = text.find(term)
+        while pos != -1:
+            if _at_boundary(text, pos) and _at_boundary(text, pos + len(term)):
+                return True
+            pos = text.find(term, pos + 1)
+        return False
+
+    def _match_words_slow(self, text, found):
+        """Per-term regexes, for text with characters that fold differently under re"""
+        if self._word_patterns is None:
+            self._word_patterns = [
+                (category, term, re.compile(r'\b' + re.escape(term) + r'\b', re.IGNORECASE))
+                for category, term in self._word_entries
+            ]
+        for category, term, pattern in self._word_patterns:
+            if pattern.search(text):
+                found[category].add(term)
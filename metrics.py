@@ -0,0 +1,270 @@
+"""
+Live metrics for a running crawl
+Latency histograms (fetch phases, page analysis, database writes, whole
+domains), gauges for in-flight domains and crawler-slot occupancy, the
+crawler's own counters and process RSS/CPU (psutil), served in the Prometheus
+text format on a local HTTP endpoint (--metrics-port):
+
+    curl -s localhost:9108/metrics
+
+With --metrics-log FILE every finished domain also gets one JSON line with
+its status, page count, bytes and the time it spent in each phase, so a slow
+batch can be traced to the domains (and phases) that made it slow.
+
+Fetch phases come from httpcore's request trace: connect (TCP + TLS, which
+includes name resolution for a new connection), ttfb (request sent to
+response headers) and body (reading the body). dns is the time a domain
+waited on the DNS prefilter.
+"""
+
+import contextvars
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import psutil
+
+PREFIX = 'scraper'
+
+# Seconds; fine at the low end for parse/match, up to the 60s domain budget
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+HELP = {
+    'fetch_seconds': 'HTTP fetch time by phase (dns, connect, ttfb, body)',
+    'analysis_seconds': 'CPU time per page by analysis step (parse, match)',
+    'db_write_seconds': 'Latency of one bulk write to the database',
+    'domain_seconds': 'Wall time of one domain crawl',
+}
+
+# The domain record of the crawl running in this task (None outside a crawl)
+_current_domain = contextvars.ContextVar('current_domain', default=None)
+
+
+class Histogram:
+    """Cumulative-bucket latency histogram (Prometheus semantics)"""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        with self._lock:
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    self.counts[i] += 1
+                    break
+            self.sum += value
+            self.count += 1
+
+    def snapshot(self):
+        """(cumulative bucket counts, sum, count)"""
+        with self._lock:
+            cumulative = []
+            total = 0
+            for n in self.counts:
+                total += n
+                cumulative.append(total)
+            return cumulative, self.sum, self.count
+
+
+class RequestTrace:
+    """httpcore trace callback of one request; records its connect and TTFB times"""
+
+    def __init__(self, metrics):
+        self.metrics = metrics
+        self.started = {}
+
+    async def __call__(self, event, info):
+        now = time.perf_counter()
+        step, _, state = event.rpartition('.')
+        if state == 'started':
+            self.started[step] = now
+            return
+        start = self.started.pop(step, None)
+        if start is None:
+            return
+        if step.endswith(('connect_tcp', 'start_tls')):
+            self.metrics.observe('fetch_seconds', now - start, phase='connect')
+        elif step.endswith('send_request_headers'):
+            self.started['ttfb'] = start
+        elif step.endswith('receive_response_headers') and state == 'complete':
+            ttfb_start = self.started.pop('ttfb', start)
+            self.metrics.observe('fetch_seconds', now - ttfb_start, phase='ttfb')
+
+
+class Metrics:
+    """Histograms, gauges and counter sources, plus the per-domain records"""
+
+    def __init__(self):
+        self.enabled = False  # request tracing and per-domain records are only on when something reads them
+        self.histograms = {}  # (name, labels) -> Histogram
+        self.gauges = {}  # name -> (help, callable)
+        self.counters = {}  # name -> (help, callable)
+        self.in_flight = 0
+        self.log_file = None
+        self.process = psutil.Process()
+        self.process.cpu_percent(None)  # first call only starts the measurement
+        self._server = None
+
+    # ------------------------------------------------------------- recording
+
+    def observe(self, name, value, **labels):
+        """Add a latency to a histogram (and to the current domain's phase totals)"""
+        key = (name, tuple(sorted(labels.items())))
+        histogram = self.histograms.get(key)
+        if histogram is None:
+            histogram = self.histograms.setdefault(key, Histogram())
+        histogram.observe(value)
+
+        record = _current_domain.get()
+        if record is not None:
+            field = '_'.join(labels.values()) or name
+            record['seconds'][field] = record['seconds'].get(field, 0.0) + value
+
+    def add(self, field, value):
+        """Add to a field of the current domain's record (e.g. bytes downloaded)"""
+        record = _current_domain.get()
+        if record is not None:
+            record[field] = record.get(field, 0) + value
+
+    def trace(self):
+        """Request extensions that time connect/TTFB, or None when metrics are off"""
+        return {'trace': RequestTrace(self)} if self.enabled else None
+
+    @contextmanager
+    def track_domain(self, domain):
+        """Count a domain as in flight and record it while its crawl runs in this task"""
+        record = {'domain': domain, 'seconds': {}}
+        token = _current_domain.set(record if self.enabled else None)
+        self.in_flight += 1
+        start = time.perf_counter()
+        try:
+            yield record
+        finally:
+            elapsed = time.perf_counter() - start
+            self.in_flight -= 1
+            _current_domain.reset(token)
+            self.observe('domain_seconds', elapsed)
+            if self.log_file is not None:
+                record['total_seconds'] = round(elapsed, 3)
+                record['seconds'] = {phase: round(s, 4) for phase, s in record['seconds'].items()}
+                record['finished_at'] = time.time()
+                self.log_file.write(json.dumps(record) + '\n')
+                self.log_file.flush()
+
+    def gauge(self, name, help_text, read):
+        """Register a gauge read at scrape time"""
+        self.gauges[name] = (help_text, read)
+
+    def counter(self, name, help_text, read):
+        """Register a counter read at scrape time"""
+        self.counters[name] = (help_text, read)
+
+    # ------------------------------------------------------------- exporting
+
+    def process_stats(self):
+        """RSS and CPU of this process and of its children (the analysis pool)"""
+        with self.process.oneshot():
+            rss = self.process.memory_info().rss
+            cpu = self.process.cpu_times()
+            cpu_percent = self.process.cpu_percent(None)
+            threads = self.process.num_threads()
+        children_rss = 0
+        children_cpu = 0.0
+        for child in self.process.children(recursive=True):
+            try:
+                children_rss += child.memory_info().rss
+                times = child.cpu_times()
+                children_cpu += times.user + times.system
+            except psutil.Error:
+                continue  # exited meanwhile
+        return {
+            'process_resident_memory_bytes': ('gauge', 'Resident memory of the crawler process', rss),
+            'process_cpu_seconds_total': ('counter', 'User + system CPU of the crawler process', cpu.user + cpu.system),
+            'process_cpu_percent': ('gauge', 'CPU use since the previous scrape (100 = one core)', cpu_percent),
+            'process_threads': ('gauge', 'Threads of the crawler process', threads),
+            'children_resident_memory_bytes': ('gauge', 'Resident memory of child processes', children_rss),
+            'children_cpu_seconds_total': ('counter', 'User + system CPU of child processes', children_cpu),
+        }
+
+    def render(self):
+        """All metrics in the Prometheus text exposition format"""
+        lines = []
+
+        def sample(name, kind, help_text, value):
+            lines.append(f'# HELP {PREFIX}_{name} {help_text}')
+            lines.append(f'# TYPE {PREFIX}_{name} {kind}')
+            lines.append(f'{PREFIX}_{name} {value}')
+
+        for name, (help_text, read) in sorted(self.counters.items()):
+            sample(name, 'counter', help_text, read())
+        for name, (help_text, read) in sorted(self.gauges.items()):
+            sample(name, 'gauge', help_text, read())
+        for name, (kind, help_text, value) in self.process_stats().items():
+            sample(name, kind, help_text, value)
+
+        families = {}
+        for (name, labels), histogram in sorted(self.histograms.items()):
+            families.setdefault(name, []).append((labels, histogram))
+        for name, series in families.items():
+            full = f'{PREFIX}_{name}'
+            lines.append(f'# HELP {full} {HELP.get(name, name)}')
+            lines.append(f'# TYPE {full} histogram')
+            for labels, histogram in series:
+                cumulative, total, count = histogram.snapshot()
+                pairs = [f'{key}="{value}"' for key, value in labels]
+                for bound, n in zip(histogram.buckets + ('+Inf',), cumulative + [count]):
+                    bucket_labels = ','.join(pairs + [f'le="{bound}"'])
+                    lines.append(f'{full}_bucket{{{bucket_labels}}} {n}')
+                label_text = '{' + ','.join(pairs) + '}' if pairs else ''
+                lines.append(f'{full}_sum{label_text} {total}')
+                lines.append(f'{full}_count{label_text} {count}')
+        return '\n'.join(lines) + '\n'
+
+    def serve(self, port, host='127.0.0.1'):
+        """Serve /metrics from a background thread (keeps answering while the event loop is busy)"""
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] != '/metrics':
+                    self.send_error(404)
+                    return
+                body = metrics.render().encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass  # no access log in the crawler output
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        self.enabled = True
+        return self._server.server_address[1]
+
+    def open_log(self, path):
+        """Append one JSON line per finished domain to path"""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.log_file = open(path, 'a', encoding='utf-8')
+        self.enabled = True
+
+    def close(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+        if self.log_file is not None:
+            self.log_file.close()
+            self.log_file = None
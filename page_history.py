@@ -0,0 +1,55 @@
+"""
+Per-page history for incremental re-crawls
+Every crawl stores, per page URL, the response validators (ETag,
+Last-Modified), a hash of the body and the page's indicators and links (only
+as many as a crawl follows) in the domain's website_pages column. A re-crawl
+sends the validators as a conditional request; a 304, or a body with the
+same hash, reuses the stored analysis instead of parsing and matching the
+page again. Entries are stamped
+with the vocabulary they were matched with, and only reused under the same one.
+"""
+
+import hashlib
+
+
+def body_hash(html):
+    """Short digest of a page body"""
+    return hashlib.blake2b(html.encode('utf-8', 'surrogatepass'), digest_size=16).hexdigest()
+
+
+def conditional_headers(record):
+    """If-None-Match / If-Modified-Since from a page's stored validators"""
+    headers = {}
+    if record:
+        if record.get('etag'):
+            headers['If-None-Match'] = record['etag']
+        if record.get('last_modified'):
+            headers['If-Modified-Since'] = record['last_modified']
+    return headers
+
+
+def page_record(page, max_links=None):
+    """JSON-ready history entry for a page result (keeping only the first max_links of its ranked links)"""
+    record = {
+        'indicators': {category: sorted(found) for category, found in page['indicators'].items() if found},
+    }
+    if page['links']:
+        record['links'] = page['links'][:max_links]
+    for key in ('etag', 'last_modified', 'hash', 'vocab'):
+        if page.get(key):
+            record[key] = page[key]
+    return record
+
+
+def page_from_record(url, record, categories):
+    """Page result rebuilt from a history entry (same shape as a freshly analyzed page)"""
+    stored = record.get('indicators', {})
+    return {
+        'url': url,
+        'indicators': {category: set(stored.get(category, ())) for category in categories},
+        'links': list(record.get('links', [])),
+        'etag': record.get('etag'),
+        'last_modified': record.get('last_modified'),
+        'hash': record.get('hash'),
+        'vocab': record.get('vocab'),
+    }
@@ -0,0 +1,84 @@
+"""
+lxml-based page parsing
+Each response is parsed into a single tree, which is then used for both the
+visible text (keyword matching) and the same-domain links (crawling).
+"""
+
+from urllib.parse import urlparse
+
+from lxml import etree
+
+from link_ranking import rank_links
+
+# Comments and processing instructions never reach the tree
+_HTML_PARSER = etree.HTMLParser(encoding='utf-8', remove_comments=True, remove_pis=True)
+
+# Elements whose content is never visible text
+NON_TEXT_TAGS = ('script', 'style')
+
+
+def parse_html(html):
+    """Parse an HTML string into an lxml tree (None for empty documents)"""
+    if not html or not html.strip():
+        return None
+    try:
+        # Fed as bytes so pages with an XML encoding declaration still parse
+        return etree.fromstring(html.encode('utf-8', 'replace'), _HTML_PARSER)
+    except (etree.ParserError, ValueError):
+        return None
+
+
+def strip_non_text(root):
+    """Remove script/style elements (keeping their tail text) from the tree"""
+    etree.strip_elements(root, *NON_TEXT_TAGS, with_tail=False)
+
+
+def tree_text(root):
+    """All text left in the tree"""
+    return ''.join(root.itertext())
+
+
+def visible_text(root):
+    """All text in the tree except script/style content (strips those elements)"""
+    if root is None:
+        return ''
+    strip_non_text(root)
+    return tree_text(root)
+
+
+def internal_links(root, base_domain):
+    """Same-domain links from <a href> tags, normalized, deduplicated and best first (see link_ranking)"""
+    if root is None:
+        return []
+    return rank_links(_link_candidates(root, base_domain))
+
+
+def _link_candidates(root, base_domain):
+    """(url, anchor text) of each same-domain <a href>, in page order (lazily: rank_links stops early)"""
+    site = base_domain.replace('www.', '')
+
+    for a_tag in root.iter('a'):
+        href = a_tag.get('href')
+        if href is None:
+            continue
+        href = href.strip()
+
+        if not href or href.startswith(('#', 'javascript:', 'mailto:', 'tel:')):
+            continue
+
+        if href.startswith('/'):
+            url = f'https://{base_domain}{href}'
+        elif href.startswith('http'):
+            url = href
+        else:
+            continue
+
+        try:
+            parsed = urlparse(url)
+            link_domain = parsed.netloc.replace('www.', '')
+
+            if link_domain == site:
+                anchor = ' '.join(a_tag.itertext()) + ' ' + (a_tag.get('title') or '')
+                yield f"{parsed.scheme}://{parsed.netloc}{parsed.path}", anchor
+        except ValueError:
+            continue
@@ -0,0 +1,133 @@
+"""
+Per-domain page fetch scheduler
+Fetches a domain's internal pages with bounded parallelism and a minimum gap
+between request starts to the same host, while keeping the circuit breakers
+(consecutive failures, time budget). When a breaker trips, fetches still in
+flight are cancelled.
+
+A fetch may return RetryLater instead of a result: the URL goes back into the
+queue after a backoff (Retry-After when given), and its slot is used for other
+pages meanwhile. It only counts as a failure once its retries are used up.
+
+should_stop, when given, is checked after every completed fetch; returning
+True ends the run like a breaker (e.g. once pages stop adding findings).
+"""
+
+import asyncio
+import heapq
+from urllib.parse import urlparse
+
+from rate_limits import HostRateLimiter, RetryLater, backoff_delay
+
+# Why a run stopped early (None when every URL was attempted)
+STOP_FAILURES = 'failures'
+STOP_TIMEOUT = 'timeout'
+STOP_SATURATED = 'saturated'
+
+
+class PageScheduler:
+    """Runs fetch(url) for a list of URLs, a few at a time, politely"""
+
+    def __init__(self, fetch, max_in_flight=4, host_delay=0.25,
+                 max_consecutive_failures=3, time_budget=60.0,
+                 limiter=None, backoff_base=1.0, backoff_cap=60.0, should_stop=None):
+        self.fetch = fetch
+        self.max_in_flight = max_in_flight
+        self.max_consecutive_failures = max_consecutive_failures
+        self.time_budget = time_budget
+        # Shared limiter (adaptive, across domains), or plain pacing at one start per host_delay
+        self.limiter = limiter or HostRateLimiter(rate=1 / host_delay if host_delay else None)
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.should_stop = should_stop
+        self.attempts = {}  # url -> retries scheduled so far
+        self.retries = 0
+        self.skipped = 0  # URLs not fetched (or cancelled) because the run stopped early
+
+    async def _paced_fetch(self, url):
+        """Wait for this host's next free start slot, then fetch"""
+        await self.limiter.acquire(urlparse(url).netloc)
+        return await self.fetch(url)
+
+    def _schedule_retry(self, url, retry, delayed, now):
+        """Put url in the delayed queue; False when its retries are used up"""
+        attempt = self.attempts.get(url, 0)
+        host = urlparse(url).netloc
+        if retry.throttle:
+            self.limiter.throttle(host, retry.retry_after)
+        if attempt >= retry.max_retries:
+            return False
+        self.attempts[url] = attempt + 1
+        self.retries += 1
+        delay = backoff_delay(attempt, retry.retry_after, self.backoff_base, self.backoff_cap)
+        heapq.heappush(delayed, (now + delay, self.retries, url))
+        return True
+
+    async def run(self, urls):
+        """Fetch urls; returns (successful results in completion order, stop reason)"""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.time_budget
+        queue = list(urls)
+        delayed = []  # heap of (due time, sequence, url) for retries in backoff
+        in_flight = {}  # task -> url
+        results = []
+        consecutive_failures = 0
+        stop_reason = None
+
+        try:
+            while queue or in_flight or delayed:
+                now = loop.time()
+                remaining = deadline - now
+                if remaining <= 0:
+                    stop_reason = STOP_TIMEOUT
+                    break
+
+                while delayed and delayed[0][0] <= now:
+                    queue.append(heapq.heappop(delayed)[2])
+
+                while queue and len(in_flight) < self.max_in_flight:
+                    url = queue.pop(0)
+                    in_flight[asyncio.ensure_future(self._paced_fetch(url))] = url
+
+                if not in_flight:
+                    # Only retries in backoff are left: sleep until the first is due
+                    wait = delayed[0][0] - now
+                    if wait >= remaining:
+                        stop_reason = STOP_TIMEOUT
+                        break
+                    await asyncio.sleep(wait)
+                    continue
+
+                timeout = min(remaining, delayed[0][0] - now) if delayed else remaining
+                done, _ = await asyncio.wait(
+                    in_flight, timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+                )
+
+                for task in done:
+                    url = in_flight.pop(task)
+                    result = None if task.exception() else task.result()
+                    if isinstance(result, RetryLater):
+                        if self._schedule_retry(url, result, delayed, loop.time()):
+                            continue
+                        result = None
+                    if result:
+                        self.limiter.succeed(urlparse(url).netloc)
+                        results.append(result)
+                        consecutive_failures = 0
+                    else:
+                        consecutive_failures += 1
+
+                if consecutive_failures >= self.max_consecutive_failures:
+                    stop_reason = STOP_FAILURES
+                    break
+                if done and self.should_stop is not None and self.should_stop():
+                    stop_reason = STOP_SATURATED
+                    break
+        finally:
+            self.skipped = len(queue) + len(delayed) + len(in_flight)
+            for task in in_flight:
+                task.cancel()
+            if in_flight:
+                await asyncio.gather(*in_flight, return_exceptions=True)
+
+        return results, stop_reason
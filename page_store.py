@@ -0,0 +1,166 @@
+"""
+On-disk page store: compressed HTML of every fetched page, for re-extraction
+Bodies are zlib-compressed and appended to segment files; an append-only
+index (one JSON line per page) records where each body lives plus its URL,
+domain, fetch time and validators. A URL stored twice keeps its latest copy.
+At the end of each crawl put_crawl() adds one more index line for the
+domain: the table rows it was claimed as and the URLs of that crawl's pages
+(also the unchanged ones, which are not stored again), so re-extraction
+writes to the right rows and only uses the latest crawl's pages.
+
+Each PageStore instance writes its own segments and index (named after its
+start time and process), so several workers can share one directory. Opening
+a store reads every index in the directory.
+
+Nothing is ever rewritten in place; delete the directory to start over.
+"""
+
+import json
+import os
+import threading
+import time
+import uuid
+import zlib
+from pathlib import Path
+
+SEGMENT_SUFFIX = '.seg'
+INDEX_SUFFIX = '.idx'
+
+
+class PageStore:
+    """Append-only, compressed URL -> HTML store with an in-memory index"""
+
+    def __init__(self, directory, segment_max_bytes=256 * 1024 * 1024, level=1):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.segment_max_bytes = segment_max_bytes
+        self.level = level  # zlib level: 1 is fast and still ~5-8x on HTML
+        self.writer = f"{int(time.time())}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+        self._lock = threading.Lock()
+        self._segment_number = 0
+        self._segment = None
+        self._index_file = None
+
+        self.index = {}  # url -> index entry
+        self.crawls = {}  # domain -> latest crawl entry ({'crawl', 'keys', 'urls', 'fetched_at'})
+        self.stored_bytes = 0  # uncompressed bytes written by this instance
+        self.compressed_bytes = 0
+        self._load()
+
+    def _load(self):
+        """Read every index in the directory, oldest fetch first so the latest copy wins"""
+        entries = []
+        for path in self.directory.glob(f'*{INDEX_SUFFIX}'):
+            with open(path, encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        entries.append(json.loads(line))
+                    except ValueError:
+                        continue  # a line cut short by a crash
+        for entry in sorted(entries, key=lambda e: e['fetched_at']):
+            if 'crawl' in entry:
+                self.crawls[entry['crawl']] = entry
+            else:
+                self.index[entry['url']] = entry
+
+    def _open_segment(self):
+        self._segment_number += 1
+        name = f"{self.writer}-{self._segment_number:04d}{SEGMENT_SUFFIX}"
+        self._segment = open(self.directory / name, 'ab')
+        if self._index_file is None:
+            self._index_file = open(self.directory / f"{self.writer}{INDEX_SUFFIX}", 'a', encoding='utf-8')
+
+    def put(self, domain, url, html, homepage=False, etag=None, last_modified=None, digest=None):
+        """Append a page (blocking: call it off the event loop)"""
+        body = html.encode('utf-8', 'surrogatepass')
+        data = zlib.compress(body, self.level)
+        with self._lock:
+            if self._segment is None or self._segment.tell() >= self.segment_max_bytes:
+                if self._segment is not None:
+                    self._segment.close()
+                self._open_segment()
+            offset = self._segment.tell()
+            self._segment.write(data)
+            self._segment.flush()
+
+            entry = {
+                'url': url,
+                'domain': domain,
+                'segment': Path(self._segment.name).name,
+                'offset': offset,
+                'length': len(data),
+                'fetched_at': time.time(),
+            }
+            if homepage:
+                entry['homepage'] = True
+            if etag:
+                entry['etag'] = etag
+            if last_modified:
+                entry['last_modified'] = last_modified
+            if digest:
+                entry['hash'] = digest
+            # The index line goes last: a crash before it only leaves unreferenced bytes
+            self._index_file.write(json.dumps(entry) + '\n')
+            self._index_file.flush()
+            self.index[url] = entry
+            self.stored_bytes += len(body)
+            self.compressed_bytes += len(data)
+
+    def put_crawl(self, domain, keys, urls):
+        """Record a finished crawl of domain: its table row keys and its pages' URLs (blocking)"""
+        entry = {'crawl': domain, 'keys': list(keys), 'urls': list(urls), 'fetched_at': time.time()}
+        with self._lock:
+            if self._index_file is None:
+                self._index_file = open(self.directory / f"{self.writer}{INDEX_SUFFIX}", 'a', encoding='utf-8')
+            self._index_file.write(json.dumps(entry) + '\n')
+            self._index_file.flush()
+            self.crawls[domain] = entry
+
+    def read(self, entry):
+        """HTML of an index entry"""
+        with open(self.directory / entry['segment'], 'rb') as f:
+            f.seek(entry['offset'])
+            data = f.read(entry['length'])
+        return zlib.decompress(data).decode('utf-8', 'surrogatepass')
+
+    def get(self, url):
+        """Latest stored HTML of url, or None"""
+        entry = self.index.get(url)
+        return self.read(entry) if entry else None
+
+    def has(self, url, digest):
+        """True if the latest stored copy of url has this body hash"""
+        entry = self.index.get(url)
+        return entry is not None and entry.get('hash') == digest
+
+    def domains(self):
+        """{domain: (row keys, [index entries])} of the stored pages of each domain's latest crawl
+
+        Domains stored without a crawl record (an interrupted crawl, an older
+        store) get all their pages, under their own name.
+        """
+        by_domain = {}
+        for entry in self.index.values():
+            by_domain.setdefault(entry['domain'], []).append(entry)
+        result = {}
+        for domain, entries in by_domain.items():
+            crawl = self.crawls.get(domain)
+            if crawl is None:
+                result[domain] = ([domain], entries)
+            else:
+                urls = set(crawl['urls'])
+                result[domain] = (crawl['keys'], [entry for entry in entries if entry['url'] in urls])
+        return result
+
+    def close(self):
+        with self._lock:
+            for f in (self._segment, self._index_file):
+                if f is not None:
+                    f.close()
+            self._segment = self._index_file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
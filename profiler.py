@@ -0,0 +1,173 @@
+"""
+CPU profiling of a crawl (--profile)
+Two profilers run side by side while profiling is on:
+
+- cProfile, for exact per-function call counts and times: written as a
+  pstats file (python -m pstats FILE, or snakeviz / tuna)
+- a stack sampler: every few milliseconds it records the Python stack of
+  each busy thread, tagged with the pipeline stage it is in (fetch, dns,
+  parse, match, save, other, or idle for the event loop waiting on I/O).
+  Written as collapsed stacks, one "stage;frame;frame... count" line per
+  stack, ready for flamegraph.pl or speedscope
+
+The stage comes from the frames on the stack (the innermost frame that
+belongs to a stage wins), so nothing in the pipeline needs to be marked up.
+Pages analyzed in --workers processes are not sampled; profile with
+--workers 1 to see parse/match.
+
+Profiling covers the whole run, or only its first N domains
+(--profile-domains N).
+"""
+
+import cProfile
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+
+# (file name, function name) of frames that put a sample in a stage
+STAGE_FUNCTIONS = {
+    ('main.py', 'fetch_html'): 'fetch',
+    ('main.py', 'read_capped_body'): 'fetch',
+    ('main.py', 'match_text'): 'match',
+    ('main.py', 'save_domain_results'): 'save',
+}
+STAGE_FILES = {
+    'page_parser.py': 'parse',
+    'matcher.py': 'match',
+    'dns_prefilter.py': 'dns',
+    'result_sink.py': 'save',
+    'page_store.py': 'save',
+    # asyncio's socket/TLS transports: reading and writing the crawl's connections
+    'selector_events.py': 'fetch',
+    'sslproto.py': 'fetch',
+}
+STAGE_PACKAGES = {
+    'httpx': 'fetch', 'httpcore': 'fetch', 'h11': 'fetch', 'h2': 'fetch', 'anyio': 'fetch',
+    'postgrest': 'save', 'supabase': 'save',
+}
+# Leaf frames of a thread that is waiting, not working
+IDLE_FUNCTIONS = {
+    ('selectors.py', 'select'),
+    ('threading.py', 'wait'),
+    ('queue.py', 'get'),
+    ('thread.py', '_worker'),
+    ('socketserver.py', 'serve_forever'),
+}
+
+
+def frame_label(code):
+    return f"{os.path.basename(code.co_filename)}:{code.co_qualname}"
+
+
+def frame_stage(code):
+    """Stage a single frame belongs to, or None"""
+    filename = os.path.basename(code.co_filename)
+    stage = STAGE_FUNCTIONS.get((filename, code.co_name)) or STAGE_FILES.get(filename)
+    if stage:
+        return stage
+    parts = code.co_filename.replace('\\', '/').split('/')
+    for part in parts[-4:-1]:
+        if part in STAGE_PACKAGES:
+            return STAGE_PACKAGES[part]
+    return None
+
+
+class CrawlProfiler:
+    """cProfile + stage-tagged stack sampling, written to PREFIX.pstats and PREFIX.collapsed"""
+
+    def __init__(self, prefix, domains=None, interval=0.005, log=print):
+        self.prefix = prefix
+        self.domains = domains  # stop after this many domains (None = until stop())
+        self.interval = interval
+        self.log = log
+        self.profile = cProfile.Profile()
+        self.stacks = Counter()
+        self.stages = Counter()
+        self.samples = 0
+        self.domains_done = 0
+        self.running = False
+        self._stop = threading.Event()
+        self._sampler = None
+        self._main_thread = None
+        self._started = None
+
+    def start(self):
+        """Start profiling (call from the thread that runs the event loop)"""
+        directory = os.path.dirname(self.prefix)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._main_thread = threading.get_ident()
+        self._started = time.perf_counter()
+        self.running = True
+        self._sampler = threading.Thread(target=self._sample_loop, name='profiler', daemon=True)
+        self._sampler.start()
+        self.profile.enable()
+
+    def domain_done(self):
+        """Count a finished domain; stops profiling after the first N"""
+        self.domains_done += 1
+        if self.running and self.domains is not None and self.domains_done >= self.domains:
+            self.stop()
+
+    def _sample_loop(self):
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id != own:
+                    self._record(thread_id, frame)
+
+    def _record(self, thread_id, frame):
+        labels = []
+        stage = None
+        leaf = (os.path.basename(frame.f_code.co_filename), frame.f_code.co_name)
+        while frame is not None:
+            code = frame.f_code
+            labels.append(frame_label(code))
+            if stage is None:
+                stage = frame_stage(code)
+            frame = frame.f_back
+
+        if stage is None and leaf in IDLE_FUNCTIONS:
+            if thread_id != self._main_thread:
+                return  # a pool thread with nothing to do
+            stage = 'idle'
+        stage = stage or 'other'
+        self.stacks[stage + ';' + ';'.join(reversed(labels))] += 1
+        self.stages[stage] += 1
+        self.samples += 1
+
+    def stop(self):
+        """Stop profiling, write the files and log a summary (only the first call does anything)"""
+        if not self.running:
+            return
+        self.running = False
+        self.profile.disable()
+        self._stop.set()
+        self._sampler.join()
+        elapsed = time.perf_counter() - self._started
+
+        self.profile.dump_stats(f"{self.prefix}.pstats")
+        with open(f"{self.prefix}.collapsed", 'w', encoding='utf-8') as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+        self.log(f"🔬 Profile: {self.domains_done} domains in {elapsed:.1f}s | "
+                 f"{self.prefix}.pstats, {self.prefix}.collapsed ({self.samples} samples)")
+        if self.samples:
+            shares = ', '.join(f"{stage} {count / self.samples:.0%}" for stage, count in self.stages.most_common())
+            self.log(f"🔬 Samples by stage: {shares}")
+        for line in self.top_functions():
+            self.log(f"🔬   {line}")
+
+    def top_functions(self, count=10):
+        """Functions with the most own time, as log lines"""
+        stats = pstats.Stats(self.profile).stats
+        ranked = sorted(stats.items(), key=lambda item: item[1][2], reverse=True)[:count]
+        return [
+            f"{own:7.2f}s own {cumulative:7.2f}s total {calls:>8} calls  "
+            f"{os.path.basename(filename)}:{line}({function})"
+            for (filename, line, function), (_, calls, own, cumulative, _) in ranked
+        ]
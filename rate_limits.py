@@ -0,0 +1,113 @@
+"""
+Retry/backoff policy and adaptive per-host rate limiting
+A fetch that should be tried again returns RetryLater instead of sleeping, so
+the PageScheduler can put the URL back in its queue and use the slot for
+other pages meanwhile. Retry delays are jittered exponential backoff, or the
+server's Retry-After when it sent one.
+
+HostRateLimiter spaces request starts per host like a token bucket of depth
+one: each host has a rate, and its next free start time is reserved before
+sleeping so concurrent requests queue up behind it. A 429 halves the host's
+rate (and blocks it until Retry-After); every success raises it again by a
+small step, up to the configured rate.
+"""
+
+import asyncio
+import random
+import time
+from email.utils import parsedate_to_datetime
+
+
+class RetryLater:
+    """Fetch result meaning "not now": try the URL again after a backoff"""
+
+    def __init__(self, reason, retry_after=None, max_retries=1, throttle=False):
+        self.reason = reason
+        self.retry_after = retry_after  # seconds, from the Retry-After header
+        self.max_retries = max_retries
+        self.throttle = throttle  # the host asked us to slow down (429)
+
+    def __repr__(self):
+        return f'RetryLater({self.reason!r}, retry_after={self.retry_after!r})'
+
+
+def parse_retry_after(value, now=None):
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP date); None if absent/invalid"""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when is None or when.tzinfo is None:
+        return None
+    return max(0.0, when.timestamp() - (time.time() if now is None else now))
+
+
+def backoff_delay(attempt, retry_after=None, base=1.0, cap=60.0, rng=random.random):
+    """Delay before retry number attempt (0-based): Retry-After if given, else jittered exponential"""
+    if retry_after is not None:
+        return min(retry_after, cap)
+    ceiling = min(cap, base * 2 ** attempt)
+    # Equal jitter: never less than half the step, so retries still back off
+    return ceiling / 2 + rng() * ceiling / 2
+
+
+class HostRateLimiter:
+    """Per-host request pacing that slows down for hosts answering 429"""
+
+    def __init__(self, rate=4.0, min_rate=0.1, recovery=0.1, max_hosts=10000, clock=None):
+        self.rate = rate  # requests/second per host when all is well (None or 0 = unlimited)
+        self.min_rate = min_rate
+        self.recovery = recovery  # requests/second added back per success
+        self.max_hosts = max_hosts  # idle hosts are forgotten beyond this many
+        self.clock = clock
+        self._rates = {}
+        self._next_start = {}
+        self.throttled = 0
+
+    def _now(self):
+        return self.clock() if self.clock else asyncio.get_running_loop().time()
+
+    def host_rate(self, host):
+        return self._rates.get(host, self.rate)
+
+    async def acquire(self, host):
+        """Wait for this host's next free start slot"""
+        if not self.rate:
+            return
+        now = self._now()
+        if len(self._next_start) > self.max_hosts:
+            self._forget_idle(now)
+        # Reserve the slot before sleeping so concurrent requests queue up behind it
+        start = max(now, self._next_start.get(host, now))
+        self._next_start[host] = start + 1 / self.host_rate(host)
+        if start > now:
+            await asyncio.sleep(start - now)
+
+    def _forget_idle(self, now):
+        """Drop hosts with no reservation pending and a rate back to normal"""
+        for host in [h for h, start in self._next_start.items() if start < now and h not in self._rates]:
+            del self._next_start[host]
+
+    def throttle(self, host, retry_after=None):
+        """The host said 429: halve its rate and, given Retry-After, pause it until then"""
+        self.throttled += 1
+        if not self.rate:
+            return
+        self._rates[host] = max(self.min_rate, self.host_rate(host) / 2)
+        now = self._now()
+        pause_until = now + (retry_after or 0)
+        self._next_start[host] = max(self._next_start.get(host, now), pause_until)
+
+    def succeed(self, host):
+        """A request went through: recover the host's rate a little"""
+        if host in self._rates:
+            rate = self._rates[host] + self.recovery
+            if rate >= self.rate:
+                del self._rates[host]
+            else:
+                self._rates[host] = rate
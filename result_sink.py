@@ -0,0 +1,158 @@
+"""
+Result sink: owns the database side of the scraper
+Crawlers hand finished results to put() and carry on. A background flusher
+buffers them and writes them in bulk, either when flush_size rows are
+waiting or every flush_interval seconds. The blocking database call runs in a
+worker thread so a slow write never stalls the event loop.
+
+Failed flushes are retried with exponential backoff. close() always flushes
+what is left, including when the run is cancelled (Ctrl-C), so completed work
+is not lost. Queue depth and write latency are tracked so a database
+bottleneck shows up in the batch stats.
+"""
+
+import asyncio
+import time
+
+# Queued after the last result to tell the flusher to finish up
+_CLOSE = object()
+
+
+class ResultSink:
+    """Buffers (domain, fields) results and bulk-writes them from a background task"""
+
+    def __init__(self, write_rows, flush_size=100, flush_interval=10.0,
+                 max_retries=3, retry_delay=1.0, max_queue=1000, log=print, on_write=None):
+        self.write_rows = write_rows  # blocking write_rows(list of row dicts), runs in a thread
+        self.on_write = on_write  # on_write(seconds) after every write request, e.g. for a latency histogram
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.log = log
+        self.queue = asyncio.Queue(maxsize=max_queue)
+        self.buffer = []
+        self._flusher = None
+
+        self.flushes = 0
+        self.requests = 0
+        self.rows_written = 0
+        self.rows_failed = 0
+        self.retries = 0
+        self.total_write_time = 0.0
+        self.max_write_time = 0.0
+        self.max_queue_depth = 0
+
+    async def start(self):
+        """Start the background flusher"""
+        self._flusher = asyncio.create_task(self._run())
+
+    async def put(self, domain, fields):
+        """Hand off a result; only waits if the queue is full (backpressure)"""
+        await self.queue.put({'domain': domain, **fields})
+        self.max_queue_depth = max(self.max_queue_depth, self.queue.qsize())
+
+    async def close(self):
+        """Write everything still queued or buffered, then stop the flusher"""
+        if self._flusher is None:
+            return
+        flusher, self._flusher = self._flusher, None
+        if flusher.done():
+            # Flusher died (or was cancelled with the loop) - flush what it left behind
+            self._drain_queue()
+            await self.flush()
+            return
+        await self.queue.put(_CLOSE)
+        await flusher
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    def _drain_queue(self):
+        while not self.queue.empty():
+            item = self.queue.get_nowait()
+            if item is not _CLOSE:
+                self.buffer.append(item)
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        next_flush = loop.time() + self.flush_interval
+        while True:
+            try:
+                item = await asyncio.wait_for(self.queue.get(), max(0.0, next_flush - loop.time()))
+            except asyncio.TimeoutError:
+                item = None
+
+            if item is _CLOSE:
+                self._drain_queue()
+                await self.flush()
+                return
+            if item is not None:
+                self.buffer.append(item)
+
+            if len(self.buffer) >= self.flush_size or loop.time() >= next_flush:
+                await self.flush()
+                next_flush = loop.time() + self.flush_interval
+
+    async def flush(self):
+        """Write the buffered rows in one bulk request
+
+        Rows may carry different columns (a timeout only sets its status):
+        write_rows leaves the columns a row does not have untouched.
+        """
+        if not self.buffer:
+            return
+        rows, self.buffer = self.buffer, []
+        self.flushes += 1
+        try:
+            await self._write_with_retry(rows)
+        except asyncio.CancelledError:
+            # Put unwritten rows back so close() can still save them
+            self.buffer.extend(rows)
+            raise
+
+    async def _write_with_retry(self, rows):
+        for attempt in range(self.max_retries + 1):
+            start = time.perf_counter()
+            try:
+                self.requests += 1
+                await asyncio.to_thread(self.write_rows, rows)
+                self.rows_written += len(rows)
+                self.log(f"  💾 Saved {len(rows)} results to Supabase")
+                return
+            except Exception as e:
+                error = e
+            finally:
+                elapsed = time.perf_counter() - start
+                self.total_write_time += elapsed
+                self.max_write_time = max(self.max_write_time, elapsed)
+                if self.on_write is not None:
+                    self.on_write(elapsed)
+
+            if attempt < self.max_retries:
+                self.retries += 1
+                delay = self.retry_delay * (2 ** attempt)
+                self.log(f"  ⚠️ Save of {len(rows)} results failed ({str(error)}), retrying in {delay:.0f}s...")
+                await asyncio.sleep(delay)
+
+        self.rows_failed += len(rows)
+        self.log(f"  ❌ Failed to save {len(rows)} results: {str(error)}")
+
+    def stats(self):
+        """Current queue depth and write latency figures"""
+        return {
+            'queue_depth': self.queue.qsize(),
+            'buffered': len(self.buffer),
+            'max_queue_depth': self.max_queue_depth,
+            'flushes': self.flushes,
+            'requests': self.requests,
+            'rows_written': self.rows_written,
+            'rows_failed': self.rows_failed,
+            'retries': self.retries,
+            'avg_write_ms': (self.total_write_time / self.requests) * 1000 if self.requests else 0.0,
+            'max_write_ms': self.max_write_time * 1000,
+        }
@@ -0,0 +1,50 @@
+"""
+Adaptive crawl depth: stop fetching a domain's pages once they stop adding findings
+Pages are crawled best first (see link_ranking), so after a few pages in a
+row that add no new keyword/brand/plastic/metal indicator, the rest rarely
+add any either. Saturation counts the new indicators each page adds and
+tells the PageScheduler to stop when
+
+    - the last `patience` pages added nothing new, or
+    - `target` distinct indicators have been found
+
+A small share of domains is audited: their crawl is not stopped, but the
+point where it would have been is recorded, so the run stats can report how
+much of the findings early stopping keeps.
+"""
+
+
+class Saturation:
+    """Marginal yield of one domain's pages"""
+
+    def __init__(self, found=0, patience=5, target=None, audit=False):
+        self.patience = patience  # dry pages in a row before stopping (0/None = never)
+        self.target = target  # stop at this many distinct indicators (None = no target)
+        self.audit = audit  # record the stopping point but keep crawling
+        self.found = found  # distinct indicators so far (the homepage's to start with)
+        self.pages = 0
+        self.dry_streak = 0
+        self.found_at_stop = None  # audits: indicators when the crawl would have stopped
+        self.pages_at_stop = None
+
+    def add(self, new):
+        """A page finished and added `new` indicators"""
+        self.pages += 1
+        self.found += new
+        self.dry_streak = 0 if new else self.dry_streak + 1
+
+    def saturated(self):
+        if self.target and self.found >= self.target:
+            return True
+        return bool(self.patience) and self.dry_streak >= self.patience
+
+    def should_stop(self):
+        """PageScheduler stop check; audited domains only note the point and carry on"""
+        if not self.saturated():
+            return False
+        if not self.audit:
+            return True
+        if self.found_at_stop is None:
+            self.found_at_stop = self.found
+            self.pages_at_stop = self.pages
+        return False
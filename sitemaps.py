@@ -0,0 +1,267 @@
+"""
+Sitemap discovery: internal pages from robots.txt and sitemaps
+A site's homepage links are often a handful of nav entries (or none at all
+on a JavaScript-rendered homepage). SitemapDiscovery reads robots.txt for
+its Sitemap: lines and Disallow rules, falls back to /sitemap.xml, follows
+sitemap indexes, and returns the site's page URLs for the crawl queue.
+
+Sitemaps are streamed: the body (gunzipped on the fly when it is a .xml.gz)
+is fed to an incremental XML parser chunk by chunk and every <url> element
+is dropped once its <loc> is read, so a 50 MB sitemap never sits in memory
+and reading stops as soon as max_urls pages are collected.
+
+Results are cached per site with a TTL (expired entries are dropped as new
+sites come in, and at most max_sites are kept), and a discovery already in
+flight is shared. Fetches go through the crawl's per-host rate limiter, so
+robots.txt and sitemaps count against the same pacing as the site's pages.
+"""
+
+import asyncio
+import time
+import zlib
+from contextlib import asynccontextmanager
+from urllib.parse import urljoin, urlsplit
+
+import httpx
+from lxml import etree
+
+_GZIP_MAGIC = b'\x1f\x8b'
+# Errors of a robots.txt / sitemap fetch that just mean "nothing found there"
+_FETCH_ERRORS = (httpx.HTTPError, httpx.InvalidURL)
+# robots.txt bytes read; Google ignores anything past 500 KiB
+MAX_ROBOTS_BYTES = 512 * 1024
+
+
+def site_host(url_or_host):
+    """Host of a URL (or a bare host) without www., lowercased"""
+    host = urlsplit(url_or_host).hostname if '//' in url_or_host else url_or_host
+    host = (host or '').lower()
+    return host[4:] if host.startswith('www.') else host
+
+
+class RobotsRules:
+    """Sitemap: lines and the Allow/Disallow rules for all user agents (*) of a robots.txt"""
+
+    def __init__(self, sitemaps=(), allow=(), disallow=()):
+        self.sitemaps = list(sitemaps)
+        self.allow = list(allow)
+        self.disallow = list(disallow)
+
+    @classmethod
+    def parse(cls, text):
+        sitemaps, allow, disallow = [], [], []
+        applies = False  # inside a group for User-agent: *
+        in_agents = False  # consecutive User-agent lines share one group
+        for raw in text.splitlines():
+            line = raw.split('#', 1)[0].strip()
+            if ':' not in line:
+                continue
+            field, _, value = line.partition(':')
+            field = field.strip().lower()
+            value = value.strip()
+            if field == 'sitemap':
+                if value:
+                    sitemaps.append(value)
+                continue
+            if field == 'user-agent':
+                applies = (applies and in_agents) or value == '*'
+                in_agents = True
+                continue
+            in_agents = False
+            if applies and value:
+                # Only prefix rules: a trailing * or $ is dropped, other wildcards kept as text
+                rule = value.rstrip('$').rstrip('*')
+                if field == 'allow':
+                    allow.append(rule)
+                elif field == 'disallow':
+                    disallow.append(rule)
+        return cls(sitemaps, allow, disallow)
+
+    def allows(self, url):
+        """True unless the longest matching rule for the URL's path is a Disallow"""
+        parts = urlsplit(url)
+        path = parts.path or '/'
+        if parts.query:
+            path += '?' + parts.query
+        allowed = max((len(rule) for rule in self.allow if path.startswith(rule)), default=-1)
+        denied = max((len(rule) for rule in self.disallow if path.startswith(rule)), default=-1)
+        return denied <= allowed
+
+
+class SitemapReader:
+    """Incremental sitemap parser: feed() chunks, collect page and child-sitemap URLs"""
+
+    def __init__(self, max_urls):
+        self.max_urls = max_urls
+        self.pages = []
+        self.sitemaps = []
+        self._gunzip = None
+        self._started = False
+        self._parser = etree.XMLPullParser(
+            events=('end',), recover=True, resolve_entities=False, no_network=True, huge_tree=False
+        )
+
+    @property
+    def full(self):
+        return len(self.pages) >= self.max_urls
+
+    def feed(self, chunk):
+        if not self._started:
+            self._started = True
+            if chunk.startswith(_GZIP_MAGIC):
+                self._gunzip = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        if self._gunzip is not None:
+            chunk = self._gunzip.decompress(chunk)
+        if chunk:
+            self._parser.feed(chunk)
+            self._collect()
+        return len(chunk)
+
+    def _collect(self):
+        for _, element in self._parser.read_events():
+            tag = etree.QName(element).localname if isinstance(element.tag, str) else ''
+            if tag not in ('url', 'sitemap'):
+                continue
+            loc = next((child.text for child in element
+                        if isinstance(child.tag, str) and etree.QName(child).localname == 'loc'), None)
+            if loc and loc.strip():
+                (self.pages if tag == 'url' else self.sitemaps).append(loc.strip())
+            # Drop the finished entry and everything before it
+            element.clear()
+            parent = element.getparent()
+            if parent is not None:
+                while element.getprevious() is not None:
+                    del parent[0]
+
+
+class SitemapDiscovery:
+    """Per-site, TTL-cached discovery of page URLs from robots.txt and sitemaps"""
+
+    def __init__(self, max_urls=1000, max_sitemaps=3, max_bytes=20 * 1024 * 1024,
+                 timeout=10.0, ttl=86400.0, max_sites=10000, limiter=None, clock=time.monotonic):
+        self.max_urls = max_urls  # page URLs kept per site
+        self.max_sitemaps = max_sitemaps  # sitemap files fetched per site (indexes included)
+        self.max_bytes = max_bytes  # decompressed bytes read per sitemap
+        self.timeout = timeout  # for the whole discovery of a site
+        self.ttl = ttl
+        self.max_sites = max_sites  # cached sites kept (oldest dropped first)
+        self.limiter = limiter  # HostRateLimiter shared with the page fetches (None = unpaced)
+        self.clock = clock
+        self._cache = {}  # site -> (expires_at, page urls, robots rules), oldest first
+        self._inflight = {}  # site -> task discovering it
+
+        self.sites = 0
+        self.cache_hits = 0
+        self.sitemaps_read = 0
+        self.urls_found = 0
+        self.failures = 0
+
+    async def discover(self, origin, session):
+        """(page URLs, RobotsRules) for the site at origin (e.g. https://www.shop.com)"""
+        site = site_host(origin)
+        cached = self._cache.get(site)
+        if cached and cached[0] > self.clock():
+            self.cache_hits += 1
+            return cached[1], cached[2]
+
+        task = self._inflight.get(site)
+        if task is None:
+            task = asyncio.create_task(self._discover(origin, session))
+            self._inflight[site] = task
+            task.add_done_callback(lambda _: self._inflight.pop(site, None))
+        else:
+            self.cache_hits += 1
+        return await asyncio.shield(task)
+
+    async def _discover(self, origin, session):
+        site = site_host(origin)
+        self.sites += 1
+        robots = RobotsRules()
+        pages = []
+        try:
+            async with asyncio.timeout(self.timeout):
+                robots = await self._robots(origin, session)
+                pending = list(robots.sitemaps) or [urljoin(origin, '/sitemap.xml')]
+                seen = set()
+                while pending and len(seen) < self.max_sitemaps and len(pages) < self.max_urls:
+                    url = pending.pop(0)
+                    if url in seen:
+                        continue
+                    seen.add(url)
+                    reader = await self._read_sitemap(url, session, self.max_urls - len(pages))
+                    if reader is None:
+                        continue
+                    pages.extend(page for page in reader.pages if site_host(page) == site)
+                    pending.extend(reader.sitemaps)
+        except (TimeoutError, *_FETCH_ERRORS):
+            self.failures += 1  # keep what was found before the timeout
+
+        pages = list(dict.fromkeys(pages))[:self.max_urls]
+        self.urls_found += len(pages)
+        self._store(site, (self.clock() + self.ttl, pages, robots))
+        return pages, robots
+
+    def _store(self, site, entry):
+        """Cache a site's result, first dropping expired entries (and the oldest, past max_sites)"""
+        self._cache.pop(site, None)
+        if len(self._cache) >= self.max_sites:
+            now = self.clock()
+            for expired in [s for s, cached in self._cache.items() if cached[0] <= now]:
+                del self._cache[expired]
+            while len(self._cache) >= self.max_sites:
+                del self._cache[next(iter(self._cache))]
+        self._cache[site] = entry
+
+    @asynccontextmanager
+    async def _get(self, url, session):
+        """Streamed GET of url, paced by the shared host limiter"""
+        host = urlsplit(url).netloc
+        if self.limiter is not None:
+            await self.limiter.acquire(host)
+        async with session.stream('GET', url, follow_redirects=True) as response:
+            if self.limiter is not None and response.status_code == 429:
+                self.limiter.throttle(host)
+            yield response
+
+    async def _robots(self, origin, session):
+        """Rules of the site's robots.txt, read up to MAX_ROBOTS_BYTES"""
+        body = bytearray()
+        try:
+            async with self._get(urljoin(origin, '/robots.txt'), session) as response:
+                if response.status_code != 200:
+                    return RobotsRules()
+                encoding = response.charset_encoding or 'utf-8'
+                async for chunk in response.aiter_bytes():
+                    body += chunk
+                    if len(body) >= MAX_ROBOTS_BYTES:
+                        break
+        except _FETCH_ERRORS:
+            return RobotsRules()
+        return RobotsRules.parse(body[:MAX_ROBOTS_BYTES].decode(encoding, errors='replace'))
+
+    async def _read_sitemap(self, url, session, max_urls):
+        """Stream one sitemap through a SitemapReader (None if it could not be fetched)"""
+        reader = SitemapReader(max_urls)
+        read = 0
+        try:
+            async with self._get(url, session) as response:
+                if response.status_code != 200:
+                    return None
+                self.sitemaps_read += 1
+                async for chunk in response.aiter_bytes():
+                    read += reader.feed(chunk)
+                    if reader.full or read >= self.max_bytes:
+                        break
+        except (*_FETCH_ERRORS, zlib.error, etree.Error):
+            pass  # a broken or cut-off sitemap still gives the URLs read so far
+        return reader
+
+    def stats(self):
+        """Counters for the run log"""
+        return {
+            'sites': self.sites,
+            'cache_hits': self.cache_hits,
+            'sitemaps_read': self.sitemaps_read,
+            'urls_found': self.urls_found,
+            'failures': self.failures,
+        }
@@ -0,0 +1,39 @@
+"""
+Checks that --workers mode (page analysis in a process pool) gives the same
+results as analyzing on the event loop, and that its stats are aggregated
+"""
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import main
+
+PAGES_DIR = Path(__file__).parent / 'test_pages'
+
+
+def analyze_all(pages):
+    async def scenario():
+        return await asyncio.gather(*[
+            main.run_analysis(html, f'https://midwestprecision.com/{name}', 'midwestprecision.com')
+            for name, html in pages
+        ])
+    return asyncio.run(scenario())
+
+
+def test_process_pool_matches_inline_analysis():
+    pages = [(p.stem, p.read_text(encoding='utf-8')) for p in sorted(PAGES_DIR.glob('*.html'))]
+
+    inline = analyze_all(pages)
+
+    before = main.performance_stats['pages_analyzed']
+    main.analysis_pool = ProcessPoolExecutor(max_workers=2, mp_context=multiprocessing.get_context('spawn'))
+    try:
+        pooled = analyze_all(pages)
+    finally:
+        main.analysis_pool.shutdown()
+        main.analysis_pool = None
+
+    assert pooled == inline
+    assert main.performance_stats['pages_analyzed'] == before + len(pages)
+    assert main.performance_stats['analysis_cpu_seconds'] > 0
@@ -0,0 +1,95 @@
+"""
+Checks the DNS prefilter against a stub resolver: non-existent domains are
+cached as such, lookups are shared and TTL-bound, lookup errors never skip a
+domain, and crawl_domain marks no_dns without opening a connection
+"""
+import asyncio
+
+import httpx
+
+import main
+from dns_prefilter import DnsPrefilter, StubResolver
+from result_sink import ResultSink
+
+RECORDS = {
+    'acme.com': ['192.0.2.1'],
+    'www.wwwonly.com': ['192.0.2.2'],
+}
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_missing_domains_are_cached_as_not_found():
+    resolver = StubResolver(RECORDS)
+    dns = DnsPrefilter(resolver)
+
+    async def scenario():
+        await dns.prefetch(['acme.com', 'wwwonly.com', 'gone.com'])
+        return [await dns.exists(d) for d in ('acme.com', 'wwwonly.com', 'gone.com')]
+
+    assert asyncio.run(scenario()) == [True, True, False]
+    # Each domain was resolved once (apex + www); the crawler's checks hit the cache
+    assert len(resolver.lookups) == 6
+    assert dns.stats()['not_found'] == 1
+    assert dns.stats()['cache_hits'] == 3
+
+
+def test_concurrent_checks_share_one_lookup():
+    resolver = StubResolver(RECORDS, delay=0.05)
+    dns = DnsPrefilter(resolver)
+
+    async def scenario():
+        prefetch = dns.start_prefetch(['acme.com'])
+        found = await dns.exists('acme.com')
+        await prefetch
+        return found
+
+    assert asyncio.run(scenario()) is True
+    assert resolver.lookups == ['acme.com', 'www.acme.com']
+
+
+def test_entries_expire_and_lookup_errors_are_not_cached():
+    clock = FakeClock()
+    resolver = StubResolver(RECORDS, failing={'flaky.com', 'www.flaky.com'})
+    dns = DnsPrefilter(resolver, ttl=60, negative_ttl=30, clock=clock)
+
+    async def scenario():
+        assert await dns.exists('gone.com') is False
+        assert await dns.exists('flaky.com') is True
+        assert await dns.exists('flaky.com') is True
+        clock.now += 31
+        assert await dns.exists('gone.com') is False
+
+    asyncio.run(scenario())
+
+    assert resolver.lookups.count('flaky.com') == 2
+    assert resolver.lookups.count('gone.com') == 2
+    assert dns.stats()['errors'] == 2
+
+
+def test_crawl_marks_no_dns_without_connecting(monkeypatch):
+    monkeypatch.setattr(main, 'dns_prefilter', DnsPrefilter(StubResolver(RECORDS)))
+    monkeypatch.setattr(main.random, 'uniform', lambda a, b: 0)
+    requested = []
+    saved = []
+
+    def handler(request):
+        requested.append(request.url)
+        return httpx.Response(200, text='<p>CNC</p>', headers={'content-type': 'text/html'})
+
+    async def scenario():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as session, \
+                ResultSink(saved.extend, log=lambda msg: None) as sink:
+            await main.crawl_domain('https://gone.com', session, sink)
+
+    asyncio.run(scenario())
+
+    assert requested == []
+    assert saved[0]['domain'] == 'gone.com'
+    assert saved[0]['website_scrape_status'] == 'no_dns'
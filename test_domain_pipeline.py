@@ -0,0 +1,59 @@
+"""
+Checks that DomainPipeline keeps every crawler slot busy (no batch barrier)
+and stops once the claim source is empty
+"""
+import asyncio
+
+from domain_pipeline import DomainPipeline
+
+
+def test_slow_domain_does_not_stall_the_other_slots():
+    pending = [f'd{i}.com' for i in range(40)]
+    claims = []
+    crawled = []
+
+    async def claim(limit):
+        batch, pending[:] = pending[:limit], pending[limit:]
+        claims.append(len(batch))
+        return batch
+
+    async def crawl(domain):
+        # d0 is a 60s-style straggler; everything else is quick
+        await asyncio.sleep(0.3 if domain == 'd0.com' else 0.01)
+        crawled.append(domain)
+
+    async def scenario():
+        pipeline = DomainPipeline(claim, crawl, concurrency=4, prefetch=5, claim_size=5,
+                                  log=lambda msg: None)
+        start = asyncio.get_running_loop().time()
+        await pipeline.run()
+        return pipeline, asyncio.get_running_loop().time() - start
+
+    pipeline, elapsed = asyncio.run(scenario())
+
+    assert sorted(crawled) == sorted(f'd{i}.com' for i in range(40))
+    # The other 39 domains finished on 3 slots while d0 was still running
+    assert crawled[-1] == 'd0.com'
+    assert elapsed < 0.5
+    assert claims[-1] == 0
+    assert pipeline.claimed == pipeline.crawled == 40
+
+
+def test_crawl_errors_do_not_kill_a_slot():
+    pending = ['bad.com', 'a.com', 'b.com']
+
+    async def claim(limit):
+        batch, pending[:] = pending[:limit], pending[limit:]
+        return batch
+
+    done = []
+
+    async def crawl(domain):
+        if domain == 'bad.com':
+            raise RuntimeError('boom')
+        done.append(domain)
+
+    pipeline = DomainPipeline(claim, crawl, concurrency=1, claim_size=2, log=lambda msg: None)
+    asyncio.run(pipeline.run())
+    assert done == ['a.com', 'b.com']
+    assert pipeline.errors == 1
@@ -0,0 +1,115 @@
+"""
+Checks the canonical-host cache: domains redirecting to a site already
+crawled (or being crawled) copy its result, entries persist in the cache
+file and expire after the freshness window (also from the file), the
+cache is bounded and keeps no page history, and a ttl of 0 turns it off
+"""
+import asyncio
+
+import httpx
+
+import main
+from dns_prefilter import DnsPrefilter, StubResolver
+from host_cache import HostCache
+from result_sink import ResultSink
+
+
+def test_cache_file_and_freshness(tmp_path):
+    path = tmp_path / 'hosts.jsonl'
+    now = [1000.0]
+    cache = HostCache(path, ttl=60, clock=lambda: now[0])
+
+    async def claims():
+        assert await cache.claim('shop.com', 'shop.com') is None
+        cache.put('shop.com', 'shop.com', {'website_scrape_status': 'completed'})
+        assert await cache.claim('shop.com', 'shop.com') is None  # its own re-crawl
+        cache.release('shop.com')
+        return await cache.claim('shop.com', 'shop.de')
+
+    assert asyncio.run(claims())['domain'] == 'shop.com'
+    cache.close()
+
+    reopened = HostCache(path, ttl=60, clock=lambda: now[0])
+    assert reopened._fresh('shop.com')['result'] == {'website_scrape_status': 'completed'}
+    now[0] += 61
+    assert reopened._fresh('shop.com') is None
+    reopened.put('other.com', 'other.com', {'website_scrape_status': 'completed'})
+    assert list(reopened._entries) == ['other.com']  # the expired entry is dropped on insert
+    reopened.close()
+    assert len(path.read_text().splitlines()) == 2
+
+    # Opening the file again drops expired lines from it
+    now[0] += 61
+    assert HostCache(path, ttl=60, clock=lambda: now[0]).stats()['hosts'] == 0
+    assert path.read_text() == ''
+
+
+def test_cache_is_bounded_and_keeps_only_result_columns(tmp_path):
+    path = tmp_path / 'hosts.jsonl'
+    now = [1000.0]
+    cache = HostCache(path, max_entries=2, clock=lambda: now[0])
+    for host in ('a.com', 'b.com', 'c.com'):
+        now[0] += 1
+        cache.put(host, host, {'website_scrape_status': 'completed', 'website_keywords': ['cnc'],
+                               'website_pages': {f'https://{host}': {'links': ['https://{host}/x'] * 15}}})
+    cache.close()
+
+    assert list(cache._entries) == ['b.com', 'c.com']  # the oldest went first
+    assert cache._fresh('c.com')['result'] == {'website_scrape_status': 'completed', 'website_keywords': ['cnc']}
+    assert 'website_pages' not in path.read_text()
+    assert list(HostCache(path, max_entries=1, clock=lambda: now[0])._entries) == ['c.com']
+
+
+def test_zero_ttl_turns_the_cache_off(tmp_path):
+    path = tmp_path / 'hosts.jsonl'
+    cache = HostCache(path, ttl=0)
+
+    async def aliases_crawl_at_once():
+        # Neither waits for the other's crawl
+        return await asyncio.wait_for(asyncio.gather(cache.claim('shop.com', 'shop.com'),
+                                                     cache.claim('shop.com', 'shop.de')), 1)
+
+    assert asyncio.run(aliases_crawl_at_once()) == [None, None]
+    cache.put('shop.com', 'shop.com', {'website_scrape_status': 'completed'})
+    assert cache.stats() == {'hits': 0, 'waits': 0, 'stored': 0, 'hosts': 0}
+    assert not path.exists()
+
+
+def test_aliases_copy_the_crawled_site(monkeypatch):
+    links = ''.join(f'<a href="/products/p{i}">Product {i}</a>' for i in range(3))
+    home = f'<html><body><p>CNC machining</p>{links}</body></html>'
+    fetched = []
+
+    def handler(request):
+        fetched.append((request.url.host, request.url.path))
+        if request.url.host != 'shop.com':
+            # Old brand names and country TLDs all redirect to the same site
+            return httpx.Response(301, headers={'location': 'https://shop.com/'})
+        if request.url.path == '/':
+            return httpx.Response(200, text=home, headers={'content-type': 'text/html'})
+        if request.url.path.startswith('/products/'):
+            return httpx.Response(200, text='<p>titanium</p>', headers={'content-type': 'text/html'})
+        return httpx.Response(404)
+
+    domains = ['shop.com', 'shop.de', 'oldbrand.com']
+    monkeypatch.setattr(main, 'dns_prefilter', DnsPrefilter(StubResolver({d: ['192.0.2.1'] for d in domains})))
+    monkeypatch.setattr(main, 'host_cache', HostCache())
+    monkeypatch.setattr(main.random, 'uniform', lambda a, b: 0)
+    monkeypatch.setattr(main, 'HOST_REQUEST_DELAY', 0)
+    monkeypatch.setattr(main, 'host_limiter', main.HostRateLimiter(rate=None))
+    monkeypatch.setattr(main, 'performance_stats', {**main.performance_stats, 'alias_copies': 0})
+
+    async def crawl_all():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as session, \
+                ResultSink(lambda rows: None, log=lambda msg: None) as sink:
+            return await asyncio.gather(*(main.crawl_domain(f'https://{d}', session, sink) for d in domains))
+
+    results = asyncio.run(crawl_all())
+
+    product_fetches = [path for host, path in fetched if path.startswith('/products/')]
+    assert len(product_fetches) == 3  # the site's pages were crawled once
+    assert main.performance_stats['alias_copies'] == 2
+    assert main.host_cache.stats()['waits'] == 2
+    for result in results:
+        assert result['website_metals'] == ['titanium']
+        assert result['website_scrape_status'] == 'completed'
@@ -0,0 +1,91 @@
+"""
+Checks the per-host connection pools: one pool per origin, limits passed
+to each, idle pools retired after keepalive_expiry or past max_hosts,
+pools with a response still open kept, and max_connections held over all pools
+"""
+import asyncio
+
+import httpx
+
+from host_pools import HostPoolTransport
+
+
+class FakePool(httpx.AsyncBaseTransport):
+    """Stands in for one host's httpx pool"""
+
+    def __init__(self, opened, **options):
+        self.options = options
+        self.closed = False
+        opened.append(self)
+
+    async def handle_async_request(self, request):
+        return httpx.Response(200, stream=httpx.ByteStream(b'<p>ok</p>'))
+
+    async def aclose(self):
+        self.closed = True
+
+
+def make_transport(now, **options):
+    opened = []
+    transport = HostPoolTransport(make_pool=lambda **kw: FakePool(opened, **kw), clock=lambda: now[0], **options)
+    return transport, opened
+
+
+def test_one_pool_per_origin():
+    now = [0.0]
+    transport, opened = make_transport(now, connections_per_host=3, http2=True)
+
+    async def fetch_all():
+        async with httpx.AsyncClient(transport=transport) as client:
+            for url in ('https://shop.com/', 'https://shop.com/materials', 'https://www.shop.com/',
+                        'http://shop.com/', 'https://shop.com:8443/'):
+                await client.get(url)
+
+    asyncio.run(fetch_all())
+
+    assert len(opened) == 4
+    assert opened[0].options['limits'].max_keepalive_connections == 3
+    assert opened[0].options['http2'] is True
+    assert opened[0].options['verify'] is opened[1].options['verify']  # one SSL context
+    assert all(pool.closed for pool in opened)  # closed with the client
+
+
+def test_idle_pools_are_retired():
+    now = [0.0]
+    transport, opened = make_transport(now, max_hosts=2, keepalive_expiry=30.0)
+
+    async def crawl():
+        async with httpx.AsyncClient(transport=transport) as client:
+            await client.get('https://a.com/')
+            async with client.stream('GET', 'https://b.com/'):
+                now[0] = 10.0
+                await client.get('https://c.com/')  # past max_hosts: a.com (idle) goes, b.com is still reading
+                assert [pool.closed for pool in opened] == [True, False, False]
+            now[0] = 100.0
+            await client.get('https://d.com/')  # b.com and c.com idle for over 30s
+            assert [pool.closed for pool in opened] == [True, True, True, False]
+            assert transport.stats() == {
+                'hosts': 1, 'pools_opened': 4, 'pools_closed': 3, 'connections': 1, 'waits': 0
+            }
+
+    asyncio.run(crawl())
+
+
+def test_connections_are_capped_over_all_hosts():
+    now = [0.0]
+    transport, opened = make_transport(now, connections_per_host=4, max_connections=2)
+
+    async def crawl():
+        async with httpx.AsyncClient(transport=transport) as client:
+            async with client.stream('GET', 'https://a.com/'), client.stream('GET', 'https://a.com/about'):
+                other = asyncio.create_task(client.get('https://b.com/'))
+                await asyncio.sleep(0)
+                assert not other.done() and len(opened) == 1  # both connections are a.com's
+            await other  # a.com went idle and was closed to make room
+            assert [pool.closed for pool in opened] == [True, False]
+            await client.get('https://b.com/contact')  # reuses b.com's connection
+            assert transport.stats() == {
+                'hosts': 1, 'pools_opened': 2, 'pools_closed': 1, 'connections': 1, 'waits': 1
+            }
+
+    asyncio.run(crawl())
@@ -0,0 +1,75 @@
+"""
+Checks link normalization (fragments, queries, slashes, http/https, www),
+binary-asset filtering, the priority order of candidate pages and the cap
+on pages ranked
+"""
+from pathlib import Path
+
+from link_ranking import link_score, normalize_link, rank_links
+from page_parser import internal_links, parse_html
+
+PAGES_DIR = Path(__file__).parent / 'test_pages'
+
+
+def test_normalization_and_dedup():
+    assert normalize_link('https://Shop.com:443/Materials/?page=2#top') == 'https://shop.com/Materials'
+    assert normalize_link('https://shop.com/') is None  # the homepage itself
+    assert normalize_link('https://shop.com/files/brochure.PDF') is None
+    assert normalize_link('https://shop.com/v1.2/specs') == 'https://shop.com/v1.2/specs'
+
+    ranked = rank_links([
+        ('http://shop.com/equipment', 'Equipment'),
+        ('https://www.shop.com/equipment/', 'Our machines'),
+        ('https://shop.com//equipment', ''),
+        ('https://shop.com/equipment.jpg', ''),
+    ])
+    assert ranked == ['http://shop.com/equipment']
+
+
+def test_capability_pages_come_first():
+    ranked = rank_links([
+        ('https://shop.com/privacy-policy', 'Privacy'),
+        ('https://shop.com/blog/2021/04/open-house', 'Open house'),
+        ('https://shop.com/contact', 'Contact'),
+        ('https://shop.com/cnc-machining-services', 'CNC Machining'),
+        ('https://shop.com/about-us', 'About'),
+        ('https://shop.com/x', 'Materials we machine'),
+    ])
+    assert ranked[0] == 'https://shop.com/cnc-machining-services'
+    assert ranked.index('https://shop.com/x') < ranked.index('https://shop.com/contact')
+    assert ranked[-2:] == ['https://shop.com/blog/2021/04/open-house', 'https://shop.com/privacy-policy']
+    # Equal scores keep page order
+    assert rank_links([('https://a.com/one', ''), ('https://a.com/two', '')]) == ['https://a.com/one', 'https://a.com/two']
+
+
+def test_spanish_signals_and_accents():
+    assert link_score('/fabricaci%C3%B3n') > 0
+    assert link_score('/x', 'Fabricación de moldes') > link_score('/y', 'Noticias')
+
+
+def test_saved_page_links_ranked():
+    html = (PAGES_DIR / 'precision_machining.html').read_text(encoding='utf-8')
+    links = internal_links(parse_html(html), 'midwestprecision.com')
+
+    assert links[:3] == [
+        'https://midwestprecision.com/capabilities',
+        'https://midwestprecision.com/equipment',
+        'https://midwestprecision.com/materials',
+    ]
+    assert not any(url.endswith('.pdf') for url in links)
+
+
+def test_only_the_first_distinct_pages_are_ranked():
+    consumed = []
+
+    def catalog():
+        for i in range(5000):
+            consumed.append(i)
+            yield f'https://shop.com/products/part-{i % 2500}', 'Part'
+
+    ranked = rank_links(catalog(), limit=100)
+    assert len(ranked) == 100
+    assert len(consumed) == 101  # stopped at the first page past the limit
+    # Repeats of a page are folded in whatever they were linked as
+    assert rank_links([('https://shop.com/x', ''), ('https://shop.com/x/', 'Our equipment'),
+                       ('https://shop.com/y', 'Quality')]) == ['https://shop.com/x', 'https://shop.com/y']
@@ -0,0 +1,80 @@
+"""
+Checks that the single-pass KeywordMatcher finds exactly what the original
+per-term loops in detect_manufacturing found, on the saved pages in test_pages/
+"""
+import random
+import re
+from pathlib import Path
+
+from bs4 import BeautifulSoup
+
+import main
+
+PAGES_DIR = Path(__file__).parent / 'test_pages'
+
+
+def legacy_detect(combined):
+    """The per-term loops detect_manufacturing used before KeywordMatcher"""
+    found = {
+        'keywords': set(),
+        'brands': set(),
+        'plastics': set(),
+        'metals': set()
+    }
+    for term in main.MANUFACTURING_TERMS:
+        if term in combined:
+            found['keywords'].add(term)
+    for brand in main.BRANDS:
+        if re.search(r'\b' + re.escape(brand) + r'\b', combined, re.IGNORECASE):
+            found['brands'].add(brand)
+    for p in main.PLASTICS:
+        if re.search(r'\b' + re.escape(p) + r'\b', combined, re.IGNORECASE):
+            found['plastics'].add(p)
+    for m in main.METALS:
+        if re.search(r'\b' + re.escape(m) + r'\b', combined, re.IGNORECASE):
+            found['metals'].add(m)
+    return found
+
+
+def page_text(html, url):
+    """Same text preparation as detect_manufacturing"""
+    soup = BeautifulSoup(html, 'html.parser')
+    for tag in soup(['script', 'style']):
+        tag.decompose()
+    return soup.get_text().lower() + ' ' + url.lower()
+
+
+def test_saved_pages_match_legacy_output():
+    pages = sorted(PAGES_DIR.glob('*.html'))
+    assert pages, 'no saved pages found'
+    for path in pages:
+        url = f'https://example.com/{path.stem}'
+        html = path.read_text(encoding='utf-8')
+        expected = legacy_detect(page_text(html, url))
+        assert main.detect_manufacturing(html, url) == expected, path.name
+
+
+def test_word_boundaries_and_overlaps():
+    samples = [
+        'stainless steels and stainless steel, 304l/316l',
+        'abs-plastic _abs abs_ pc/abs pa6/6 nylon 6/6 r-pet pets',
+        "han's laser, hans laser and mazak optonics; dmg mori",
+        'cnc milling of milled molds, over-molded 2k parts',
+        'ſan and ſteel with a long s, k-resin with a kelvin sign',
+        'fundición a presión, moldeo por inyección, corte láser',
+        '',
+    ]
+    for text in samples:
+        assert main.MATCHER.match(text.lower()) == legacy_detect(text.lower()), text
+
+
+def test_random_term_soup():
+    # Terms glued together with assorted separators, so terms overlap,
+    # nest and sit on (or just off) word boundaries
+    rng = random.Random(1234)
+    vocabulary = main.MANUFACTURING_TERMS + main.BRANDS + main.PLASTICS + main.METALS
+    separators = [' ', '', '-', '/', '_', '.', ', ', "'", 'x', '9', 'é', 'ſ']
+    for _ in range(100):
+        pieces = [rng.choice(vocabulary) + rng.choice(separators) for _ in range(rng.randint(1, 12))]
+        text = ''.join(pieces).lower()
+        assert main.MATCHER.match(text) == legacy_detect(text), text
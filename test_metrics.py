@@ -0,0 +1,70 @@
+"""
+Checks the metrics endpoint (Prometheus text format) and the per-domain
+JSON lines written for a crawl
+"""
+import asyncio
+import json
+import urllib.request
+
+import httpx
+
+import main
+from dns_prefilter import DnsPrefilter, StubResolver
+from metrics import Histogram, Metrics
+from result_sink import ResultSink
+
+
+def test_histogram_buckets_are_cumulative():
+    histogram = Histogram(buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.7, 3.0):
+        histogram.observe(value)
+
+    assert histogram.snapshot() == ([1, 3], 4.25, 4)
+
+
+def test_endpoint_serves_prometheus_text():
+    metrics = Metrics()
+    metrics.counter('pages_total', 'Pages', lambda: 12)
+    metrics.observe('fetch_seconds', 0.2, phase='ttfb')
+    port = metrics.serve(0)
+    try:
+        with urllib.request.urlopen(f'http://127.0.0.1:{port}/metrics') as response:
+            text = response.read().decode()
+    finally:
+        metrics.close()
+
+    assert 'scraper_pages_total 12' in text
+    assert 'scraper_fetch_seconds_bucket{phase="ttfb",le="0.25"} 1' in text
+    assert 'scraper_fetch_seconds_bucket{phase="ttfb",le="+Inf"} 1' in text
+    assert 'scraper_fetch_seconds_count{phase="ttfb"} 1' in text
+    assert 'scraper_process_resident_memory_bytes ' in text
+
+
+def test_crawl_writes_one_json_line_per_domain(tmp_path, monkeypatch):
+    home = '<html><body><p>CNC machining</p><a href="/about">About</a></body></html>'
+
+    def handler(request):
+        return httpx.Response(200, text=home, headers={'content-type': 'text/html'})
+
+    metrics = Metrics()
+    metrics.open_log(tmp_path / 'domains.jsonl')
+    monkeypatch.setattr(main, 'metrics', metrics)
+    monkeypatch.setattr(main, 'dns_prefilter', DnsPrefilter(StubResolver({'shop.com': ['192.0.2.1']})))
+    monkeypatch.setattr(main.random, 'uniform', lambda a, b: 0)
+
+    async def crawl():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as session, \
+                ResultSink(lambda rows: None, log=lambda msg: None) as sink:
+            await main.crawl_tracked('shop.com', session, sink)
+            await main.crawl_tracked('gone.com', session, sink)
+
+    asyncio.run(crawl())
+    metrics.close()
+
+    shop, gone = [json.loads(line) for line in open(tmp_path / 'domains.jsonl')]
+    assert (shop['domain'], shop['status'], shop['pages']) == ('shop.com', 'completed', 2)
+    assert shop['bytes'] == 2 * len(home)
+    assert {'dns', 'body', 'parse', 'match'} <= set(shop['seconds'])
+    assert gone['status'] == 'no_dns' and 'body' not in gone['seconds']
+    assert metrics.in_flight == 0
+    assert 'scraper_domain_seconds_count 2' in metrics.render()
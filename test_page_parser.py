@@ -0,0 +1,75 @@
+"""
+Checks that the single lxml parse gives the same text and links as the
+two BeautifulSoup html.parser passes it replaced, on the saved pages in test_pages/
+(links compared after link_ranking's normalization)
+"""
+from pathlib import Path
+from urllib.parse import urlparse
+
+from bs4 import BeautifulSoup
+
+import main
+from link_ranking import link_key
+from page_parser import parse_html, visible_text, internal_links
+
+PAGES_DIR = Path(__file__).parent / 'test_pages'
+BASE_DOMAIN = 'midwestprecision.com'
+
+
+def legacy_links(html, base_domain):
+    """The BeautifulSoup link walk extract_internal_links used before page_parser"""
+    soup = BeautifulSoup(html, 'html.parser')
+    links = []
+    for a_tag in soup.find_all('a', href=True):
+        href = a_tag['href'].strip()
+        if not href or href.startswith(('#', 'javascript:', 'mailto:', 'tel:')):
+            continue
+        if href.startswith('/'):
+            url = f'https://{base_domain}{href}'
+        elif href.startswith('http'):
+            url = href
+        else:
+            continue
+        parsed = urlparse(url)
+        if parsed.netloc.replace('www.', '') == base_domain.replace('www.', ''):
+            links.append(f"{parsed.scheme}://{parsed.netloc}{parsed.path}")
+    return set(links)
+
+
+def legacy_text(html):
+    soup = BeautifulSoup(html, 'html.parser')
+    for tag in soup(['script', 'style']):
+        tag.decompose()
+    return soup.get_text()
+
+
+def test_same_links_and_words_as_beautifulsoup():
+    for path in sorted(PAGES_DIR.glob('*.html')):
+        html = path.read_text(encoding='utf-8')
+        root = parse_html(html)
+        links = internal_links(root, BASE_DOMAIN)
+        assert len(links) == len({link_key(url) for url in links}), path.name
+        assert {link_key(url) for url in links} == {link_key(url) for url in legacy_links(html, BASE_DOMAIN)} - {None}, path.name
+        # Whitespace between blocks differs between the parsers; the words do not
+        assert visible_text(root).split() == legacy_text(html).split(), path.name
+
+
+def test_analyze_page_single_pass():
+    html = (PAGES_DIR / 'precision_machining.html').read_text(encoding='utf-8')
+    url = f'https://{BASE_DOMAIN}'
+    indicators, links = main.analyze_page(html, url, BASE_DOMAIN)
+    assert indicators == main.detect_manufacturing(html, url)
+    assert links == internal_links(parse_html(html), BASE_DOMAIN)
+    assert 'haas' in indicators['brands']
+    assert 'https://midwestprecision.com/equipment' in links
+    # Script/style content is not matched
+    assert 'injection molding' not in indicators['keywords']
+
+
+def test_empty_and_odd_documents():
+    assert parse_html('') is None
+    assert visible_text(parse_html('   ')) == ''
+    assert internal_links(None, BASE_DOMAIN) == []
+    root = parse_html('<?xml version="1.0" encoding="ISO-8859-1"?><p>CNC <a href="/x">x</a></p>')
+    assert 'CNC' in visible_text(root)
+    assert internal_links(root, BASE_DOMAIN) == ['https://midwestprecision.com/x']
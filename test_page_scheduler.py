@@ -0,0 +1,136 @@
+"""
+Checks PageScheduler's parallelism bound, per-host pacing and circuit breakers
+using fake fetches (no network)
+"""
+import asyncio
+
+from page_scheduler import PageScheduler, STOP_FAILURES, STOP_SATURATED, STOP_TIMEOUT
+from rate_limits import HostRateLimiter, RetryLater
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_bounded_parallelism_and_all_results():
+    in_flight = 0
+    peak = 0
+
+    async def fetch(url):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.02)
+        in_flight -= 1
+        return {'url': url}
+
+    urls = [f'https://a.com/{i}' for i in range(10)]
+    scheduler = PageScheduler(fetch, max_in_flight=3, host_delay=0)
+    results, stop_reason = run(scheduler.run(urls))
+
+    assert stop_reason is None
+    assert sorted(r['url'] for r in results) == sorted(urls)
+    assert peak == 3
+
+
+def test_host_delay_spaces_request_starts():
+    starts = []
+
+    async def fetch(url):
+        starts.append(asyncio.get_running_loop().time())
+        return {'url': url}
+
+    scheduler = PageScheduler(fetch, max_in_flight=4, host_delay=0.05)
+    run(scheduler.run([f'https://a.com/{i}' for i in range(4)]))
+
+    gaps = [b - a for a, b in zip(starts, starts[1:])]
+    assert all(gap >= 0.04 for gap in gaps), gaps
+
+
+def test_failure_breaker_cancels_in_flight():
+    cancelled = []
+
+    async def fetch(url):
+        if 'slow' in url:
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.append(url)
+                raise
+        if 'bad' in url:
+            raise ValueError('boom')
+        return None
+
+    urls = ['https://a.com/slow', 'https://a.com/bad1', 'https://a.com/bad2', 'https://a.com/none']
+    scheduler = PageScheduler(fetch, max_in_flight=4, host_delay=0, max_consecutive_failures=3)
+    results, stop_reason = run(asyncio.wait_for(scheduler.run(urls), timeout=2))
+
+    assert results == []
+    assert stop_reason == STOP_FAILURES
+    assert cancelled == ['https://a.com/slow']
+
+
+def test_time_budget_cancels_in_flight():
+    async def fetch(url):
+        if 'slow' in url:
+            await asyncio.sleep(10)
+        return {'url': url}
+
+    urls = ['https://a.com/fast', 'https://a.com/slow', 'https://a.com/slow2']
+    scheduler = PageScheduler(fetch, max_in_flight=2, host_delay=0, time_budget=0.1)
+    results, stop_reason = run(asyncio.wait_for(scheduler.run(urls), timeout=2))
+
+    assert [r['url'] for r in results] == ['https://a.com/fast']
+    assert stop_reason == STOP_TIMEOUT
+
+
+def test_retry_is_requeued_without_holding_a_slot():
+    calls = []
+
+    async def fetch(url):
+        calls.append(url)
+        if url.endswith('/busy') and calls.count(url) == 1:
+            return RetryLater('unavailable', retry_after=0.2)
+        await asyncio.sleep(0.05)
+        return {'url': url}
+
+    urls = ['https://a.com/busy'] + [f'https://a.com/{i}' for i in range(3)]
+    scheduler = PageScheduler(fetch, max_in_flight=1, host_delay=0)
+    results, stop_reason = run(scheduler.run(urls))
+
+    # The single slot served the other pages while /busy waited out its Retry-After
+    assert [r['url'] for r in results] == urls[1:] + ['https://a.com/busy']
+    assert stop_reason is None
+    assert scheduler.retries == 1
+
+
+def test_exhausted_retries_count_as_failures():
+    limiter = HostRateLimiter(rate=100)
+
+    async def fetch(url):
+        return RetryLater('rate_limited', retry_after=0, max_retries=2, throttle=True)
+
+    scheduler = PageScheduler(fetch, max_in_flight=2, max_consecutive_failures=2,
+                              limiter=limiter, backoff_base=0.01)
+    results, stop_reason = run(asyncio.wait_for(scheduler.run(['https://a.com/1', 'https://a.com/2']), timeout=2))
+
+    assert results == []
+    assert stop_reason == STOP_FAILURES
+    assert scheduler.attempts == {'https://a.com/1': 2, 'https://a.com/2': 2}
+    # Every 429 halved the host's rate
+    assert limiter.host_rate('a.com') == 100 / 2 ** 6
+
+
+def test_should_stop_ends_the_run_and_counts_skipped_urls():
+    async def fetch(url):
+        await asyncio.sleep(0.01 if url.endswith('/0') else 10)
+        return {'url': url}
+
+    urls = [f'https://a.com/{i}' for i in range(6)]
+    scheduler = PageScheduler(fetch, max_in_flight=2, host_delay=0, should_stop=lambda: True)
+    results, stop_reason = run(asyncio.wait_for(scheduler.run(urls), timeout=2))
+
+    assert [r['url'] for r in results] == ['https://a.com/0']
+    assert stop_reason == STOP_SATURATED
+    # One still in flight (cancelled) and four never started
+    assert scheduler.skipped == 5
@@ -0,0 +1,95 @@
+"""
+Checks the on-disk page store (round trip, latest copy wins, several writers,
+crash-truncated index) and that --reextract picks up new vocabulary from
+the latest crawl's stored pages without any network, writing to the rows the
+domain was claimed as except ones another worker holds
+"""
+import asyncio
+import json
+
+import httpx
+
+import main
+from dns_prefilter import DnsPrefilter, StubResolver
+from matcher import KeywordMatcher
+from page_store import PageStore
+from result_sink import ResultSink
+from work_claims import LocalClaimStore
+
+
+def test_pages_round_trip_and_latest_copy_wins(tmp_path):
+    with PageStore(tmp_path, segment_max_bytes=1) as store:
+        store.put('a.com', 'https://a.com', '<p>v1 ✓</p>', homepage=True, etag='"1"')
+        store.put('a.com', 'https://a.com/x', '<p>x</p>' * 50)
+        store.put('a.com', 'https://a.com', '<p>v2 ✓</p>', homepage=True, etag='"2"')
+        assert store.get('https://a.com') == '<p>v2 ✓</p>'
+
+    # A second writer in the same directory, and a crash mid-way through an index line
+    with PageStore(tmp_path) as other:
+        other.put('b.com', 'https://b.com', '<p>b</p>')
+    with open(next(tmp_path.glob(f'{other.writer}.idx')), 'a') as f:
+        f.write('{"url": "https://b.com/cut')
+
+    reopened = PageStore(tmp_path)
+    assert reopened.get('https://a.com') == '<p>v2 ✓</p>'
+    assert reopened.index['https://a.com']['etag'] == '"2"'
+    assert reopened.get('https://a.com/x') == '<p>x</p>' * 50
+    assert reopened.get('https://b.com') == '<p>b</p>'
+    assert sorted(reopened.domains()) == ['a.com', 'b.com']
+    assert len(list(tmp_path.glob('*.seg'))) == 4
+
+
+def test_reextract_applies_new_terms_without_fetching(tmp_path, monkeypatch):
+    home = '<html><body><p>CNC machining</p><a href="/materials">Materials</a></body></html>'
+    materials = '<html><body><p>We machine unobtanium and stainless steel</p></body></html>'
+
+    def handler(request):
+        body = materials if request.url.path == '/materials' else home
+        return httpx.Response(200, text=body, headers={'content-type': 'text/html'})
+
+    store = LocalClaimStore()
+    store.add_domains(['www.Shop.com', 'https://shop.com/', 'b.com'])
+    monkeypatch.setattr(main, 'claim_store', store)
+    monkeypatch.setattr(main, 'claimed_keys', {})
+    monkeypatch.setattr(main, 'page_store', PageStore(tmp_path))
+    monkeypatch.setattr(main, 'dns_prefilter', DnsPrefilter(StubResolver({'shop.com': ['192.0.2.1']})))
+    monkeypatch.setattr(main.random, 'uniform', lambda a, b: 0)
+    monkeypatch.setattr(main, 'performance_stats', {**main.performance_stats, 'rows_leased': 0})
+
+    # A page an older crawl stored, which the site no longer links to
+    main.page_store.put('shop.com', 'https://shop.com/retired', '<p>titanium</p>')
+
+    async def crawl():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as session, \
+                ResultSink(lambda rows: None, log=lambda msg: None) as sink:
+            await main.crawl_domain('https://shop.com', session, sink)
+
+    assert main.get_pending_domains(10, 'w1') == ['shop.com', 'b.com']
+    asyncio.run(crawl())
+    assert len(main.page_store.index) == 3
+    # One row was finished; another worker has re-claimed the other one
+    store.write_rows([{'domain': 'www.Shop.com', 'website_scrape_status': 'completed'}])
+    store.db.execute("UPDATE domains SET website_worker_id = 'w2', website_lease_expires_at = ? "
+                     "WHERE domain = 'https://shop.com/'", (store.clock() + 600,))
+
+    # New vocabulary, a new process (no claims), and no network: re-extraction only reads the store
+    monkeypatch.setattr(main, 'MATCHER', KeywordMatcher(
+        main.MANUFACTURING_TERMS, main.BRANDS, main.PLASTICS, main.METALS + ['unobtanium']
+    ))
+    monkeypatch.setattr(main, 'make_session', None)
+    monkeypatch.setattr(main, 'claimed_keys', {})
+    monkeypatch.setattr(main, 'page_store', PageStore(tmp_path))
+
+    asyncio.run(main.reextract_stored_pages())
+
+    rows = dict(store.db.execute('SELECT domain, website_metals FROM domains').fetchall())
+    metals = rows['www.Shop.com'].split(',')
+    assert 'unobtanium' in metals
+    assert 'titanium' not in metals  # only the latest crawl's pages, not the retired one
+    assert rows['https://shop.com/'] is None  # leased to w2: left alone
+    assert main.performance_stats['rows_leased'] == 1
+    [scraped_at] = store.db.execute("SELECT website_scraped_at FROM domains WHERE domain = 'www.Shop.com'").fetchone()
+    assert scraped_at is None
+    pages = json.loads(store.db.execute(
+        "SELECT website_pages FROM domains WHERE domain = 'www.Shop.com'").fetchone()[0])
+    assert sorted(pages) == ['https://shop.com', 'https://shop.com/materials']
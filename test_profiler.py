@@ -0,0 +1,46 @@
+"""
+Checks --profile: the pstats file, stage-tagged collapsed stacks, and
+stopping after the first N domains
+"""
+import asyncio
+import pstats
+
+import httpx
+
+import main
+from dns_prefilter import DnsPrefilter, StubResolver
+from profiler import CrawlProfiler
+from result_sink import ResultSink
+
+PAGE = '<html><body>' + '<p>CNC machining in stainless steel, ABS and PEEK</p>' * 20000 + '</body></html>'
+
+
+def test_profiles_first_domains_with_stage_tags(tmp_path, monkeypatch):
+    def handler(request):
+        return httpx.Response(200, text=PAGE, headers={'content-type': 'text/html'})
+
+    monkeypatch.setattr(main, 'dns_prefilter', DnsPrefilter(StubResolver({'a.com': ['192.0.2.1'], 'b.com': ['192.0.2.2']})))
+    monkeypatch.setattr(main.random, 'uniform', lambda a, b: 0)
+    profiler = CrawlProfiler(str(tmp_path / 'run'), domains=1, interval=0.001, log=lambda msg: None)
+    monkeypatch.setattr(main, 'profiler', profiler)
+
+    async def crawl():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as session, \
+                ResultSink(lambda rows: None, log=lambda msg: None) as sink:
+            await main.crawl_tracked('a.com', session, sink)
+            assert not profiler.running  # stopped after the first domain
+            await main.crawl_tracked('b.com', session, sink)
+
+    profiler.start()
+    asyncio.run(crawl())
+    profiler.stop()  # already stopped: no-op
+
+    functions = {function for _, _, function in pstats.Stats(str(tmp_path / 'run.pstats')).stats}
+    assert 'parse_html' in functions and 'match_text' in functions
+
+    lines = (tmp_path / 'run.collapsed').read_text().splitlines()
+    stages = {line.split(';', 1)[0] for line in lines}
+    assert {'parse', 'match'} & stages
+    stack, count = lines[0].rsplit(' ', 1)
+    assert int(count) > 0 and 'main.py:page_from_response' in '\n'.join(lines)
+    assert profiler.domains_done == 2
@@ -0,0 +1,70 @@
+"""
+Checks the retry policy (Retry-After parsing, jittered backoff) and the
+adaptive per-host rate limiter
+"""
+import asyncio
+from email.utils import format_datetime
+from datetime import datetime, timezone
+
+from rate_limits import HostRateLimiter, backoff_delay, parse_retry_after
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_parse_retry_after():
+    now = 1_700_000_000
+    http_date = format_datetime(datetime.fromtimestamp(now + 30, timezone.utc), usegmt=True)
+
+    assert parse_retry_after('120') == 120.0
+    assert parse_retry_after(http_date, now=now) == 30.0
+    assert parse_retry_after(None) is None
+    assert parse_retry_after('soon') is None
+
+
+def test_backoff_is_jittered_exponential_unless_retry_after():
+    assert backoff_delay(0, rng=lambda: 0.0) == 0.5
+    assert backoff_delay(3, rng=lambda: 1.0) == 8.0
+    assert backoff_delay(10, cap=60.0, rng=lambda: 1.0) == 60.0
+    assert backoff_delay(0, retry_after=7) == 7
+    assert backoff_delay(0, retry_after=3600, cap=60.0) == 60.0
+
+
+def test_429_slows_the_host_down_and_successes_recover_it():
+    clock = FakeClock()
+    limiter = HostRateLimiter(rate=4.0, min_rate=0.5, recovery=1.0, clock=clock)
+
+    limiter.throttle('a.com', retry_after=10)
+    assert limiter.host_rate('a.com') == 2.0
+    limiter.throttle('a.com')
+    limiter.throttle('a.com')
+    assert limiter.host_rate('a.com') == 0.5
+    assert limiter.host_rate('b.com') == 4.0
+
+    for _ in range(4):
+        limiter.succeed('a.com')
+    assert limiter.host_rate('a.com') == 4.0
+
+
+def test_retry_after_pauses_the_host():
+    limiter = HostRateLimiter(rate=100.0)
+
+    async def scenario():
+        loop = asyncio.get_running_loop()
+        await limiter.acquire('a.com')
+        limiter.throttle('a.com', retry_after=0.2)
+        start = loop.time()
+        await limiter.acquire('a.com')
+        paused = loop.time() - start
+        start = loop.time()
+        await limiter.acquire('b.com')
+        return paused, loop.time() - start
+
+    paused, other_host = asyncio.run(scenario())
+    assert paused >= 0.19
+    assert other_host < 0.05
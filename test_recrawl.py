@@ -0,0 +1,94 @@
+"""
+Checks incremental re-crawls: stale finished domains are claimable again, and
+a second crawl reuses the stored analysis for pages answering 304 or with an
+unchanged body, and a page's history keeps only the links a crawl follows
+"""
+import asyncio
+
+import httpx
+
+import main
+from dns_prefilter import DnsPrefilter, StubResolver
+from page_history import page_record
+from result_sink import ResultSink
+from work_claims import LocalClaimStore
+
+HOME = '<html><body><p>CNC machining</p><a href="/parts">Parts</a><a href="/news">News</a></body></html>'
+PARTS = '<html><body><p>Injection molding in ABS</p></body></html>'
+
+
+def test_stale_domains_are_claimed_with_their_page_history():
+    store = LocalClaimStore()
+    store.add_domains(['old.com', 'fresh.com', 'new.com'])
+    store.write_rows([
+        {'domain': 'old.com', 'website_scrape_status': 'completed', 'website_scraped_at': '2026-01-01T00:00:00',
+         'website_pages': {'https://old.com': {'etag': '"v1"'}}},
+        {'domain': 'fresh.com', 'website_scrape_status': 'no_keywords', 'website_scraped_at': '2026-10-01T00:00:00'},
+    ])
+
+    assert store.claim('w1', 10, 600) == ['new.com']
+    assert store.claim('w1', 10, 600, stale_before='2026-09-01T00:00:00') == ['old.com']
+    assert store.page_history(['old.com', 'fresh.com']) == {'old.com': {'https://old.com': {'etag': '"v1"'}}}
+
+
+def test_second_crawl_reuses_unchanged_pages(monkeypatch):
+    monkeypatch.setattr(main, 'dns_prefilter', DnsPrefilter(StubResolver({'shop.com': ['192.0.2.1']})))
+    monkeypatch.setattr(main, 'HOST_REQUEST_DELAY', 0)
+    monkeypatch.setattr(main.random, 'uniform', lambda a, b: 0)
+    conditional = []
+
+    def handler(request):
+        conditional.append(request.headers.get('if-none-match'))
+        if request.url.path in ('', '/'):
+            if request.headers.get('if-none-match') == '"home-v1"':
+                return httpx.Response(304)
+            return httpx.Response(200, text=HOME, headers={'content-type': 'text/html', 'etag': '"home-v1"'})
+        body = PARTS if request.url.path == '/parts' else '<p>Company news</p>'
+        return httpx.Response(200, text=body, headers={'content-type': 'text/html'})
+
+    async def crawl():
+        saved = []
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as session, \
+                ResultSink(saved.extend, log=lambda msg: None) as sink:
+            await main.crawl_domain('https://shop.com', session, sink)
+        return saved[0]
+
+    first = asyncio.run(crawl())
+    assert set(first['website_pages']) == {'https://shop.com', 'https://shop.com/parts', 'https://shop.com/news'}
+
+    analyzed = main.performance_stats['pages_analyzed']
+    not_modified = main.performance_stats['pages_not_modified']
+    unchanged = main.performance_stats['pages_unchanged']
+    conditional.clear()
+
+    main.previous_crawls['shop.com'] = first['website_pages']
+    second = asyncio.run(crawl())
+
+    assert conditional[0] == '"home-v1"'
+    assert main.performance_stats['pages_analyzed'] == analyzed
+    assert main.performance_stats['pages_not_modified'] == not_modified + 1
+    assert main.performance_stats['pages_unchanged'] == unchanged + 2
+    for column in ('website_keywords', 'website_brands', 'website_plastics', 'website_metals'):
+        assert sorted(second[column] or []) == sorted(first[column] or [])
+    assert second['website_pages'] == first['website_pages']
+
+
+def test_skipped_domains_drop_their_page_history(monkeypatch):
+    monkeypatch.setattr(main, 'dns_prefilter', DnsPrefilter(StubResolver({})))
+    monkeypatch.setattr(main.random, 'uniform', lambda a, b: 0)
+    monkeypatch.setattr(main, 'previous_crawls', {'gone.com': {'https://gone.com': {'etag': '"v1"'}}})
+
+    async def crawl():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(lambda request: httpx.Response(500))) as session, \
+                ResultSink(lambda rows: None, log=lambda msg: None) as sink:
+            return await main.crawl_domain('https://gone.com', session, sink)
+
+    assert asyncio.run(crawl())['website_scrape_status'] == 'no_dns'
+    assert main.previous_crawls == {}
+
+
+def test_history_keeps_only_the_links_a_crawl_follows():
+    links = [f'https://shop.com/products/part-{i}' for i in range(1000)]
+    record = page_record({'indicators': {'keywords': {'cnc'}}, 'links': links}, max_links=15)
+    assert record['links'] == links[:15]
+    assert 'links' not in page_record({'indicators': {}, 'links': []}, max_links=15)
@@ -0,0 +1,109 @@
+"""
+Checks that ResultSink buffers results into bulk writes off the event loop,
+retries failed flushes and never drops queued work on close or cancellation
+"""
+import asyncio
+import time
+
+from result_sink import ResultSink
+
+
+def quiet(msg):
+    pass
+
+
+def test_results_are_bulk_written_by_size_and_on_close():
+    batches = []
+
+    def write_rows(rows):
+        time.sleep(0.02)  # a synchronous database call
+        batches.append(rows)
+
+    async def scenario():
+        async with ResultSink(write_rows, flush_size=4, flush_interval=60, log=quiet) as sink:
+            for i in range(10):
+                await sink.put(f'd{i}.com', {'website_scrape_status': 'completed'})
+        return sink.stats()
+
+    stats = asyncio.run(scenario())
+
+    assert [len(b) for b in batches] == [4, 4, 2]
+    assert [row['domain'] for b in batches for row in b] == [f'd{i}.com' for i in range(10)]
+    assert stats['rows_written'] == 10
+    assert stats['requests'] == 3
+    assert stats['queue_depth'] == 0 and stats['buffered'] == 0
+    assert stats['avg_write_ms'] >= 15
+
+
+def test_interval_flush_and_loop_not_blocked():
+    batches = []
+
+    def write_rows(rows):
+        time.sleep(0.05)
+        batches.append(rows)
+
+    async def scenario():
+        ticks = 0
+        async with ResultSink(write_rows, flush_size=100, flush_interval=0.05, log=quiet) as sink:
+            await sink.put('a.com', {'website_scrape_status': 'completed'})
+            for _ in range(30):
+                await asyncio.sleep(0.005)
+                ticks += 1
+            flushed_before_close = len(batches)
+        return ticks, flushed_before_close
+
+    ticks, flushed_before_close = asyncio.run(scenario())
+    assert flushed_before_close == 1
+    assert ticks == 30
+
+
+def test_rows_with_different_columns_share_one_write():
+    batches = []
+
+    async def scenario():
+        async with ResultSink(batches.append, log=quiet) as sink:
+            await sink.put('a.com', {'website_scrape_status': 'timeout', 'website_scraped_at': 't'})
+            await sink.put('b.com', {'website_scrape_status': 'completed', 'website_scraped_at': 't',
+                                     'website_keywords': ['cnc']})
+            await sink.put('c.com', {'website_scrape_status': 'error', 'website_scraped_at': 't'})
+
+    asyncio.run(scenario())
+    assert [[row['domain'] for row in batch] for batch in batches] == [['a.com', 'b.com', 'c.com']]
+    assert 'website_keywords' not in batches[0][0]  # a timeout row still only carries its status
+
+
+def test_transient_failures_are_retried():
+    calls = []
+
+    def flaky(rows):
+        calls.append(len(rows))
+        if len(calls) < 3:
+            raise ConnectionError('db down')
+
+    async def scenario():
+        async with ResultSink(flaky, retry_delay=0.01, log=quiet) as sink:
+            await sink.put('a.com', {'website_scrape_status': 'completed'})
+        return sink.stats()
+
+    stats = asyncio.run(scenario())
+    assert calls == [1, 1, 1]
+    assert stats['retries'] == 2
+    assert stats['rows_written'] == 1 and stats['rows_failed'] == 0
+
+
+def test_cancelled_run_still_flushes_on_exit():
+    batches = []
+
+    async def batch():
+        async with ResultSink(batches.append, flush_interval=60, log=quiet) as sink:
+            await sink.put('a.com', {'website_scrape_status': 'completed'})
+            await asyncio.sleep(10)  # interrupted mid-batch (Ctrl-C cancels the main task)
+
+    async def scenario():
+        task = asyncio.create_task(batch())
+        await asyncio.sleep(0.01)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+    asyncio.run(scenario())
+    assert [row['domain'] for b in batches for row in b] == ['a.com']
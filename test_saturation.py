@@ -0,0 +1,83 @@
+"""
+Checks the adaptive crawl depth: a domain stops once its pages stop adding
+indicators (or a target is reached), and audited domains record the
+stopping point without stopping
+"""
+import asyncio
+
+import httpx
+
+import main
+from dns_prefilter import DnsPrefilter, StubResolver
+from result_sink import ResultSink
+from saturation import Saturation
+
+
+def test_patience_target_and_audit():
+    saturation = Saturation(found=3, patience=2)
+    saturation.add(1)
+    saturation.add(0)
+    assert not saturation.should_stop()
+    saturation.add(0)
+    assert saturation.should_stop()
+
+    assert Saturation(found=10, patience=0, target=10).should_stop()
+    assert not Saturation(found=9, patience=0, target=10).should_stop()
+
+    audited = Saturation(found=2, patience=1, audit=True)
+    audited.add(0)
+    assert not audited.should_stop()
+    audited.add(4)
+    audited.should_stop()
+    assert (audited.found_at_stop, audited.pages_at_stop, audited.found) == (2, 1, 6)
+
+
+def crawl_shop(monkeypatch, patience, audit_rate=0.0):
+    links = ''.join(f'<a href="/products/p{i}">Product {i}</a>' for i in range(10))
+    home = f'<html><body><p>CNC machining</p>{links}</body></html>'
+    fetched = []
+
+    def handler(request):
+        fetched.append(request.url.path)
+        if request.url.path == '/':
+            return httpx.Response(200, text=home, headers={'content-type': 'text/html'})
+        # Only the last page names something new
+        text = 'titanium' if request.url.path == '/products/p9' else 'CNC machining'
+        return httpx.Response(200, text=f'<p>{text}</p>', headers={'content-type': 'text/html'})
+
+    monkeypatch.setattr(main, 'dns_prefilter', DnsPrefilter(StubResolver({'shop.com': ['192.0.2.1']})))
+    monkeypatch.setattr(main.random, 'uniform', lambda a, b: 0)
+    monkeypatch.setattr(main, 'SATURATION_PATIENCE', patience)
+    monkeypatch.setattr(main, 'SATURATION_AUDIT_RATE', audit_rate)
+    monkeypatch.setattr(main, 'MAX_PAGES_IN_FLIGHT', 1)
+    monkeypatch.setattr(main, 'HOST_REQUEST_DELAY', 0)
+    monkeypatch.setattr(main, 'host_limiter', main.HostRateLimiter(rate=None))
+    monkeypatch.setattr(main, 'performance_stats', {**main.performance_stats, **{
+        key: 0 for key in ('domains_saturated', 'pages_saved', 'saturation_audits',
+                           'audit_found_at_stop', 'audit_found_total')}})
+
+    async def crawl():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as session, \
+                ResultSink(lambda rows: None, log=lambda msg: None) as sink:
+            return await main.crawl_domain('https://shop.com', session, sink)
+
+    return asyncio.run(crawl()), fetched
+
+
+def test_dry_pages_stop_the_crawl(monkeypatch):
+    result, fetched = crawl_shop(monkeypatch, patience=3)
+
+    assert len([path for path in fetched if path.startswith('/products/')]) == 3
+    assert main.performance_stats['domains_saturated'] == 1
+    assert main.performance_stats['pages_saved'] == 7
+    assert result['website_scrape_status'] == 'completed'
+
+
+def test_audited_domain_is_crawled_in_full(monkeypatch):
+    result, fetched = crawl_shop(monkeypatch, patience=3, audit_rate=1.0)
+
+    assert len([path for path in fetched if path.startswith('/products/')]) == 10
+    assert 'titanium' in result['website_metals']
+    stats = main.performance_stats
+    assert stats['domains_saturated'] == 0
+    assert (stats['saturation_audits'], stats['audit_found_at_stop']) == (1, stats['audit_found_total'] - 1)
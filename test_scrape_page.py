@@ -0,0 +1,71 @@
+"""
+Checks that scrape_page streams bodies: oversized pages are cut at
+MAX_PAGE_BYTES, and non-HTML responses are skipped without reading the body
+"""
+import asyncio
+
+import httpx
+
+import main
+
+PAGE = '<html><body><p>CNC machining in aluminum.</p><a href="/about">About</a></body></html>'
+
+
+def scrape(handler, url='https://shop.example/'):
+    async def scenario():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as session:
+            return await main.scrape_page(url, session, base_domain='shop.example')
+    return asyncio.run(scenario())
+
+
+def test_html_page_is_analyzed():
+    result = scrape(lambda request: httpx.Response(200, text=PAGE, headers={'content-type': 'text/html; charset=utf-8'}))
+
+    assert result['indicators']['keywords'] == {'cnc', 'cnc machining', 'machining'}
+    assert result['indicators']['metals'] == {'aluminum'}
+    assert result['links'] == ['https://shop.example/about']
+
+
+def test_oversized_page_is_truncated(monkeypatch):
+    monkeypatch.setattr(main, 'MAX_PAGE_BYTES', 4096)
+    # The vocabulary past the cap must not be seen
+    body = PAGE.replace('</body>', '<p>' + 'x' * 8192 + ' injection molding</p></body>')
+    before = dict(main.performance_stats)
+
+    result = scrape(lambda request: httpx.Response(200, text=body, headers={'content-type': 'text/html'}))
+
+    assert 'cnc' in result['indicators']['keywords']
+    assert 'injection molding' not in result['indicators']['keywords']
+    assert main.performance_stats['pages_truncated'] == before['pages_truncated'] + 1
+    assert main.performance_stats['bytes_downloaded'] == before['bytes_downloaded'] + 4096
+
+
+def test_page_of_exactly_the_cap_is_not_truncated(monkeypatch):
+    monkeypatch.setattr(main, 'MAX_PAGE_BYTES', 4096)
+    exact = PAGE.replace('</body>', '<p>' + 'x' * (4096 - len(PAGE) - 7) + '</p></body>')
+    assert len(exact) == 4096
+
+    for body, truncated in ((exact, 0), (exact + ' ', 1)):
+        before = main.performance_stats['pages_truncated']
+        scrape(lambda request: httpx.Response(200, text=body, headers={'content-type': 'text/html'}))
+        assert main.performance_stats['pages_truncated'] == before + truncated
+
+
+def test_non_html_response_is_skipped():
+    before = main.performance_stats['pages_skipped']
+    analyzed = main.performance_stats['pages_analyzed']
+
+    result = scrape(lambda request: httpx.Response(200, content=b'%PDF-1.7 CNC machining',
+                                                   headers={'content-type': 'application/pdf'}))
+
+    assert result['links'] == []
+    assert all(not found for found in result['indicators'].values())
+    assert main.performance_stats['pages_skipped'] == before + 1
+    assert main.performance_stats['pages_analyzed'] == analyzed
+
+
+def test_rate_limited_page_is_returned_for_retry():
+    result = scrape(lambda request: httpx.Response(429, headers={'retry-after': '12'}))
+
+    assert isinstance(result, main.RetryLater)
+    assert (result.reason, result.retry_after, result.throttle) == ('rate_limited', 12.0, True)
@@ -0,0 +1,189 @@
+"""
+Checks robots.txt rules, streamed (gzip) sitemaps and sitemap indexes, the
+bounded per-site cache, pacing through the host limiter and the robots.txt
+size cap, that crawl_domain queues sitemap pages of a homepage without
+links, and that sitemap pages are ranked in without undoing the homepage's
+anchor-text ranking
+"""
+import asyncio
+import gzip
+
+import httpx
+
+import main
+from dns_prefilter import DnsPrefilter, StubResolver
+from page_parser import internal_links, parse_html
+from result_sink import ResultSink
+from sitemaps import RobotsRules, SitemapDiscovery, SitemapReader
+
+NS = 'xmlns="http://www.sitemaps.org/schemas/sitemap/0.9"'
+
+
+def urlset(*urls):
+    entries = ''.join(f'<url><loc>{url}</loc><lastmod>2024-01-01</lastmod></url>' for url in urls)
+    return f'<?xml version="1.0" encoding="UTF-8"?><urlset {NS}>{entries}</urlset>'
+
+
+def test_robots_rules():
+    robots = RobotsRules.parse(
+        'User-agent: Googlebot\n'
+        'Disallow: /\n'
+        '\n'
+        'User-agent: bingbot\n'
+        'User-agent: *\n'
+        'Disallow: /private  # staff only\n'
+        'Disallow: /*?\n'
+        'Allow: /private/catalog$\n'
+        '\n'
+        'Sitemap: https://shop.com/sitemap_index.xml\n'
+    )
+    assert robots.sitemaps == ['https://shop.com/sitemap_index.xml']
+    assert robots.allows('https://shop.com/capabilities')
+    assert not robots.allows('https://shop.com/private/staff')
+    assert robots.allows('https://shop.com/private/catalog')  # the longer rule wins
+    assert RobotsRules().allows('https://shop.com/anything')
+
+
+def test_reader_streams_gzip_and_stops_at_max_urls():
+    body = gzip.compress(urlset(*(f'https://shop.com/p{i}' for i in range(5000))).encode())
+    reader = SitemapReader(max_urls=10)
+    for start in range(0, len(body), 512):
+        reader.feed(body[start:start + 512])
+        if reader.full:
+            break
+    assert reader.pages[:2] == ['https://shop.com/p0', 'https://shop.com/p1']
+    assert 10 <= len(reader.pages) < 5000
+
+
+def test_index_is_followed_and_cached():
+    index = (f'<sitemapindex {NS}>'
+             '<sitemap><loc>https://shop.com/products.xml.gz</loc></sitemap>'
+             '<sitemap><loc>https://shop.com/pages.xml</loc></sitemap></sitemapindex>')
+    bodies = {
+        '/robots.txt': b'User-agent: *\nDisallow: /cart\nSitemap: https://shop.com/index.xml\n',
+        '/index.xml': index.encode(),
+        '/products.xml.gz': gzip.compress(urlset('https://shop.com/products/lathe',
+                                                 'https://other.com/elsewhere').encode()),
+        '/pages.xml': urlset('https://www.shop.com/capabilities', 'https://shop.com/cart').encode(),
+    }
+    fetched = []
+
+    def handler(request):
+        fetched.append(request.url.path)
+        if request.url.path not in bodies:
+            return httpx.Response(404)
+        return httpx.Response(200, content=bodies[request.url.path])
+
+    discovery = SitemapDiscovery()
+
+    async def discover_twice():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as session:
+            first = await discovery.discover('https://www.shop.com', session)
+            second = await discovery.discover('https://shop.com', session)
+            return first, second
+
+    (pages, robots), (cached_pages, _) = asyncio.run(discover_twice())
+
+    assert pages == ['https://shop.com/products/lathe', 'https://www.shop.com/capabilities', 'https://shop.com/cart']
+    assert not robots.allows('https://shop.com/cart')
+    assert cached_pages == pages
+    assert len(fetched) == 4
+    assert discovery.stats()['cache_hits'] == 1
+
+
+def test_crawl_queues_sitemap_pages(monkeypatch):
+    # A JavaScript-rendered homepage: no links to follow
+    home = '<html><body><div id="app"></div><p>CNC machining</p></body></html>'
+    bodies = {
+        '/robots.txt': 'User-agent: *\nDisallow: /account\n',
+        '/sitemap.xml': urlset('https://shop.com/blog/2021/04/open-house', 'https://shop.com/account/orders',
+                               'https://shop.com/materials'),
+    }
+    fetched = []
+
+    def handler(request):
+        fetched.append(request.url.path)
+        if request.url.path in bodies:
+            return httpx.Response(200, text=bodies[request.url.path])
+        if request.url.path == '/':
+            return httpx.Response(200, text=home, headers={'content-type': 'text/html'})
+        return httpx.Response(200, text='<p>titanium</p>', headers={'content-type': 'text/html'})
+
+    monkeypatch.setattr(main, 'dns_prefilter', DnsPrefilter(StubResolver({'shop.com': ['192.0.2.1']})))
+    monkeypatch.setattr(main, 'sitemap_discovery', SitemapDiscovery())
+    monkeypatch.setattr(main.random, 'uniform', lambda a, b: 0)
+    monkeypatch.setattr(main, 'MAX_PAGES_IN_FLIGHT', 1)
+    monkeypatch.setattr(main, 'HOST_REQUEST_DELAY', 0)
+    monkeypatch.setattr(main, 'host_limiter', main.HostRateLimiter(rate=None))
+    monkeypatch.setattr(main, 'performance_stats', {**main.performance_stats, 'pages_disallowed': 0})
+
+    async def crawl():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as session, \
+                ResultSink(lambda rows: None, log=lambda msg: None) as sink:
+            return await main.crawl_domain('https://shop.com', session, sink)
+
+    result = asyncio.run(crawl())
+
+    pages = [path for path in fetched if path not in ('/', '/robots.txt', '/sitemap.xml')]
+    assert pages == ['/materials', '/blog/2021/04/open-house']
+    assert 'titanium' in result['website_metals']
+    assert main.performance_stats['pages_disallowed'] == 1
+
+
+def test_homepage_anchor_ranking_is_kept(monkeypatch):
+    home = ('<a href="/company">Company</a><a href="/x">Materials we machine</a>'
+            '<a href="/privacy">Privacy</a>')
+    homepage_links = internal_links(parse_html(home), 'shop.com')
+    assert homepage_links == ['https://shop.com/x', 'https://shop.com/company', 'https://shop.com/privacy']
+    sitemap = {'/sitemap.xml': urlset('https://shop.com/company', 'https://shop.com/capabilities',
+                                      'https://shop.com/blog/2021/04/open-house')}
+
+    async def discover(bodies):
+        def handler(request):
+            if request.url.path in bodies:
+                return httpx.Response(200, text=bodies[request.url.path])
+            return httpx.Response(404)
+
+        monkeypatch.setattr(main, 'sitemap_discovery', SitemapDiscovery())
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as session:
+            return await main.discover_pages('https://shop.com', session, homepage_links)
+
+    # No robots.txt, no sitemap: the homepage's order as ranked with its anchors
+    assert asyncio.run(discover({})) == homepage_links
+    # Sitemap pages are ranked in around it
+    assert asyncio.run(discover(sitemap)) == [
+        'https://shop.com/capabilities',
+        'https://shop.com/x',
+        'https://shop.com/company',
+        'https://shop.com/privacy',
+        'https://shop.com/blog/2021/04/open-house',
+    ]
+
+
+def test_fetches_are_paced_capped_and_the_cache_bounded():
+    sent = []
+
+    def handler(request):
+        if request.url.path == '/robots.txt':
+            # 2 MB of comments before the Sitemap: line
+            stream = httpx.ByteStream(b'# filler\n' * 240_000 + b'Sitemap: https://a.com/late.xml\n')
+            return httpx.Response(200, stream=stream)
+        return httpx.Response(404)
+
+    class Limiter:
+        async def acquire(self, host):
+            sent.append(host)
+
+    now = [0.0]
+    discovery = SitemapDiscovery(ttl=60, max_sites=2, limiter=Limiter(), clock=lambda: now[0])
+
+    async def discover(*origins):
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as session:
+            for origin in origins:
+                await discovery.discover(origin, session)
+
+    asyncio.run(discover('https://a.com'))
+    assert sent == ['a.com', 'a.com']  # robots.txt, then /sitemap.xml: the Sitemap: line was past the cap
+    now[0] = 100.0  # a.com expired
+    asyncio.run(discover('https://b.com', 'https://c.com', 'https://d.com'))
+    assert list(discovery._cache) == ['c.com', 'd.com']
@@ -0,0 +1,96 @@
+"""
+Checks that try_url_variations races the URL variations: the first homepage
+wins, redirects are shared between probes, a dead domain gives up after one
+timeout window, and a rate-limited homepage is retried once when its wait
+fits in that window
+"""
+import asyncio
+import time
+
+import httpx
+
+import main
+
+PAGE = '<html><body><p>CNC machining</p><a href="/about">About</a></body></html>'
+
+
+def probe(handler, domain='shop.example'):
+    async def scenario():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as session:
+            return await main.try_url_variations(domain, session)
+    return asyncio.run(scenario())
+
+
+def test_redirect_target_is_not_probed_twice():
+    requested = []
+
+    def handler(request):
+        requested.append(str(request.url))
+        if request.url.host == 'shop.example':
+            return httpx.Response(301, headers={'location': 'https://www.shop.example/'})
+        return httpx.Response(200, text=PAGE, headers={'content-type': 'text/html'})
+
+    result, url = probe(handler)
+
+    assert url == 'https://www.shop.example/'
+    assert result['links'] == ['https://shop.example/about']
+    assert requested == ['https://shop.example', 'https://www.shop.example/']
+
+
+def test_failed_variation_starts_the_next_one_at_once(monkeypatch):
+    monkeypatch.setattr(main, 'PROBE_STAGGER', 5.0)
+
+    def handler(request):
+        if request.url.scheme == 'https':
+            raise httpx.ConnectError('connection refused', request=request)
+        return httpx.Response(200, text=PAGE, headers={'content-type': 'text/html'})
+
+    start = time.perf_counter()
+    result, url = probe(handler)
+
+    assert url == 'http://shop.example'
+    assert time.perf_counter() - start < 1
+
+
+def test_dead_domain_gives_up_after_one_timeout_window(monkeypatch):
+    monkeypatch.setattr(main, 'PROBE_TIMEOUT', 0.5)
+    monkeypatch.setattr(main, 'PROBE_STAGGER', 0.05)
+    requested = []
+
+    async def handler(request):
+        requested.append(str(request.url))
+        await asyncio.sleep(60)
+
+    start = time.perf_counter()
+    result, url = probe(handler)
+
+    assert (result, url) == (None, None)
+    assert time.perf_counter() - start < 1
+    assert len(requested) == 4
+
+
+def test_rate_limited_homepage_is_retried_within_the_window(monkeypatch):
+    monkeypatch.setattr(main, 'host_limiter', main.HostRateLimiter(rate=10))
+    requested = []
+
+    def recovers(request):
+        requested.append(str(request.url))
+        if requested.count(str(request.url)) == 1:
+            return httpx.Response(429, headers={'retry-after': '0'})
+        return httpx.Response(200, text=PAGE, headers={'content-type': 'text/html'})
+
+    result, url = probe(recovers)
+    assert url == 'https://shop.example'
+    assert requested[:2] == ['https://shop.example', 'https://shop.example']
+
+    def stays_limited(request):
+        requested.append(str(request.url))
+        if request.url.scheme == 'http':
+            return httpx.Response(503)  # no Retry-After: retried at the throttled host's next slot
+        return httpx.Response(429, headers={'retry-after': '60'})  # too long for the probe window
+
+    requested.clear()
+    assert probe(stays_limited) == (None, None)
+    assert requested.count('https://shop.example') == 1
+    assert requested.count('http://shop.example') == 2
+    assert main.host_limiter.host_rate('shop.example') == 5
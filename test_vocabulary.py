@@ -0,0 +1,129 @@
+"""
+Checks the vocabulary file format, the compiled-matcher cache keyed by content
+hash, and hot reload of a changed vocabulary between batches and during a
+stream
+"""
+import asyncio
+import os
+
+import pytest
+
+import main
+import vocabulary
+from vocabulary import VocabularyError, VocabularyWatcher, load_matcher, parse_vocabulary
+from work_claims import LocalClaimStore
+
+SAMPLE = '''# test vocabulary
+format 1
+version 7
+
+[keywords]
+# machining
+cnc
+injection molding
+
+[brands]
+haas
+
+[plastics]
+abs
+
+[metals]
+titanium
+'''
+
+
+def write(path, text):
+    path.write_text(text, encoding='utf-8')
+    # Make sure the watcher sees a new mtime even on coarse-grained filesystems
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+
+def test_parse_sections_and_header():
+    vocab = parse_vocabulary(SAMPLE)
+
+    assert vocab.version == '7'
+    assert vocab.keywords == ['cnc', 'injection molding']
+    assert (vocab.brands, vocab.plastics, vocab.metals) == (['haas'], ['abs'], ['titanium'])
+
+    with pytest.raises(VocabularyError):
+        parse_vocabulary(SAMPLE.replace('format 1', 'format 2'))
+    with pytest.raises(VocabularyError):
+        parse_vocabulary(SAMPLE.replace('[metals]', '[alloys]'))
+
+
+def test_compiled_matcher_is_cached_by_content_hash(tmp_path, monkeypatch):
+    path = tmp_path / 'vocabulary.txt'
+    write(path, SAMPLE)
+
+    vocab, compiled = load_matcher(path, tmp_path / 'cache')
+    assert compiled.match('cnc parts in titanium')['metals'] == {'titanium'}
+    assert len(list((tmp_path / 'cache').glob('matcher-*.pickle'))) == 1
+
+    # Same content: the artifact is loaded, nothing is compiled
+    def no_compile(*args):
+        raise AssertionError('matcher rebuilt')
+    monkeypatch.setattr(vocabulary, 'KeywordMatcher', no_compile)
+    again, cached = load_matcher(path, tmp_path / 'cache')
+    assert again.digest == vocab.digest
+    assert cached.match('haas vf-2')['brands'] == {'haas'}
+
+
+def test_shipped_vocabulary_loads():
+    vocab, compiled = load_matcher(main.VOCABULARY_FILE, main.VOCABULARY_CACHE_DIR)
+
+    assert vocab.keywords == main.MANUFACTURING_TERMS
+    assert len(vocab.brands) > 100
+
+
+def test_changed_vocabulary_is_reloaded_between_batches(tmp_path, monkeypatch):
+    path = tmp_path / 'vocabulary.txt'
+    write(path, SAMPLE)
+    vocab, compiled = load_matcher(path, tmp_path / 'cache')
+    watcher = VocabularyWatcher(path, tmp_path / 'cache', vocab)
+    for name in ('VOCABULARY', 'MATCHER', 'MANUFACTURING_TERMS', 'BRANDS', 'PLASTICS', 'METALS'):
+        monkeypatch.setattr(main, name, getattr(main, name))
+    monkeypatch.setattr(main, 'vocabulary_watcher', watcher)
+
+    # Touched but unchanged: no reload
+    write(path, SAMPLE)
+    assert main.reload_vocabulary() is False
+
+    write(path, SAMPLE.replace('titanium', 'titanium\nunobtanium').replace('version 7', 'version 8'))
+    assert main.reload_vocabulary() is True
+    assert main.VOCABULARY.version == '8'
+    assert main.METALS == ['titanium', 'unobtanium']
+    assert main.match_text('made of unobtanium', 'https://a.com')['metals'] == {'unobtanium'}
+
+    # A broken file keeps the current vocabulary
+    write(path, 'format 1\n[alloys]\nx\n')
+    assert main.reload_vocabulary() is False
+    assert main.VOCABULARY.version == '8'
+
+
+def test_stream_picks_up_a_changed_vocabulary(tmp_path, monkeypatch):
+    path = tmp_path / 'vocabulary.txt'
+    write(path, SAMPLE)
+    vocab, compiled = load_matcher(path, tmp_path / 'cache')
+    for name in ('VOCABULARY', 'MATCHER', 'MANUFACTURING_TERMS', 'BRANDS', 'PLASTICS', 'METALS'):
+        monkeypatch.setattr(main, name, getattr(main, name))
+    monkeypatch.setattr(main, 'vocabulary_watcher', VocabularyWatcher(path, tmp_path / 'cache', vocab))
+    store = LocalClaimStore()
+    store.add_domains(['a.com', 'b.com'])
+    monkeypatch.setattr(main, 'claim_store', store)
+    monkeypatch.setattr(main, 'claimed_keys', {})
+    monkeypatch.setattr(main, 'STREAM_VOCAB_CHECK_EVERY', 1)
+    monkeypatch.setattr(main, 'log', lambda msg: None)
+    versions = []
+
+    async def crawl_tracked(domain, session, sink):
+        versions.append(main.VOCABULARY.version)
+
+    monkeypatch.setattr(main, 'crawl_tracked', crawl_tracked)
+
+    # Edited while a stream is running: no batch boundary to reload at
+    write(path, SAMPLE.replace('version 7', 'version 8'))
+    asyncio.run(main.process_stream('w1'))
+
+    assert versions == ['8', '8']
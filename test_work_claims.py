@@ -0,0 +1,153 @@
+"""
+Checks the claim / lease protocol against the SQLite stand-in for the domains table,
+that leases and results use the keys the rows were claimed as, and that
+the stream reports its claimed domains as waiting
+"""
+import asyncio
+import threading
+
+import main
+from work_claims import LocalClaimStore, LeaseKeeper, CLAIMED_STATUS
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_parallel_workers_never_claim_the_same_domain(tmp_path):
+    path = tmp_path / 'domains.db'
+    LocalClaimStore(path).add_domains([f'd{i}.com' for i in range(200)])
+
+    claimed = {}
+
+    def worker(worker_id):
+        store = LocalClaimStore(path)  # own connection, like a separate process
+        claimed[worker_id] = []
+        while True:
+            batch = store.claim(worker_id, 7, lease_seconds=600)
+            if not batch:
+                return
+            claimed[worker_id].extend(batch)
+
+    threads = [threading.Thread(target=worker, args=(f'w{n}',)) for n in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    all_claims = [d for batch in claimed.values() for d in batch]
+    assert len(all_claims) == 200
+    assert len(set(all_claims)) == 200
+
+
+def test_expired_leases_are_reclaimed_and_renewal_keeps_them():
+    clock = FakeClock()
+    store = LocalClaimStore(clock=clock)
+    store.add_domains(['a.com', 'b.com'])
+
+    assert sorted(store.claim('crashed', 10, lease_seconds=60)) == ['a.com', 'b.com']
+    assert store.claim('other', 10, lease_seconds=60) == []
+
+    clock.now += 30
+    # Only the lease holder can renew
+    assert store.renew('other', ['a.com'], 60) == 0
+    assert store.renew('crashed', ['a.com'], 60) == 1
+
+    clock.now += 45  # b.com expired, a.com was renewed
+    assert store.claim('other', 10, lease_seconds=60) == ['b.com']
+    assert store.status('b.com') == (CLAIMED_STATUS, 'other')
+
+
+def test_finished_rows_are_not_claimable():
+    clock = FakeClock()
+    store = LocalClaimStore(clock=clock)
+    store.add_domains(['a.com', 'b.com'])
+    store.claim('w1', 10, lease_seconds=60)
+
+    store.write_rows([{'domain': 'a.com', 'website_scrape_status': 'completed',
+                       'website_keywords': ['cnc', 'lathe']}])
+    clock.now += 120
+
+    assert store.claim('w2', 10, lease_seconds=60) == ['b.com']
+    assert store.status('a.com')[0] == 'completed'
+    assert store.renew('w1', ['a.com'], 60) == 0
+
+
+def test_lease_keeper_renews_in_background():
+    clock = FakeClock()
+    store = LocalClaimStore(clock=clock)
+    store.add_domains(['a.com'])
+    store.claim('w1', 10, lease_seconds=0.06)
+
+    async def scenario():
+        async with LeaseKeeper(store, 'w1', ['a.com'], lease_seconds=0.06, log=lambda msg: None):
+            clock.now += 0.05
+            await asyncio.sleep(0.05)  # at least one renewal (every 0.02s)
+
+    asyncio.run(scenario())
+    # Renewed at the later clock time, so the lease outlives the original one
+    expires = store.db.execute('SELECT website_lease_expires_at FROM domains').fetchone()[0]
+    assert expires > 1000.06
+
+
+def test_leases_are_renewed_under_the_claimed_keys(monkeypatch):
+    clock = FakeClock()
+    store = LocalClaimStore(clock=clock)
+    store.add_domains(['www.Acme.com', 'https://acme.com/', 'b.com'])
+    monkeypatch.setattr(main, 'claim_store', store)
+    monkeypatch.setattr(main, 'claimed_keys', {})
+
+    domains = main.get_pending_domains(10, 'w1')
+
+    assert sorted(domains) == ['acme.com', 'b.com']
+    # Both rows merged into acme.com stay leased to this worker
+    assert sorted(main.claimed_rows(['acme.com'])) == ['https://acme.com/', 'www.Acme.com']
+    assert store.renew('w1', main.claimed_rows(domains), 60) == 3
+
+
+def test_results_update_the_claimed_rows(monkeypatch):
+    store = LocalClaimStore()
+    store.add_domains(['www.Acme.com', 'https://acme.com/', 'b.com'])
+    monkeypatch.setattr(main, 'claim_store', store)
+    monkeypatch.setattr(main, 'claimed_keys', {})
+    main.get_pending_domains(10, 'w1')
+
+    main.save_domain_results([
+        {'domain': 'acme.com', 'website_scrape_status': 'completed', 'website_keywords': ['cnc']},
+        {'domain': 'b.com', 'website_scrape_status': 'timeout'},
+    ])
+
+    rows = store.db.execute('SELECT domain, website_scrape_status, website_keywords FROM domains ORDER BY domain')
+    assert rows.fetchall() == [
+        ('b.com', 'timeout', None),
+        ('https://acme.com/', 'completed', 'cnc'),
+        ('www.Acme.com', 'completed', 'cnc'),
+    ]  # no new acme.com row
+    assert main.claimed_keys == {}
+
+
+def test_stream_reports_claimed_domains_waiting(monkeypatch):
+    store = LocalClaimStore()
+    store.add_domains([f'd{i}.com' for i in range(6)])
+    monkeypatch.setattr(main, 'claim_store', store)
+    monkeypatch.setattr(main, 'claimed_keys', {})
+    monkeypatch.setattr(main, 'CONCURRENT_DOMAINS', 1)
+    monkeypatch.setattr(main, 'STREAM_CLAIM_SIZE', 3)
+    monkeypatch.setattr(main, 'log', lambda msg: None)
+    waiting = []
+
+    async def crawl_tracked(domain, session, sink):
+        waiting.append(main.domains_waiting)
+        await sink.put(domain, {'website_scrape_status': 'completed'})
+
+    monkeypatch.setattr(main, 'crawl_tracked', crawl_tracked)
+
+    asyncio.run(main.process_stream('w1'))
+
+    # The single slot works through each claimed chunk while the rest wait their turn
+    assert waiting == [2, 1, 0, 2, 1, 0]
+    assert main.domains_waiting == 0
@@ -0,0 +1,135 @@
+"""
+Vocabulary file loading and the compiled-matcher cache
+The term lists live in vocabulary.txt (see its header for the format). A
+KeywordMatcher compiled from it is pickled into a cache directory under the
+SHA-256 of the file plus matcher.py, so startup loads the artifact instead of
+rebuilding, and editing either file gets a fresh build.
+
+VocabularyWatcher lets a long-running worker notice that the file changed and
+swap in the new matcher between batches.
+"""
+
+import hashlib
+import os
+import pickle
+import tempfile
+from pathlib import Path
+
+import matcher
+from matcher import KeywordMatcher
+
+FORMAT_VERSION = 1
+SECTIONS = ('keywords', 'brands', 'plastics', 'metals')
+
+
+class VocabularyError(ValueError):
+    """The vocabulary file is malformed"""
+
+
+class Vocabulary:
+    """Term lists of one vocabulary file, plus its version string and content hash"""
+
+    def __init__(self, version, digest, keywords, brands, plastics, metals):
+        self.version = version
+        self.digest = digest
+        self.keywords = keywords
+        self.brands = brands
+        self.plastics = plastics
+        self.metals = metals
+
+
+def _digest(data):
+    # matcher.py is part of the key: a pickled matcher is only valid for the code that built it
+    code = Path(matcher.__file__).read_bytes()
+    return hashlib.sha256(data + b'\0' + code).hexdigest()
+
+
+def parse_vocabulary(text, digest=None):
+    """Parse the vocabulary file format"""
+    version = None
+    file_format = None
+    terms = {section: [] for section in SECTIONS}
+    current = None
+
+    for number, raw in enumerate(text.splitlines(), 1):
+        line = raw.strip()
+        if not line or line.startswith('#'):
+            continue
+        if line.startswith('[') and line.endswith(']'):
+            current = line[1:-1]
+            if current not in terms:
+                raise VocabularyError(f"line {number}: unknown section [{current}]")
+        elif current is None:
+            key, _, value = line.partition(' ')
+            if key == 'format':
+                file_format = int(value)
+            elif key == 'version':
+                version = value.strip()
+            else:
+                raise VocabularyError(f"line {number}: expected 'format', 'version' or a [section]")
+        else:
+            terms[current].append(line)
+
+    if file_format != FORMAT_VERSION:
+        raise VocabularyError(f"unsupported vocabulary format {file_format} (expected {FORMAT_VERSION})")
+    return Vocabulary(version, digest, **terms)
+
+
+def load_vocabulary(path):
+    """Read and parse a vocabulary file"""
+    data = Path(path).read_bytes()
+    return parse_vocabulary(data.decode('utf-8'), _digest(data))
+
+
+def load_matcher(path, cache_dir):
+    """(vocabulary, matcher) for a vocabulary file, using the compiled artifact when cached"""
+    vocabulary = load_vocabulary(path)
+    cache_dir = Path(cache_dir)
+    artifact = cache_dir / f"matcher-{vocabulary.digest[:24]}.pickle"
+
+    try:
+        with open(artifact, 'rb') as f:
+            return vocabulary, pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError):
+        pass
+
+    compiled = KeywordMatcher(vocabulary.keywords, vocabulary.brands, vocabulary.plastics, vocabulary.metals)
+    try:
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        # Written to a temp file and renamed, so a concurrent reader never sees half an artifact
+        fd, tmp = tempfile.mkstemp(dir=cache_dir, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            pickle.dump(compiled, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, artifact)
+    except OSError:
+        pass  # read-only cache location: just don't cache
+    return vocabulary, compiled
+
+
+class VocabularyWatcher:
+    """Reloads the matcher when the vocabulary file's content changes"""
+
+    def __init__(self, path, cache_dir, vocabulary):
+        self.path = path
+        self.cache_dir = cache_dir
+        self.vocabulary = vocabulary
+        self._stamp = self._stat()
+
+    def _stat(self):
+        try:
+            st = os.stat(self.path)
+            return st.st_mtime_ns, st.st_size
+        except OSError:
+            return None
+
+    def check(self):
+        """(vocabulary, matcher) if the file now has different content, else None"""
+        stamp = self._stat()
+        if stamp is None or stamp == self._stamp:
+            return None
+        self._stamp = stamp
+        vocabulary, compiled = load_matcher(self.path, self.cache_dir)
+        if vocabulary.digest == self.vocabulary.digest:
+            return None  # touched, not changed
+        self.vocabulary = vocabulary
+        return vocabulary, compiled
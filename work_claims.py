@@ -0,0 +1,238 @@
+"""
+Work claiming / leasing so several scraper workers can share one domains table
+A worker claims a batch in one atomic step: the rows are marked in_progress
+with its worker id and a lease expiry. While it works, a LeaseKeeper renews
+the lease. Rows whose lease ran out (crashed worker) are claimable again.
+With stale_before, finished rows scraped before that time are claimable too
+(re-crawl), and page_history() returns what their last crawl stored per page.
+
+Results are written back with save_results(): an update of the claimed rows
+only, keyed by the domain the row was claimed as, so it never inserts a row.
+With skip_leased (re-extraction, which holds no claim) rows another worker
+has in_progress under a live lease are left alone.
+
+SupabaseClaimStore talks to the claim_scrape_batch / renew_scrape_leases /
+save_scrape_results SQL functions (see README). LocalClaimStore is an SQLite stand-in with the same
+protocol, for testing offline.
+"""
+
+import asyncio
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+
+CLAIMED_STATUS = 'in_progress'
+
+
+def make_worker_id():
+    """Unique id for this worker process: host, pid and a short random suffix"""
+    return f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+
+
+class SupabaseClaimStore:
+    """Claims and renews leases through Postgres functions on the domains table"""
+
+    def __init__(self, client):
+        self.client = client
+
+    def claim(self, worker_id, limit, lease_seconds, stale_before=None):
+        """Atomically lease up to limit claimable domains to worker_id"""
+        response = self.client.rpc('claim_scrape_batch', {
+            'p_worker_id': worker_id,
+            'p_limit': limit,
+            'p_lease_seconds': lease_seconds,
+            'p_stale_before': stale_before,
+        }).execute()
+        return [row['domain'] for row in response.data if row.get('domain')]
+
+    def page_history(self, domains):
+        """{domain: website_pages} stored by the last crawl of each domain (if any)"""
+        if not domains:
+            return {}
+        response = self.client.table('domains').select('domain,website_pages') \
+            .in_('domain', list(domains)).execute()
+        return {row['domain']: row['website_pages'] for row in response.data if row.get('website_pages')}
+
+    def renew(self, worker_id, domains, lease_seconds):
+        """Extend the lease on domains still held by worker_id; returns how many were renewed"""
+        response = self.client.rpc('renew_scrape_leases', {
+            'p_worker_id': worker_id,
+            'p_domains': list(domains),
+            'p_lease_seconds': lease_seconds,
+        }).execute()
+        return response.data or 0
+
+    def save_results(self, rows, skip_leased=False):
+        """Update the rows of the given domains with their result columns; returns how many were updated"""
+        response = self.client.rpc('save_scrape_results', {'p_rows': rows, 'p_skip_leased': skip_leased}).execute()
+        return response.data or 0
+
+
+class LocalClaimStore:
+    """SQLite stand-in for the domains table, implementing the same claim protocol"""
+
+    def __init__(self, path=':memory:', clock=time.time):
+        self.clock = clock
+        self._lock = threading.Lock()
+        self.db = sqlite3.connect(path, isolation_level=None, check_same_thread=False, timeout=30)
+        self.db.execute('''
+            CREATE TABLE IF NOT EXISTS domains (
+                domain TEXT PRIMARY KEY,
+                website_scrape_status TEXT DEFAULT 'pending',
+                website_worker_id TEXT,
+                website_lease_expires_at REAL,
+                website_scraped_at TEXT,
+                website_keywords TEXT,
+                website_brands TEXT,
+                website_plastics TEXT,
+                website_metals TEXT,
+                website_pages TEXT
+            )
+        ''')
+
+    def add_domains(self, domains, status='pending'):
+        """Insert domains that are not in the table yet"""
+        with self._lock:
+            self.db.executemany(
+                'INSERT OR IGNORE INTO domains (domain, website_scrape_status) VALUES (?, ?)',
+                [(d, status) for d in domains]
+            )
+
+    def claim(self, worker_id, limit, lease_seconds, stale_before=None):
+        """Atomically lease up to limit claimable domains to worker_id"""
+        now = self.clock()
+        with self._lock:
+            # BEGIN IMMEDIATE takes the write lock, so other processes on the same file wait
+            self.db.execute('BEGIN IMMEDIATE')
+            try:
+                rows = self.db.execute('''
+                    SELECT domain FROM domains
+                    WHERE website_scrape_status = 'pending'
+                       OR website_scrape_status IS NULL
+                       OR (website_scrape_status = ? AND website_lease_expires_at < ?)
+                       OR (website_scrape_status != ? AND website_scraped_at < ?)
+                    LIMIT ?
+                ''', (CLAIMED_STATUS, now, CLAIMED_STATUS, stale_before, limit)).fetchall()
+                domains = [row[0] for row in rows]
+                self.db.executemany('''
+                    UPDATE domains
+                    SET website_scrape_status = ?, website_worker_id = ?, website_lease_expires_at = ?
+                    WHERE domain = ?
+                ''', [(CLAIMED_STATUS, worker_id, now + lease_seconds, d) for d in domains])
+                self.db.execute('COMMIT')
+            except BaseException:
+                self.db.execute('ROLLBACK')
+                raise
+        return domains
+
+    def renew(self, worker_id, domains, lease_seconds):
+        """Extend the lease on domains still held by worker_id; returns how many were renewed"""
+        domains = list(domains)
+        if not domains:
+            return 0
+        with self._lock:
+            cursor = self.db.execute(f'''
+                UPDATE domains SET website_lease_expires_at = ?
+                WHERE website_scrape_status = ? AND website_worker_id = ?
+                  AND domain IN ({','.join('?' * len(domains))})
+            ''', (self.clock() + lease_seconds, CLAIMED_STATUS, worker_id, *domains))
+        return cursor.rowcount
+
+    def write_rows(self, rows):
+        """Insert rows, or overwrite the given columns of rows already there (seeds a local table)"""
+        with self._lock:
+            for row in rows:
+                columns = list(row)
+                values = [
+                    ','.join(v) if isinstance(v, list) else json.dumps(v) if isinstance(v, dict) else v
+                    for v in row.values()
+                ]
+                self.db.execute(
+                    f"INSERT INTO domains ({','.join(columns)}) VALUES ({','.join('?' * len(columns))}) "
+                    f"ON CONFLICT(domain) DO UPDATE SET "
+                    + ','.join(f'{c} = excluded.{c}' for c in columns if c != 'domain'),
+                    values
+                )
+
+    def save_results(self, rows, skip_leased=False):
+        """Update the rows of the given domains with their result columns; returns how many were updated"""
+        updated = 0
+        leased = ' AND NOT (website_scrape_status = ? AND website_lease_expires_at > ?)' if skip_leased else ''
+        with self._lock:
+            for row in rows:
+                columns = [c for c in row if c != 'domain']
+                values = [
+                    ','.join(v) if isinstance(v, list) else json.dumps(v) if isinstance(v, dict) else v
+                    for v in (row[c] for c in columns)
+                ]
+                cursor = self.db.execute(
+                    f"UPDATE domains SET {','.join(f'{c} = ?' for c in columns)} WHERE domain = ?{leased}",
+                    (*values, row['domain'], *((CLAIMED_STATUS, self.clock()) if skip_leased else ()))
+                )
+                updated += cursor.rowcount
+        return updated
+
+    def page_history(self, domains):
+        """{domain: website_pages} stored by the last crawl of each domain (if any)"""
+        domains = list(domains)
+        if not domains:
+            return {}
+        with self._lock:
+            rows = self.db.execute(
+                f"SELECT domain, website_pages FROM domains WHERE website_pages IS NOT NULL "
+                f"AND domain IN ({','.join('?' * len(domains))})", domains
+            ).fetchall()
+        return {domain: json.loads(pages) for domain, pages in rows}
+
+    def status(self, domain):
+        """(status, worker id) of one domain"""
+        row = self.db.execute(
+            'SELECT website_scrape_status, website_worker_id FROM domains WHERE domain = ?', (domain,)
+        ).fetchone()
+        return row
+
+
+class LeaseKeeper:
+    """Renews this worker's leases in the background while a batch is being worked"""
+
+    def __init__(self, store, worker_id, domains, lease_seconds, log=print):
+        self.store = store
+        self.worker_id = worker_id
+        self.domains = set(domains)
+        self.lease_seconds = lease_seconds
+        self.interval = lease_seconds / 3
+        self.log = log
+        self._task = None
+
+    def hold(self, domains):
+        """Start renewing newly claimed domains"""
+        self.domains.update(domains)
+
+    def release(self, domain):
+        """Stop renewing a domain once it has been crawled"""
+        self.domains.discard(domain)
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            if not self.domains:
+                continue
+            try:
+                renewed = await asyncio.to_thread(
+                    self.store.renew, self.worker_id, list(self.domains), self.lease_seconds
+                )
+                self.log(f"🔒 Renewed lease on {renewed} in-progress domains")
+            except Exception as e:
+                self.log(f"⚠️ Lease renewal failed: {str(e)}")
+
+    async def __aenter__(self):
+        self._task = asyncio.create_task(self._run())
+        return self
+
+    async def __aexit__(self, *exc):
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)